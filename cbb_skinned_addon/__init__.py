@@ -19,6 +19,8 @@ if shared_dir not in sys.path:
     sys.path.append(shared_dir)
 import utils
 
+from .core import skeleton_core
+from .core import animation_preview
 from .operators import mesh_operators
 from .operators import skeleton_operators
 from .operators import animation_operators
@@ -31,6 +33,8 @@ def register():
     skeleton_operators.register()
     animation_operators.register()
     utils.register()
+    skeleton_core.register()
+    animation_preview.register()
     ui_properties.register()
     custom_panel.register()
     
@@ -40,6 +44,8 @@ def unregister():
     skeleton_operators.unregister()
     animation_operators.unregister()
     utils.unregister()
+    skeleton_core.unregister()
+    animation_preview.unregister()
     custom_panel.unregister()
     ui_properties.unregister()
 
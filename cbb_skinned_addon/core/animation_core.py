@@ -7,77 +7,126 @@ import math
 import traceback
 from utils import Utils, CoordsSys
 import xml.etree.ElementTree as ET
-from ..core.skeleton_core import SkeletonData
+from ..core.skeleton_core import SkeletonData, SkeletonDataCache, ArmatureIndex
 Serializer = Utils.Serializer
 CoordinatesConverter = Utils.CoordinatesConverter
 from pathlib import Path
-from .mesh_core import try_get_skeleton_name_for_mesh
-
-def import_animation_from_files(debug: bool, file_name: str, directory: str, apply_to_armature_in_selected: bool, skeleton_name = "", operator: Operator = None):
-    msg_handler = Utils.MessageHandler(debug, operator.report)
-    
-    return_value = {"CANCELLED"}
+from .project_index import ProjectIndex
+from .asset_catalog import AssetCatalog, HEADER_PROBE_SIZE
+from .prefetch import AssetPrefetcher
+from . import transform_math
+from . import keyframe_math
+from .keyframe_math import ReductionTolerances
+import numpy as np
+from typing import NamedTuple, Optional
+import struct
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Enum value of the LINEAR keyframe interpolation, as read and written by foreach_get/foreach_set
+FCURVE_INTERPOLATION_LINEAR = 1
+
+def probe_skinnedanim(filepath: str | Path) -> dict:
+    """
+    Reads only the header of a .SkinnedAnim file, at the same offsets used by import_animation_from_files:
+    {bone_count, frame_count, animated_rotation_count, animated_position_count, fixed_rotation_count, fixed_position_count}.
+    Raises an exception if the file can't be read or the header is incomplete.
+    """
+    with open(filepath, "rb") as opened_file:
+        data = opened_file.read(HEADER_PROBE_SIZE)
+    # Every value is preceded by an 8 bytes header, and the IsRelativeToParent value between the frame count and the bone counts is a single byte.
+    bone_count = struct.unpack_from("<I", data, 132)[0]
+    frame_count = struct.unpack_from("<I", data, 144)[0]
+    animated_rotation_count, animated_position_count, fixed_rotation_count, fixed_position_count = (struct.unpack_from("<I", data, offset)[0] for offset in (165, 177, 189, 201))
+    return {"bone_count": bone_count, "frame_count": frame_count,
+            "animated_rotation_count": animated_rotation_count, "animated_position_count": animated_position_count,
+            "fixed_rotation_count": fixed_rotation_count, "fixed_position_count": fixed_position_count}
+
+class SkinnedAnimData:
+    """
+    Decoded contents of a .SkinnedAnim file, with positions and rotations already converted to Blender coordinates.
+    Values are (M, 3) position and (M, 4) quaternion arrays. Animated values are stored frame by frame: the value of the n-th animated bone at a frame is at [frame * animated count + n].
+    """
     
-    if file_name.casefold().endswith(".skinnedanim"):
-        filepath: Path = Path(directory) / file_name
-
-        anim_bone_amount = 0
-        total_frames = 0
-        are_positions_relative_to_parent = False
-        number_of_bone_rotations_animated = 0
-        number_of_bone_positions_animated = 0
-        number_of_bone_rotations_fixed = 0
-        number_of_bone_positions_fixed = 0
-        animated_rotations_by_bone = []
-        animated_positions_by_bone = []
-        fixed_positions_by_bone = []
-        fixed_rotations_by_bone = []
-        dynamic_pos_bones = []
-        dynamic_rot_bones = []
-        static_pos_bones = []
-        static_rot_bones = []
-        is_bone_fixed_pos = []
-        is_bone_fixed_rot = []
-        
+    def __init__(self):
+        self.bone_count: int = 0
+        self.frame_count: int = 0
+        self.are_positions_relative_to_parent: bool = False
+        self.animated_rotation_count: int = 0
+        self.animated_position_count: int = 0
+        self.fixed_rotation_count: int = 0
+        self.fixed_position_count: int = 0
+        self.animated_rotations_by_bone: np.ndarray = np.empty((0, 4))
+        self.animated_positions_by_bone: np.ndarray = np.empty((0, 3))
+        self.fixed_positions_by_bone: np.ndarray = np.empty((0, 3))
+        self.fixed_rotations_by_bone: np.ndarray = np.empty((0, 4))
+        self.dynamic_pos_bones: list[int] = []
+        self.dynamic_rot_bones: list[int] = []
+        self.static_pos_bones: list[int] = []
+        self.static_rot_bones: list[int] = []
+        self.is_bone_fixed_pos: list[bool] = []
+        self.is_bone_fixed_rot: list[bool] = []
         # Input: bone_id, output: dynamic/static id of bone in dynamic/static arrays
-        inverse_dynamic_pos_bones_map = []
-        inverse_dynamic_rot_bones_map = []
-        inverse_static_pos_bones_map = []
-        inverse_static_rot_bones_map = []
-
-        skeleton_data = SkeletonData()
-
-        target_armature = None
-        
-        if apply_to_armature_in_selected == False:# Automatic suitable armature search
-            if skeleton_name == "":
-                skeleton_name = try_get_skeleton_name_for_animation(filepath, directory, msg_handler)
-                msg_handler.debug_print(f"Skeleton_name found: [{skeleton_name}]")
-            
-            if skeleton_name != "":
-                for obj in bpy.context.scene.objects:
-                    if obj.name.casefold() == skeleton_name.casefold() and obj.type == "ARMATURE":
-                        target_armature = obj
-                        break
-        else: # Choose the armature available along the selection, as long as there is only one armature.
-            for obj in bpy.context.selected_objects:
-                if obj.type == "ARMATURE":
-                    if target_armature is None:
-                        target_armature = obj
-                    else:
-                        msg_handler.report("ERROR", f"More than one armature has been found in the current selection. The imported animation can only be assigned to one armature at a time.")
-                        return return_value
-
+        self.inverse_dynamic_pos_bones_map: list[int] = []
+        self.inverse_dynamic_rot_bones_map: list[int] = []
+        self.inverse_static_pos_bones_map: list[int] = []
+        self.inverse_static_rot_bones_map: list[int] = []
     
-        if not target_armature:
-            msg_handler.report("ERROR", "No armature found in the scene for animation to import to.")
-            return return_value
-        else:
-            skeleton_data = SkeletonData.build_skeleton_from_armature(target_armature, False, False, msg_handler)
-            if skeleton_data is None:
-                msg_handler.report("ERROR", f"Armature [{target_armature}] which is the target of the imported animation has been found not valid. Aborting.")
-                return return_value
-            
+    def get_transform_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the positions (F, N, 3) and rotations (F, N, 4) of every bone at every frame (at least one frame), with the fixed values repeated at each frame.
+        """
+        frame_count = max(self.frame_count, 1)
+        positions = np.zeros((frame_count, self.bone_count, 3))
+        rotations = np.zeros((frame_count, self.bone_count, 4))
+        rotations[..., 0] = 1.0
+        if self.animated_position_count > 0:
+            positions[:self.frame_count, self.dynamic_pos_bones] = np.reshape(self.animated_positions_by_bone, (-1, self.animated_position_count, 3))
+        if self.animated_rotation_count > 0:
+            rotations[:self.frame_count, self.dynamic_rot_bones] = np.reshape(self.animated_rotations_by_bone, (-1, self.animated_rotation_count, 4))
+        if self.static_pos_bones:
+            positions[:, self.static_pos_bones] = np.reshape(self.fixed_positions_by_bone, (-1, 3))
+        if self.static_rot_bones:
+            rotations[:, self.static_rot_bones] = np.reshape(self.fixed_rotations_by_bone, (-1, 4))
+        return positions, rotations
+    
+    @staticmethod
+    def read_value_window(opened_file, data_offset: int, data_size: int, value_count: int, component_count: int, frame_start: int, frame_end: int, columns: np.ndarray) -> np.ndarray:
+        """
+        Reads the given columns of frames [frame_start, frame_end) of a frame-major block of value_count float32 vectors (component_count 3)
+        or XYZW quaternions (component_count 4) per frame, converted to Blender coordinates. Only the bytes of the frame window are read.
+        """
+        row_size = value_count * component_count * 4
+        frame_end = min(frame_end, data_size // row_size if row_size > 0 else 0)
+        if frame_end <= frame_start or len(columns) == 0:
+            return np.empty((0, component_count))
+        opened_file.seek(data_offset + frame_start * row_size)
+        data = opened_file.read((frame_end - frame_start) * row_size)
+        if len(data) != (frame_end - frame_start) * row_size:
+            raise EOFError(f"Value block at [{data_offset}] ends before frame [{frame_end}]")
+        values = np.frombuffer(data, dtype="<f4").reshape(-1, value_count, component_count)[:, columns].reshape(-1, component_count)
+        if component_count == 4:
+            return transform_math.unity_to_blender_quaternions(values)
+        return transform_math.unity_to_blender_vectors(values)
+
+    @staticmethod
+    def get_inverse_map(bone_ids: list[int], bone_count: int) -> list[int]:
+        """
+        Returns, for each bone id, its index in bone_ids, or NO_PARENT if it isn't in it.
+        """
+        inverse_map = np.full(bone_count, SkeletonData.NO_PARENT, dtype=np.int64)
+        inverse_map[bone_ids] = np.arange(len(bone_ids))
+        return inverse_map.tolist()
+    
+    @staticmethod
+    def read_skinnedanim_data(filepath: str | Path, msg_handler: Utils.MessageHandler, frame_start: int = 0, frame_end: Optional[int] = None, bone_ids: Optional[list[int]] = None) -> Optional["SkinnedAnimData"]:
+        """
+        Reads the file without touching any Blender data, so it can also run outside of the main thread.
+        Only the frames from frame_start to frame_end (included, None for the last frame) are read, and become the frames of the returned data.
+        If bone ids are given, only those bones are decoded: the others are left out of the dynamic and static bone lists.
+        Animated values are stored frame by frame, so the reader seeks straight to the first frame of the window and reads nothing past the last one.
+        """
+        anim_data = SkinnedAnimData()
         co_conv = CoordinatesConverter(CoordsSys.Unity, CoordsSys.Blender)
         
         try:
@@ -88,267 +137,471 @@ def import_animation_from_files(debug: bool, file_name: str, directory: str, app
 
                 # Read boneAmount
                 opened_file.seek(8, 1)  # Skip boneAmountHeader
-                anim_bone_amount = reader.read_uint()
+                anim_data.bone_count = reader.read_uint()
                 
-                print("bone_amount:", anim_bone_amount)
+                msg_handler.debug_print(f"bone_amount: {anim_data.bone_count}")
                 
                 # Read totalFrames
                 opened_file.seek(8, 1)  # Skip frameNumberHeader
-                total_frames = reader.read_uint()
+                anim_data.frame_count = reader.read_uint()
                 
-                print("total_frames:", total_frames)
+                msg_handler.debug_print(f"total_frames: {anim_data.frame_count}")
                 
                 opened_file.seek(8, 1)  # Skip IsRelativeToParent header + data
-                are_positions_relative_to_parent = reader.read_bool()
+                anim_data.are_positions_relative_to_parent = reader.read_bool()
                 
                 # Read numberOfBoneRotationsAnimated
                 opened_file.seek(8, 1)  # Skip numberOfBoneRotationsAnimatedHeader
-                number_of_bone_rotations_animated = reader.read_uint()
+                anim_data.animated_rotation_count = reader.read_uint()
 
                 # Read numberOfBonePositionsAnimated
                 opened_file.seek(8, 1)  # Skip numberOfBonePositionsAnimatedHeader
-                number_of_bone_positions_animated = reader.read_uint()
+                anim_data.animated_position_count = reader.read_uint()
 
                 # Read numberOfBoneRotationsFixed
                 opened_file.seek(8, 1)  # Skip numberOfBoneRotationsFixedHeader
-                number_of_bone_rotations_fixed = reader.read_uint()
+                anim_data.fixed_rotation_count = reader.read_uint()
 
                 # Read numberOfBonePositionsFixed
                 opened_file.seek(8, 1)  # Skip numberOfBonePositionsFixedHeader
-                number_of_bone_positions_fixed = reader.read_uint()
+                anim_data.fixed_position_count = reader.read_uint()
+
+                header = {"bone_count": anim_data.bone_count, "frame_count": anim_data.frame_count,
+                          "animated_rotation_count": anim_data.animated_rotation_count, "animated_position_count": anim_data.animated_position_count,
+                          "fixed_rotation_count": anim_data.fixed_rotation_count, "fixed_position_count": anim_data.fixed_position_count}
+
+                # Value blocks: animated rotations, animated positions, fixed positions, fixed rotations. Only their location is read here,
+                # chaining their sizes to reach the bone map at the end of the file.
+                value_blocks: list[tuple[int, int]] = []
+                for _ in range(4):
+                    opened_file.seek(4, 1)  # Skip block header
+                    data_size = reader.read_uint()
+                    value_blocks.append((opened_file.tell(), data_size))
+                    opened_file.seek(data_size, 1)
 
-                # Read animatedRotationsByBone
-                opened_file.seek(4, 1)  # Skip animatedRotationsByBoneHeader
-                dynamic_bone_rotation_data_size = reader.read_uint()
-                
-                for _ in range(int(dynamic_bone_rotation_data_size/16)):
-                    animated_rotations_by_bone.append(reader.read_converted_quaternion())
-
-                # Read animatedPositionsByBone
-                opened_file.seek(4, 1)  # Skip animatedPositionsByBoneHeader
-                dynamic_bone_position_data_size = reader.read_uint()
-                for _ in range(int(dynamic_bone_position_data_size/12)):
-                    animated_positions_by_bone.append(reader.read_converted_vector3f())
-
-                # Read fixedPositionsByBone
-                opened_file.seek(4, 1)  # Skip fixedPositionsByBoneHeader
-                static_bone_position_data_size = reader.read_uint()
-                for _ in range(int(static_bone_position_data_size/12)):
-                    fixed_positions_by_bone.append(reader.read_converted_vector3f())
-
-                # Read fixedRotationsByBone
-                opened_file.seek(4, 1)  # Skip fixedRotationsByBoneHeader
-                static_bone_rotation_data_size = reader.read_uint()
-                for _ in range(int(static_bone_rotation_data_size/16)):
-                    fixed_rotations_by_bone.append(reader.read_converted_quaternion())
-
-                for i in range(anim_bone_amount):
-                    inverse_dynamic_pos_bones_map.append(SkeletonData.NO_PARENT)
-                    inverse_dynamic_rot_bones_map.append(SkeletonData.NO_PARENT)
-                    inverse_static_pos_bones_map.append(SkeletonData.NO_PARENT)
-                    inverse_static_rot_bones_map.append(SkeletonData.NO_PARENT)
                 # Read BoneMapping
                 opened_file.seek(8, 1)  # Skip BoneMapHeader
-                for i in range(anim_bone_amount):
-                    bone_id_for_pos, used_in_frames_pos, bone_id_for_rot, used_in_frames_rot = reader.read_values("4B", 4)
-                    if used_in_frames_pos == 0xF0:
-                        inverse_dynamic_pos_bones_map[i] = len(dynamic_pos_bones)
-                        dynamic_pos_bones.append(i)
-                        is_bone_fixed_pos.append(False)
-                    else:
-                        inverse_static_pos_bones_map[i] = len(static_pos_bones)
-                        static_pos_bones.append(i)
-                        is_bone_fixed_pos.append(True)
-                    if used_in_frames_rot == 0xF0:
-                        inverse_dynamic_rot_bones_map[i] = len(dynamic_rot_bones)
-                        dynamic_rot_bones.append(i)
-                        is_bone_fixed_rot.append(False)
-                    else:
-                        inverse_static_rot_bones_map[i] = len(static_rot_bones)
-                        static_rot_bones.append(i)
-                        is_bone_fixed_rot.append(True)
+                bone_map = np.frombuffer(opened_file.read(anim_data.bone_count * 4), dtype=np.uint8).reshape(-1, 4)
+                if len(bone_map) != anim_data.bone_count:
+                    raise EOFError(f"The bone map has [{len(bone_map)}] entries out of [{anim_data.bone_count}]")
+                is_dynamic_pos = bone_map[:, 1] == 0xF0
+                is_dynamic_rot = bone_map[:, 3] == 0xF0
+                anim_data.is_bone_fixed_pos = (~is_dynamic_pos).tolist()
+                anim_data.is_bone_fixed_rot = (~is_dynamic_rot).tolist()
+
+                is_decoded = np.ones(anim_data.bone_count, dtype=bool)
+                if bone_ids is not None:
+                    is_decoded[:] = False
+                    is_decoded[np.asarray(bone_ids, dtype=np.int64)] = True
+                all_dynamic_pos_bones = np.flatnonzero(is_dynamic_pos)
+                all_dynamic_rot_bones = np.flatnonzero(is_dynamic_rot)
+                all_static_pos_bones = np.flatnonzero(~is_dynamic_pos)
+                all_static_rot_bones = np.flatnonzero(~is_dynamic_rot)
+                # Columns of the decoded bones in each value block
+                dynamic_rot_columns = np.flatnonzero(is_decoded[all_dynamic_rot_bones])
+                dynamic_pos_columns = np.flatnonzero(is_decoded[all_dynamic_pos_bones])
+                static_pos_columns = np.flatnonzero(is_decoded[all_static_pos_bones])
+                static_rot_columns = np.flatnonzero(is_decoded[all_static_rot_bones])
+
+                window_start = min(max(frame_start, 0), anim_data.frame_count)
+                window_end = anim_data.frame_count if frame_end is None else min(max(frame_end + 1, window_start), anim_data.frame_count)
+                msg_handler.debug_print(f"Decoding frames [{window_start}] to [{window_end - 1}] of [{int(is_decoded.sum())}] bones")
+
+                (rotations_offset, rotations_size), (positions_offset, positions_size), (fixed_positions_offset, fixed_positions_size), (fixed_rotations_offset, fixed_rotations_size) = value_blocks
+                anim_data.animated_rotations_by_bone = SkinnedAnimData.read_value_window(opened_file, rotations_offset, rotations_size, anim_data.animated_rotation_count, 4, window_start, window_end, dynamic_rot_columns)
+                anim_data.animated_positions_by_bone = SkinnedAnimData.read_value_window(opened_file, positions_offset, positions_size, anim_data.animated_position_count, 3, window_start, window_end, dynamic_pos_columns)
+                # Fixed values are a single frame
+                anim_data.fixed_positions_by_bone = SkinnedAnimData.read_value_window(opened_file, fixed_positions_offset, fixed_positions_size, anim_data.fixed_position_count, 3, 0, 1, static_pos_columns)
+                anim_data.fixed_rotations_by_bone = SkinnedAnimData.read_value_window(opened_file, fixed_rotations_offset, fixed_rotations_size, anim_data.fixed_rotation_count, 4, 0, 1, static_rot_columns)
+
+                anim_data.frame_count = window_end - window_start
+                anim_data.dynamic_pos_bones = all_dynamic_pos_bones[dynamic_pos_columns].tolist()
+                anim_data.dynamic_rot_bones = all_dynamic_rot_bones[dynamic_rot_columns].tolist()
+                anim_data.static_pos_bones = all_static_pos_bones[static_pos_columns].tolist()
+                anim_data.static_rot_bones = all_static_rot_bones[static_rot_columns].tolist()
+                anim_data.animated_position_count = len(anim_data.dynamic_pos_bones)
+                anim_data.animated_rotation_count = len(anim_data.dynamic_rot_bones)
+                anim_data.fixed_position_count = len(anim_data.static_pos_bones)
+                anim_data.fixed_rotation_count = len(anim_data.static_rot_bones)
+                anim_data.inverse_dynamic_pos_bones_map = SkinnedAnimData.get_inverse_map(anim_data.dynamic_pos_bones, anim_data.bone_count)
+                anim_data.inverse_dynamic_rot_bones_map = SkinnedAnimData.get_inverse_map(anim_data.dynamic_rot_bones, anim_data.bone_count)
+                anim_data.inverse_static_pos_bones_map = SkinnedAnimData.get_inverse_map(anim_data.static_pos_bones, anim_data.bone_count)
+                anim_data.inverse_static_rot_bones_map = SkinnedAnimData.get_inverse_map(anim_data.static_rot_bones, anim_data.bone_count)
+
+            AssetCatalog.get().store_asset_header(filepath, header)
 
         except Exception as e:
             msg_handler.report("ERROR", f"Failed to read file at [{filepath}]: {e}")
             traceback.print_exc()
-            return return_value
+            return None
+        
+        return anim_data
+
+class AnimationWindow(NamedTuple):
+    # First and last (included, None for the last frame of the file) frames of the animation to import
+    frame_start: int = 0
+    frame_end: Optional[int] = None
+    # Names of the bones to import, None for every bone
+    bone_names: Optional[list[str]] = None
+
+def import_animation_from_files(debug: bool, file_name: str, directory: str, apply_to_armature_in_selected: bool, skeleton_name = "", operator: Operator = None, reduction_tolerances: Optional[ReductionTolerances] = None, frame_step: float = 1.0, window: Optional[AnimationWindow] = None):
+    """
+    Imports the animation as a new action of the target armature and makes it the active action.
+    With a window, only its frames and bones are read from the file and keyed, the first frame of the window becoming frame 0 of the action.
+    """
+    msg_handler = Utils.MessageHandler(debug, operator.report)
+    
+    return_value = {"CANCELLED"}
+    
+    if file_name.casefold().endswith(".skinnedanim"):
+        filepath: Path = Path(directory) / file_name
 
-        if skeleton_data.bone_count != anim_bone_amount:
-            msg_handler.report("ERROR", f"Target armature and animation don't have the same amount of bones (Target has: [{skeleton_data.bone_count}]. Animation has: [{anim_bone_amount}]). Aborting importation.")
+        target_armature, skeleton_data = get_animation_target(filepath, directory, apply_to_armature_in_selected, skeleton_name, msg_handler)
+        if target_armature is None:
             return return_value
-
-        msg_handler.debug_print(f"[Animation Data: ]")
-        msg_handler.debug_print(f"anim_bone_amount: {anim_bone_amount}")
-        msg_handler.debug_print(f"total_frames: {total_frames}")
-        msg_handler.debug_print(f"are_positions_relative_to_parent: {are_positions_relative_to_parent}")
-        msg_handler.debug_print(f"number_of_bone_rotations_animated: {number_of_bone_rotations_animated}")
-        msg_handler.debug_print(f"number_of_bone_positions_animated: {number_of_bone_positions_animated}")
-        msg_handler.debug_print(f"number_of_bone_rotations_fixed: {number_of_bone_rotations_fixed}")
-        msg_handler.debug_print(f"number_of_bone_positions_fixed: {number_of_bone_positions_fixed}")
         
-        return_value = {"FINISHED"}
+        keyed_bone_ids, decoded_bone_ids = get_window_bone_ids(window, skeleton_data, msg_handler)
+        if window is None:
+            anim_data = AssetPrefetcher.get().take(filepath) or SkinnedAnimData.read_skinnedanim_data(filepath, msg_handler)
+        else:
+            anim_data = SkinnedAnimData.read_skinnedanim_data(filepath, msg_handler, window.frame_start, window.frame_end, decoded_bone_ids)
+        if anim_data is None:
+            return return_value
+        check_window_frames(window, anim_data, filepath, msg_handler)
         
-        try:
-            # Create animation action
-            action_name = filepath.stem
-            action = bpy.data.actions.new(name=action_name)
-
-            target_armature.animation_data_create().action = action
-            # target_armature.animation_data.action = action
+        action = create_animation_action(filepath.stem, anim_data, skeleton_data, msg_handler, reduction_tolerances, frame_step, keyed_bone_ids=keyed_bone_ids)
+        if action is None:
+            return return_value
+        
+        target_armature.animation_data_create().action = action
+        return_value = {"FINISHED"}
+    else:
+        msg_handler.report("ERROR", f"File [{file_name}] does not have the skinnedanim extension.")
+    return return_value
 
-            # Create keyframes
-            def cor_bone_pos(bone_id, frame):
-                if is_bone_fixed_pos[bone_id] == True:
-                    return fixed_positions_by_bone[inverse_static_pos_bones_map[bone_id]]
-                else:
-                    dynamic_bone_id = inverse_dynamic_pos_bones_map[bone_id]
-                    return animated_positions_by_bone[frame * number_of_bone_positions_animated + dynamic_bone_id]
-                
-            def cor_bone_rot(bone_id, frame):
-                if is_bone_fixed_rot[bone_id] == True:
-                    return fixed_rotations_by_bone[inverse_static_rot_bones_map[bone_id]]
-                else:
-                    dynamic_bone_id = inverse_dynamic_rot_bones_map[bone_id]
-                    return animated_rotations_by_bone[frame * number_of_bone_rotations_animated + dynamic_bone_id]
-            
-            if number_of_bone_positions_fixed > 0:
-                for iterator, bone_id in enumerate(static_pos_bones):
-                    # Assign position for static bones first
-                    current_bone_name = skeleton_data.bone_names[bone_id]
-                    parentboneid = skeleton_data.bone_parent_ids[bone_id]
-                    loc = mathutils.Vector((0.0, 0.0, 0.0))
-                    if parentboneid == SkeletonData.NO_PARENT or bone_id == 0:
-                        loc = Utils.get_local_position(
-                            skeleton_data.bone_absolute_positions[bone_id],
-                            skeleton_data.bone_absolute_rotations[bone_id],
-                            fixed_positions_by_bone[iterator])
-                    else:
-                        if are_positions_relative_to_parent == True:
-                            # Get position of animation relative to bind local pose
-                            loc = Utils.get_local_position(skeleton_data.bone_local_positions[bone_id], skeleton_data.bone_local_rotations[bone_id], fixed_positions_by_bone[iterator])
-                        else:
-                            # Get local position of world animation relative to bind local pose
-                            local_animation_position = Utils.get_local_position(cor_bone_pos(parentboneid, 0), cor_bone_rot(parentboneid, 0), fixed_positions_by_bone[iterator])
-                            loc = Utils.get_local_position(skeleton_data.bone_local_positions[bone_id], skeleton_data.bone_local_rotations[bone_id], local_animation_position)
-
-                    target_armature.pose.bones[current_bone_name].location = loc
-                    target_armature.pose.bones[current_bone_name].keyframe_insert(data_path="location", frame=0)
+def import_animations_as_nla_tracks(debug: bool, file_names: list[str], directory: str, apply_to_armature_in_selected: bool, skeleton_name = "", operator: Operator = None, reduction_tolerances: Optional[ReductionTolerances] = None, frame_step: float = 1.0, window: Optional[AnimationWindow] = None):
+    """
+    Imports the animations in one batch: the files are all decoded in parallel on worker threads while the main thread creates, in order,
+    one action per clip, placed as a strip on its own muted NLA track of the target armature. The active action of the armatures doesn't change.
+    The frames of the window are decoded on the workers, its bones are only known once the target armature of each clip is, so they are filtered when keying.
+    """
+    msg_handler = Utils.MessageHandler(debug, operator.report)
+    # Decoding doesn't touch Blender data, so workers only print their messages instead of reporting them through the operator
+    worker_msg_handler = Utils.MessageHandler(debug)
+    
+    return_value = {"CANCELLED"}
+    
+    file_paths: list[Path] = []
+    for file_name in file_names:
+        if file_name.casefold().endswith(".skinnedanim"):
+            file_paths.append(Path(directory) / file_name)
+        else:
+            msg_handler.report("ERROR", f"File [{file_name}] does not have the skinnedanim extension.")
+    
+    if window is None:
+        prefetched_anim_data = {filepath: AssetPrefetcher.get().take(filepath) for filepath in file_paths}
+        read_arguments = ()
+    else:
+        prefetched_anim_data = {filepath: None for filepath in file_paths}
+        read_arguments = (window.frame_start, window.frame_end)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        decode_futures = {filepath: executor.submit(SkinnedAnimData.read_skinnedanim_data, filepath, worker_msg_handler, *read_arguments) for filepath in file_paths if prefetched_anim_data[filepath] is None}
+        
+        for filepath in file_paths:
+            target_armature, skeleton_data = get_animation_target(filepath, directory, apply_to_armature_in_selected, skeleton_name, msg_handler)
+            if target_armature is None:
+                continue
             
-            if number_of_bone_rotations_fixed > 0:
-                for iterator, bone_id in enumerate(static_rot_bones):
-                    # Assign rotation for static bones
-                    current_bone_name = skeleton_data.bone_names[bone_id]
-                    parentboneid = skeleton_data.bone_parent_ids[bone_id]
-                    rot = mathutils.Quaternion((1,0,0,0))
-                    if parentboneid == SkeletonData.NO_PARENT or bone_id == 0:
-                        rot = skeleton_data.bone_absolute_rotations[bone_id].conjugated() @ fixed_rotations_by_bone[iterator]
-                    else:
-                        if are_positions_relative_to_parent == True:
-                            rot = skeleton_data.bone_local_rotations[bone_id].conjugated() @ fixed_rotations_by_bone[iterator]
-                        else:
-                            local_animation_rotation = Utils.get_local_rotation(cor_bone_rot(parentboneid, 0), fixed_rotations_by_bone[iterator])
-                            rot = skeleton_data.bone_local_rotations[bone_id].conjugated() @ local_animation_rotation
-
-                    target_armature.pose.bones[current_bone_name].rotation_quaternion = rot
-                    target_armature.pose.bones[current_bone_name].keyframe_insert(data_path="rotation_quaternion", frame=0)
+            anim_data = prefetched_anim_data[filepath] or decode_futures[filepath].result()
+            if anim_data is None:
+                msg_handler.report("ERROR", f"Failed to read file at [{filepath}]")
+                continue
+            check_window_frames(window, anim_data, filepath, msg_handler)
             
-            for frame in range(total_frames):
-                if number_of_bone_positions_animated > 0:
-                    for iterator, bone_id in enumerate(dynamic_pos_bones):
-                        # Assign position for dynamic position bones for each frame
-                        current_bone_name = skeleton_data.bone_names[bone_id]
-                        parentboneid = skeleton_data.bone_parent_ids[bone_id]
-                        idx = frame * number_of_bone_positions_animated + iterator
-                        loc = mathutils.Vector((0.0, 0.0, 0.0))
-                        if parentboneid == SkeletonData.NO_PARENT or bone_id == 0:
-                            loc = Utils.get_local_position(
-                            skeleton_data.bone_absolute_positions[bone_id] ,
-                            skeleton_data.bone_absolute_rotations[bone_id],
-                            animated_positions_by_bone[idx])
-                        else:
-                            if are_positions_relative_to_parent == True:
-                                loc = Utils.get_local_position(skeleton_data.bone_local_positions[bone_id], skeleton_data.bone_local_rotations[bone_id], animated_positions_by_bone[idx])
-                            else:
-                                local_animation_position = Utils.get_local_position(cor_bone_pos(parentboneid, frame), cor_bone_rot(parentboneid, frame), animated_positions_by_bone[idx])
-                                loc = Utils.get_local_position(skeleton_data.bone_local_positions[bone_id], skeleton_data.bone_local_rotations[bone_id], local_animation_position)
-
-                        target_armature.pose.bones[current_bone_name].location = loc
-                        target_armature.pose.bones[current_bone_name].keyframe_insert(data_path="location", frame=frame)
-                if number_of_bone_rotations_animated > 0:
-                    for iterator, bone_id in enumerate(dynamic_rot_bones):
-                        # Assign rotation for dynamic rotation bones for each frame
-                        current_bone_name = skeleton_data.bone_names[bone_id]
-                        parentboneid = skeleton_data.bone_parent_ids[bone_id]
-                        rot = mathutils.Quaternion((1,0,0,0))
-                        idx = frame * number_of_bone_rotations_animated + iterator
-
-                        if parentboneid == SkeletonData.NO_PARENT or bone_id == 0:
-                            rot = skeleton_data.bone_absolute_rotations[bone_id].conjugated() @ animated_rotations_by_bone[idx]
-                        else:
-                            if are_positions_relative_to_parent == True:
-                                rot = skeleton_data.bone_local_rotations[bone_id].conjugated() @ animated_rotations_by_bone[idx]
-                            else:
-                                local_animation_rotation = Utils.get_local_rotation(cor_bone_rot(parentboneid, frame), animated_rotations_by_bone[idx])
-                                rot = skeleton_data.bone_local_rotations[bone_id].conjugated() @ local_animation_rotation
-
-                        target_armature.pose.bones[current_bone_name].rotation_quaternion = rot
-                        target_armature.pose.bones[current_bone_name].keyframe_insert(data_path="rotation_quaternion", frame=frame)
-                
+            keyed_bone_ids, _ = get_window_bone_ids(window, skeleton_data, msg_handler)
+            action = create_animation_action(filepath.stem, anim_data, skeleton_data, msg_handler, reduction_tolerances, frame_step, keyed_bone_ids=keyed_bone_ids)
+            if action is None:
+                continue
             
+            # Like the Action Stash of Blender, the whole track is muted: the strips of unmuted tracks still reset their channels when the NLA is evaluated
+            track = target_armature.animation_data_create().nla_tracks.new()
+            track.name = action.name
+            track.mute = True
+            strip = track.strips.new(action.name, int(action.frame_range[0]), action)
+            strip.mute = True
+            return_value = {"FINISHED"}
+    
+    return return_value
 
-            # Set animation frames range
-            action.frame_range = (0, total_frames)
+def get_window_bone_ids(window: Optional[AnimationWindow], skeleton_data: SkeletonData, msg_handler: Utils.MessageHandler) -> tuple[Optional[list[int]], Optional[list[int]]]:
+    """
+    Returns the ids of the bones of the window to key, and of the bones to decode for them: their ancestors too, which world space animations
+    need to make them relative to their parents. Returns (None, None) when every bone is imported.
+    """
+    if window is None or window.bone_names is None:
+        return None, None
+    keyed_bone_ids: list[int] = []
+    for bone_name in window.bone_names:
+        bone_id = skeleton_data.bone_name_to_id.get(bone_name)
+        if bone_id is None:
+            msg_handler.report("WARNING", f"Bone [{bone_name}] is not in the target armature, skipping it.")
+            continue
+        keyed_bone_ids.append(bone_id)
+    
+    # The first bone is always treated as a root bone by the game
+    parent_ids = skeleton_data.parent_ids.tolist()
+    parent_ids[0] = SkeletonData.NO_PARENT
+    decoded_bone_ids: set[int] = set()
+    for bone_id in keyed_bone_ids:
+        while 0 <= bone_id < len(parent_ids) and bone_id not in decoded_bone_ids:
+            decoded_bone_ids.add(bone_id)
+            bone_id = parent_ids[bone_id]
+    return sorted(set(keyed_bone_ids)), sorted(decoded_bone_ids)
+
+def check_window_frames(window: Optional[AnimationWindow], anim_data: "SkinnedAnimData", filepath: Path, msg_handler: Utils.MessageHandler):
+    if window is not None and anim_data.frame_count == 0:
+        msg_handler.report("WARNING", f"The frame range of [{filepath.stem}] starting at [{window.frame_start}] has no animated frame, only its fixed transforms are imported.")
+
+def get_animation_target(filepath: Path, directory: str, apply_to_armature_in_selected: bool, skeleton_name: str, msg_handler: Utils.MessageHandler) -> tuple[Optional[bpy.types.Object], Optional[SkeletonData]]:
+    """
+    Returns the armature the animation is imported to and its skeleton data, or (None, None) after reporting why there is none.
+    """
+    target_armature = None
+    
+    if apply_to_armature_in_selected == False:# Automatic suitable armature search
+        target_armature = find_target_armature(filepath, directory, skeleton_name, msg_handler)
+    else: # Choose the armature available along the selection, as long as there is only one armature.
+        for obj in bpy.context.selected_objects:
+            if obj.type == "ARMATURE":
+                if target_armature is None:
+                    target_armature = obj
+                else:
+                    msg_handler.report("ERROR", f"More than one armature has been found in the current selection. The imported animation can only be assigned to one armature at a time.")
+                    return None, None
 
+    if not target_armature:
+        msg_handler.report("ERROR", "No armature found in the scene for animation to import to.")
+        return None, None
+    
+    skeleton_data = SkeletonDataCache.get(target_armature, False, False, msg_handler)
+    if skeleton_data is None:
+        msg_handler.report("ERROR", f"Armature [{target_armature}] which is the target of the imported animation has been found not valid. Aborting.")
+        return None, None
+    return target_armature, skeleton_data
+
+class PoseArrays(NamedTuple):
+    # (F, N, 3) pose bone locations and (F, N, 4) pose bone rotations of every bone at every frame, indexed by bone_id
+    positions: np.ndarray
+    rotations: np.ndarray
+    frame_count: int
+    frame_end: float
+
+def get_pose_arrays(anim_data: "SkinnedAnimData", skeleton_data: SkeletonData, msg_handler: Utils.MessageHandler, frame_step: float = 1.0) -> Optional[PoseArrays]:
+    """
+    Converts the animation to pose bone transforms of the skeleton, relative to its bind pose. A frame step other than 1 resamples the animation
+    every frame_step source frames, each resampled frame becoming one frame of the pose arrays. Returns None if the skeleton doesn't match the animation.
+    """
+    anim_bone_amount = anim_data.bone_count
+    total_frames = anim_data.frame_count
+    are_positions_relative_to_parent = anim_data.are_positions_relative_to_parent
+
+    if skeleton_data.bone_count != anim_bone_amount:
+        msg_handler.report("ERROR", f"Target armature and animation don't have the same amount of bones (Target has: [{skeleton_data.bone_count}]. Animation has: [{anim_bone_amount}]). Aborting importation.")
+        return None
+
+    msg_handler.debug_print(f"[Animation Data: ]")
+    msg_handler.debug_print(f"anim_bone_amount: {anim_bone_amount}")
+    msg_handler.debug_print(f"total_frames: {total_frames}")
+    msg_handler.debug_print(f"are_positions_relative_to_parent: {are_positions_relative_to_parent}")
+    msg_handler.debug_print(f"number_of_bone_rotations_animated: {anim_data.animated_rotation_count}")
+    msg_handler.debug_print(f"number_of_bone_positions_animated: {anim_data.animated_position_count}")
+    msg_handler.debug_print(f"number_of_bone_rotations_fixed: {anim_data.fixed_rotation_count}")
+    msg_handler.debug_print(f"number_of_bone_positions_fixed: {anim_data.fixed_position_count}")
+
+    animation_positions, animation_rotations = anim_data.get_transform_arrays()
+    frame_end = total_frames / frame_step
+    if frame_step != 1.0 and total_frames > 1:
+        resample_times = keyframe_math.get_resample_times(total_frames, frame_step)
+        animation_positions = keyframe_math.resample_linear(animation_positions, resample_times)
+        animation_rotations = keyframe_math.resample_quaternions(animation_rotations, resample_times)
+        msg_handler.debug_print(f"Resampled [{total_frames}] frames to [{len(resample_times)}] with a frame step of [{frame_step}]")
+        total_frames = len(resample_times)
+    # The first bone is always treated as a root bone by the game
+    animation_parent_ids = skeleton_data.parent_ids.copy()
+    animation_parent_ids[0] = SkeletonData.NO_PARENT
+    if are_positions_relative_to_parent == False:
+        # World animation, made relative to the animated parent of each bone for every frame at once
+        animation_positions, animation_rotations = transform_math.inverse_kinematics(animation_positions, animation_rotations, animation_parent_ids)
+    
+    # Pose bone transforms are relative to the bind pose: the armature space one for root bones, the local one for the others.
+    is_root_bone = ~transform_math.get_parent_mask(animation_parent_ids)[:, np.newaxis]
+    bind_positions = np.where(is_root_bone, skeleton_data.positions, skeleton_data.local_positions)
+    bind_rotations_conjugated = transform_math.quaternion_conjugate(np.where(is_root_bone, skeleton_data.rotations, skeleton_data.local_rotations))
+    pose_positions = transform_math.rotate_vectors(bind_rotations_conjugated, animation_positions - bind_positions)
+    pose_rotations = transform_math.quaternion_multiply(bind_rotations_conjugated, animation_rotations)
+    return PoseArrays(pose_positions, pose_rotations, total_frames, frame_end)
+
+def create_animation_action(action_name: str, anim_data: "SkinnedAnimData", skeleton_data: SkeletonData, msg_handler: Utils.MessageHandler, reduction_tolerances: Optional[ReductionTolerances] = None, frame_step: float = 1.0, pose_arrays: Optional[PoseArrays] = None, keyed_bone_ids: Optional[list[int]] = None) -> Optional[Action]:
+    """
+    Creates a new action keying the animation on the bones of the skeleton (or only on the given bone ids), from the given pose arrays or from get_pose_arrays.
+    With reduction tolerances, each animated channel is keyed only at the frames needed to reproduce its samples within them, instead of at every frame.
+    """
+    if pose_arrays is None:
+        try:
+            pose_arrays = get_pose_arrays(anim_data, skeleton_data, msg_handler, frame_step)
         except Exception as e:
-            animation_name = filepath.stem
-            msg_handler.report("ERROR", f"Failed to create animation {animation_name}: {e}")
+            msg_handler.report("ERROR", f"Failed to create animation {action_name}: {e}")
             traceback.print_exc()
-            return return_value
-    else:
-        msg_handler.report("ERROR", f"File [{file_name}] does not have the skinnedanim extension.")
-    return return_value
-
-def try_get_skeleton_name_for_animation(file_path: Path, directory: str, msg_handler: Utils.MessageHandler):
-    mesh_animation_file_name: str = ""
-
-    msg_handler.debug_print("[get_skeleton_name] method")
-    msg_handler.debug_print(f"File_path used: {file_path}")
-
-    def get_animation_file_and_name(xml_root_element: ET.Element):
-        if xml_root_element is not None:
-            animation_element = xml_root_element.find(".//Animation")
-            if animation_element is not None:
-                return animation_element.get("value", "").lstrip("/").split("|")[0]
-            else:
-                msg_handler.debug_print(f"Animation element could not be found inside a .xml source file.")
-        return ""
+            return None
+        if pose_arrays is None:
+            return None
+    pose_positions, pose_rotations, total_frames, action_frame_end = pose_arrays
+    dynamic_pos_bones = anim_data.dynamic_pos_bones
+    dynamic_rot_bones = anim_data.dynamic_rot_bones
+    static_pos_bones = anim_data.static_pos_bones
+    static_rot_bones = anim_data.static_rot_bones
+    if keyed_bone_ids is not None:
+        is_keyed = np.zeros(skeleton_data.bone_count, dtype=bool)
+        is_keyed[keyed_bone_ids] = True
+        dynamic_pos_bones = [bone_id for bone_id in dynamic_pos_bones if is_keyed[bone_id]]
+        dynamic_rot_bones = [bone_id for bone_id in dynamic_rot_bones if is_keyed[bone_id]]
+        static_pos_bones = [bone_id for bone_id in static_pos_bones if is_keyed[bone_id]]
+        static_rot_bones = [bone_id for bone_id in static_rot_bones if is_keyed[bone_id]]
     
-    for file in Utils.find_single_xml_files(directory):
-        msg_handler.debug_print(f"Trying to find .animation.xml in the file {file}")
-        filepath: str = Path(directory) / file
-        mesh_animation_file_name = get_animation_file_and_name(Utils.read_xml_file(msg_handler, filepath, f"Error while trying to read source .xml file at [{filepath}]"))
+    # Create animation action
+    action = bpy.data.actions.new(name=action_name)
+    try:
+        # Create keyframes, static bones get a single key at frame 0
+        frames = np.arange(total_frames)
+        for bone_id in static_pos_bones:
+            write_pose_bone_fcurves(action, skeleton_data.bone_names[bone_id], "location", np.zeros(1), pose_positions[:1, bone_id])
+        for bone_id in static_rot_bones:
+            write_pose_bone_fcurves(action, skeleton_data.bone_names[bone_id], "rotation_quaternion", np.zeros(1), pose_rotations[:1, bone_id])
         
-        if mesh_animation_file_name == "":
-            continue
-        
-        animation_xml_root = Utils.read_xml_file(msg_handler, Path(directory) / mesh_animation_file_name, f"Error while trying to read  .animation.xml file at [{Path(directory) / mesh_animation_file_name}]")
-
-        if animation_xml_root is not None:
-            for animation_element in animation_xml_root.iterfind(".//animation"):
-                for clip_element in animation_element.findall(".//clip"):
-                    clip_is_present = clip_element.find(".//file").get("value", "").lstrip("/").casefold() == file_path.name.casefold() if clip_element.find(".//file") is not None else False
-                    if clip_is_present == True:
-                        skeleton_element = animation_element.find(".//skeleton")
-                        if skeleton_element is not None:
-                            skeleton_attribute: str = skeleton_element.get("value")
-                            if skeleton_attribute is not None:
-                                return str(Path(skeleton_attribute.lstrip("/")).stem)
-
+        if total_frames > 0:
+            dynamic_positions = pose_positions[:total_frames, dynamic_pos_bones]
+            dynamic_rotations = keyframe_math.make_quaternions_continuous(pose_rotations[:total_frames, dynamic_rot_bones])
+            if reduction_tolerances is not None:
+                position_keys = keyframe_math.reduce_keyframes(dynamic_positions, reduction_tolerances.position, keyframe_math.get_position_errors)
+                rotation_keys = keyframe_math.reduce_keyframes(dynamic_rotations, reduction_tolerances.rotation, keyframe_math.get_rotation_errors)
+                constant_positions = keyframe_math.get_constant_components(dynamic_positions)
+                constant_rotations = keyframe_math.get_constant_components(dynamic_rotations)
+            else:
+                position_keys = np.ones(dynamic_positions.shape[:2], dtype=bool)
+                rotation_keys = np.ones(dynamic_rotations.shape[:2], dtype=bool)
+                constant_positions = np.zeros((len(dynamic_pos_bones), 3), dtype=bool)
+                constant_rotations = np.zeros((len(dynamic_rot_bones), 4), dtype=bool)
+            
+            for dynamic_index, bone_id in enumerate(dynamic_pos_bones):
+                keyframes = position_keys[:, dynamic_index]
+                write_pose_bone_fcurves(action, skeleton_data.bone_names[bone_id], "location", frames[keyframes], dynamic_positions[keyframes, dynamic_index], constant_components=constant_positions[dynamic_index])
+            for dynamic_index, bone_id in enumerate(dynamic_rot_bones):
+                keyframes = rotation_keys[:, dynamic_index]
+                write_pose_bone_fcurves(action, skeleton_data.bone_names[bone_id], "rotation_quaternion", frames[keyframes], dynamic_rotations[keyframes, dynamic_index], constant_components=constant_rotations[dynamic_index])
+            
+            if reduction_tolerances is not None:
+                msg_handler.debug_print(f"Keyframe reduction kept [{int(position_keys.sum())}] of [{position_keys.size}] position keys and [{int(rotation_keys.sum())}] of [{rotation_keys.size}] rotation keys")
 
-    if mesh_animation_file_name == "":
-        msg_handler.report("INFO", f"File [{file_path.name}]: .animation.xml file for this file mesh was not found in any source .xml in the file directory.")
+        # Set animation frames range
+        action.frame_range = (0, action_frame_end)
 
+    except Exception as e:
+        msg_handler.report("ERROR", f"Failed to create animation {action_name}: {e}")
+        traceback.print_exc()
+        bpy.data.actions.remove(action)
+        return None
+    
+    return action
+
+def write_pose_bone_fcurves(action: Action, bone_name: str, property_name: str, frames: np.ndarray, values: np.ndarray, interpolation: int = FCURVE_INTERPOLATION_LINEAR, constant_components: Optional[np.ndarray] = None):
+    """
+    Creates the F-Curves of a pose bone property in the action with all their keyframes at once, one curve per component of the values.
+    The keyframe points are allocated in one call and their coordinates and interpolation written with foreach_set, and each curve is updated once.
+
+    :param frames: (K,) frame of each keyframe.
+    :param values: (K, C) value of each keyframe, for each of the C components of the property.
+    :param constant_components: optional (C,) mask of the components that only get their first keyframe.
+    """
+    data_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"].{property_name}'
+    for index in range(values.shape[1]):
+        keyframe_count = 1 if constant_components is not None and constant_components[index] else len(frames)
+        coordinates = np.empty((keyframe_count, 2), dtype=np.float32)
+        coordinates[:, 0] = frames[:keyframe_count]
+        coordinates[:, 1] = values[:keyframe_count, index]
+        fcurve = action.fcurves.new(data_path, index=index, action_group=bone_name)
+        fcurve.keyframe_points.add(keyframe_count)
+        fcurve.keyframe_points.foreach_set("co", coordinates.ravel())
+        fcurve.keyframe_points.foreach_set("interpolation", np.full(keyframe_count, interpolation, dtype=np.int32))
+        fcurve.update()
+
+def find_target_armature(file_path: Path, directory: str, skeleton_name: str, msg_handler: Utils.MessageHandler) -> Optional[bpy.types.Object]:
+    """
+    Finds the armature of the scene an animation should be imported to. A given skeleton name is resolved first, against the armature names and then
+    against the fingerprint of the .Skeleton file, so renamed armatures are still found. Without a name, armatures are matched by bone count, so a scene
+    whose armatures of the animation's bone count are all the same skeleton never needs the .xml data, otherwise the skeleton name is found through the .xml files.
+    SkinnedAnim files don't store bone names, so the bone count is all they can be matched with by themselves: their bone map only tells which bones
+    the clip animates, which differs between the clips of a same skeleton.
+    """
+    armature_index = ArmatureIndex.get(bpy.context.scene)
     
+    catalog = AssetCatalog.get()
+    anim_header = catalog.get_asset_header(file_path)
+    if anim_header is None:
+        try:
+            anim_header = probe_skinnedanim(file_path)
+        except Exception as e:
+            msg_handler.report("ERROR", f"Could not read the header of [{file_path.name}]: {e}")
+            return None
+        catalog.store_asset_header(file_path, anim_header)
+    bone_count = anim_header["bone_count"]
+    
+    if skeleton_name != "":
+        return find_named_armature(armature_index, file_path, directory, skeleton_name, bone_count, msg_handler)
+    
+    candidates = armature_index.find_by_bone_count(bone_count)
+    msg_handler.debug_print(f"Armatures with {bone_count} bones: {[candidate.name for candidate in candidates]}")
+    if len(candidates) == 0:
+        msg_handler.report("ERROR", f"No armature in the scene has the {bone_count} bones of animation [{file_path.name}].")
+        return None
+    if len({ArmatureIndex.get_armature_fingerprint(candidate, msg_handler) for candidate in candidates}) == 1:
+        # Every candidate is the same skeleton
+        msg_handler.report("INFO", f"Animation [{file_path.name}] has no skeleton name, it was matched to armature [{candidates[0].name}] by its {bone_count} bones.")
+        return candidates[0]
+    
+    skeleton_name = try_get_skeleton_name_for_animation(file_path, directory, msg_handler)
+    msg_handler.debug_print(f"Skeleton_name found: [{skeleton_name}]")
+    if skeleton_name == "":
+        msg_handler.report("ERROR", f"Animation [{file_path.name}] matches more than one armature: {[candidate.name for candidate in candidates]}. Select the target armature and import it with the apply to armature in selected option.")
+        return None
+    return find_named_armature(armature_index, file_path, directory, skeleton_name, bone_count, msg_handler)
+
+def find_named_armature(armature_index: ArmatureIndex, file_path: Path, directory: str, skeleton_name: str, bone_count: int, msg_handler: Utils.MessageHandler) -> Optional[bpy.types.Object]:
+    """
+    Returns the armature of the skeleton, found by name or else by the fingerprint of its .Skeleton file, or None after reporting why there is none.
+    """
+    target_armature = armature_index.find_by_name(skeleton_name)
+    if target_armature is not None:
+        if len(target_armature.data.bones) != bone_count:
+            msg_handler.report("ERROR", f"Armature [{target_armature.name}] of skeleton [{skeleton_name}] has {len(target_armature.data.bones)} bones, but animation [{file_path.name}] has {bone_count}.")
+            return None
+        return target_armature
+    
+    skeleton_file_path = Path(directory) / f"{skeleton_name}.Skeleton"
+    fingerprint = SkeletonData.get_file_fingerprint(skeleton_file_path) if skeleton_file_path.exists() else None
+    if fingerprint is not None:
+        matches = armature_index.find_by_fingerprint(bone_count, fingerprint, msg_handler)
+        if matches:
+            msg_handler.debug_print(f"Armature [{matches[0].name}] matched by the fingerprint of skeleton [{skeleton_name}]")
+            return matches[0]
+    msg_handler.report("ERROR", f"No armature of skeleton [{skeleton_name}] with the {bone_count} bones of animation [{file_path.name}] was found in the scene.")
+    return None
 
+def try_get_skeleton_name_for_animation(file_path: Path, directory: str, msg_handler: Utils.MessageHandler):
+    msg_handler.debug_print("[get_skeleton_name] method")
+    msg_handler.debug_print(f"File_path used: {file_path}")
+
+    skeleton_name = ProjectIndex.get(directory, msg_handler).get_skeleton_name_for_clip(msg_handler, file_path.name)
+    if skeleton_name == "":
+        msg_handler.report("INFO", f"File [{file_path.name}]: .animation.xml file for this file mesh was not found in any source .xml in the file directory.")
 
-    return ""
\ No newline at end of file
+    return skeleton_name
@@ -0,0 +1,184 @@
+import bpy
+import numpy as np
+from bpy.types import Action
+from typing import Optional
+from utils import Utils
+from .skeleton_core import SkeletonData
+from .animation_core import SkinnedAnimData, PoseArrays, get_pose_arrays, create_animation_action
+from .keyframe_math import ReductionTolerances
+
+class AnimationPreview:
+    """
+    Plays a decoded animation on an armature without creating any keyframe. The pose arrays of the animation are kept in memory and a frame_change_pre handler
+    writes the pose of the current frame to every pose bone with one foreach_set per property. The armature's action is stashed while the preview runs,
+    and its pose is restored when the preview stops. Only one animation is previewed at a time.
+    """
+
+    class State:
+        def __init__(self, armature_name: str, action_name: str, anim_data: SkinnedAnimData, skeleton_data: SkeletonData, pose_arrays: PoseArrays,
+                     bone_positions: np.ndarray, bone_rotations: np.ndarray, original_positions: np.ndarray, original_rotations: np.ndarray,
+                     stashed_action_name: Optional[str], stashed_action_had_fake_user: bool):
+            self.armature_name = armature_name
+            self.action_name = action_name
+            self.anim_data = anim_data
+            self.skeleton_data = skeleton_data
+            self.pose_arrays = pose_arrays
+            # (F, P * 3) and (F, P * 4) float32 rows ready for foreach_set, in pose bone order
+            self.bone_positions = bone_positions
+            self.bone_rotations = bone_rotations
+            self.original_positions = original_positions
+            self.original_rotations = original_rotations
+            # Stored by name, Python references to IDs don't survive undo. The stashed action gets a fake user while it's unassigned, so saving keeps it
+            self.stashed_action_name = stashed_action_name
+            self.stashed_action_had_fake_user = stashed_action_had_fake_user
+
+    __state: Optional["AnimationPreview.State"] = None
+
+    @staticmethod
+    def is_active() -> bool:
+        return AnimationPreview.__state is not None
+
+    @staticmethod
+    def get_armature_name() -> Optional[str]:
+        return AnimationPreview.__state.armature_name if AnimationPreview.__state is not None else None
+
+    @staticmethod
+    def get_action_name() -> Optional[str]:
+        return AnimationPreview.__state.action_name if AnimationPreview.__state is not None else None
+
+    @staticmethod
+    def start(armature: bpy.types.Object, action_name: str, anim_data: SkinnedAnimData, skeleton_data: SkeletonData, msg_handler: Utils.MessageHandler) -> bool:
+        """
+        Starts previewing the animation on the armature, stopping any previous preview. Returns False if the animation can't be played on it.
+        """
+        AnimationPreview.stop()
+        pose_arrays = get_pose_arrays(anim_data, skeleton_data, msg_handler)
+        if pose_arrays is None:
+            return False
+
+        pose_bones = armature.pose.bones
+        pose_bone_count = len(pose_bones)
+        original_positions = np.empty(pose_bone_count * 3, dtype=np.float32)
+        original_rotations = np.empty(pose_bone_count * 4, dtype=np.float32)
+        pose_bones.foreach_get("location", original_positions)
+        pose_bones.foreach_get("rotation_quaternion", original_rotations)
+
+        # Bones outside of the skeleton keep their current pose at every frame
+        frame_count = max(pose_arrays.frame_count, 1)
+        bone_positions = np.tile(original_positions.reshape(1, pose_bone_count, 3), (frame_count, 1, 1))
+        bone_rotations = np.tile(original_rotations.reshape(1, pose_bone_count, 4), (frame_count, 1, 1))
+        pose_bone_ids = np.array([skeleton_data.bone_name_to_id.get(pose_bone.name, SkeletonData.NO_PARENT) for pose_bone in pose_bones], dtype=np.int64)
+        in_skeleton = pose_bone_ids != SkeletonData.NO_PARENT
+        bone_positions[:, in_skeleton] = pose_arrays.positions[:frame_count, pose_bone_ids[in_skeleton]]
+        bone_rotations[:, in_skeleton] = pose_arrays.rotations[:frame_count, pose_bone_ids[in_skeleton]]
+
+        animation_data = armature.animation_data_create()
+        stashed_action = animation_data.action
+        stashed_action_had_fake_user = stashed_action.use_fake_user if stashed_action is not None else False
+        if stashed_action is not None:
+            stashed_action.use_fake_user = True
+        animation_data.action = None
+
+        AnimationPreview.__state = AnimationPreview.State(armature.name, action_name, anim_data, skeleton_data, pose_arrays,
+                                                          bone_positions.reshape(frame_count, -1), bone_rotations.reshape(frame_count, -1),
+                                                          original_positions, original_rotations,
+                                                          stashed_action.name if stashed_action is not None else None, stashed_action_had_fake_user)
+        AnimationPreview.apply_frame(bpy.context.scene.frame_current)
+        return True
+
+    @staticmethod
+    def apply_frame(frame: int):
+        state = AnimationPreview.__state
+        if state is None:
+            return
+        armature = bpy.data.objects.get(state.armature_name)
+        if armature is None or armature.pose is None or len(armature.pose.bones) * 3 != state.bone_positions.shape[1]:
+            # The armature was removed or changed under the preview
+            AnimationPreview.__state = None
+            return
+        frame_index = min(max(int(frame), 0), len(state.bone_positions) - 1)
+        armature.pose.bones.foreach_set("location", state.bone_positions[frame_index])
+        armature.pose.bones.foreach_set("rotation_quaternion", state.bone_rotations[frame_index])
+        armature.update_tag()
+
+    @staticmethod
+    def stop():
+        """
+        Stops the preview, restoring the stashed action and the pose the armature had before it.
+        """
+        state = AnimationPreview.__state
+        AnimationPreview.__state = None
+        if state is None:
+            return
+        stashed_action = bpy.data.actions.get(state.stashed_action_name) if state.stashed_action_name is not None else None
+        if stashed_action is not None:
+            stashed_action.use_fake_user = state.stashed_action_had_fake_user
+        armature = bpy.data.objects.get(state.armature_name)
+        if armature is None or armature.pose is None:
+            return
+        if len(armature.pose.bones) * 3 == len(state.original_positions):
+            armature.pose.bones.foreach_set("location", state.original_positions)
+            armature.pose.bones.foreach_set("rotation_quaternion", state.original_rotations)
+        armature.animation_data_create().action = stashed_action
+        armature.update_tag()
+
+    @staticmethod
+    def bake(msg_handler: Utils.MessageHandler, reduction_tolerances: Optional[ReductionTolerances] = None) -> Optional[Action]:
+        """
+        Stops the preview and keys the previewed animation into a new action, which becomes the active action of the armature.
+        The action it replaces is stashed on a muted NLA track when nothing else uses it, like Blender does when an action is replaced in the Action Editor.
+        """
+        state = AnimationPreview.__state
+        if state is None:
+            return None
+        AnimationPreview.stop()
+        armature = bpy.data.objects.get(state.armature_name)
+        if armature is None:
+            msg_handler.report("ERROR", f"Armature [{state.armature_name}] of the preview doesn't exist anymore.")
+            return None
+        action = create_animation_action(state.action_name, state.anim_data, state.skeleton_data, msg_handler, reduction_tolerances, pose_arrays=state.pose_arrays)
+        if action is not None:
+            animation_data = armature.animation_data_create()
+            replaced_action = animation_data.action
+            animation_data.action = action
+            if replaced_action is not None and replaced_action.users == 0:
+                AnimationPreview.stash_action(animation_data, replaced_action)
+        return action
+
+    @staticmethod
+    def stash_action(animation_data: bpy.types.AnimData, action: Action):
+        track = animation_data.nla_tracks.new()
+        track.name = "[Action Stash]"
+        track.mute = True
+        track.strips.new(action.name, int(action.frame_range[0]), action)
+
+    @staticmethod
+    def drop():
+        """
+        Forgets the preview without touching the armature, for when its data is gone (file load).
+        """
+        AnimationPreview.__state = None
+
+@bpy.app.handlers.persistent
+def apply_animation_preview(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph = None):
+    AnimationPreview.apply_frame(scene.frame_current)
+
+@bpy.app.handlers.persistent
+def drop_animation_preview(*args):
+    AnimationPreview.drop()
+
+animation_preview_handlers = (
+    (bpy.app.handlers.frame_change_pre, apply_animation_preview),
+    (bpy.app.handlers.load_pre, drop_animation_preview),
+)
+
+def register():
+    for handlers, handler in animation_preview_handlers:
+        if handler not in handlers:
+            handlers.append(handler)
+
+def unregister():
+    AnimationPreview.stop()
+    for handlers, handler in animation_preview_handlers:
+        if handler in handlers:
+            handlers.remove(handler)
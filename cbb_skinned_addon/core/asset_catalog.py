@@ -0,0 +1,189 @@
+import bpy
+import os
+import json
+import sqlite3
+import threading
+import traceback
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+from utils import Utils
+from .xml_scanner import ModelReference, AnimationReference, read_source_models, find_animation_value, read_material_xml_summary, read_texture_xml_summary, read_animation_xml_summary
+
+# Size of the single read done by the header probes of the core modules, enough for every header field they return.
+HEADER_PROBE_SIZE = 512
+
+class AssetCatalog:
+    """
+    Persistent SQLite catalog of the asset tree, stored in the addon configuration folder so it survives between Blender sessions.
+    It records the parsed references of each .xml file, the header summary of each binary asset and the listing of each walked directory,
+    all keyed by the stat of the file (mtime_ns and size), so an entry is only read again from disk after the file changes.
+    """
+
+    SCHEMA_VERSION = 3
+    DATABASE_FILE_NAME = "asset_catalog.sqlite"
+
+    # Kind of .xml summary: (reader, decoder of the stored json data)
+    xml_summary_kinds: dict[str, tuple[Callable, Callable]] = {
+        "source_models": (read_source_models, lambda data: [ModelReference(*model) for model in data]),
+        "animation_value": (find_animation_value, lambda data: data),
+        "material": (read_material_xml_summary, lambda data: data),
+        "texture": (read_texture_xml_summary, lambda data: data),
+        "animation": (read_animation_xml_summary, lambda data: [AnimationReference(animation[0], animation[1], [tuple(clip) for clip in animation[2]]) for animation in data]),
+    }
+
+    __instance: Optional["AssetCatalog"] = None
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        self.__lock = threading.RLock()
+        self.__connection = sqlite3.connect(database_path, check_same_thread=False)
+        with self.__lock:
+            if database_path != ":memory:":
+                self.__connection.execute("PRAGMA journal_mode = WAL")
+                self.__connection.execute("PRAGMA synchronous = NORMAL")
+            if self.__connection.execute("PRAGMA user_version").fetchone()[0] != AssetCatalog.SCHEMA_VERSION:
+                self.__connection.executescript("""
+                    DROP TABLE IF EXISTS xml_summaries;
+                    DROP TABLE IF EXISTS asset_headers;
+                    DROP TABLE IF EXISTS directory_listings;
+                    """)
+            self.__connection.executescript(f"""
+                CREATE TABLE IF NOT EXISTS xml_summaries (path TEXT NOT NULL, kind TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (path, kind));
+                CREATE TABLE IF NOT EXISTS asset_headers (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, data TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS directory_listings (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, directories TEXT NOT NULL, files TEXT NOT NULL);
+                PRAGMA user_version = {AssetCatalog.SCHEMA_VERSION};
+                """)
+            self.__connection.commit()
+
+    @staticmethod
+    def get() -> "AssetCatalog":
+        """
+        Returns the catalog of the session, opening it on the first call. If the configuration folder can't be used the catalog is kept in memory for the session only.
+        """
+        if AssetCatalog.__instance is None:
+            try:
+                config_directory = bpy.utils.user_resource("CONFIG", path="cbb_skinned_addon", create=True)
+                AssetCatalog.__instance = AssetCatalog(str(Path(config_directory) / AssetCatalog.DATABASE_FILE_NAME))
+            except Exception as e:
+                print(f"Could not open the asset catalog in the configuration folder, using an in-memory catalog instead: {e}")
+                traceback.print_exc()
+                AssetCatalog.__instance = AssetCatalog(":memory:")
+        return AssetCatalog.__instance
+
+    @staticmethod
+    def close():
+        if AssetCatalog.__instance is not None:
+            AssetCatalog.__instance.__connection.close()
+            AssetCatalog.__instance = None
+
+    @staticmethod
+    def __get_key(file_path: str | Path) -> str:
+        return os.path.normcase(os.path.abspath(str(file_path)))
+
+    @staticmethod
+    def __get_stat(file_path: str | Path) -> Optional[os.stat_result]:
+        try:
+            return os.stat(file_path)
+        except OSError:
+            return None
+
+    def peek_xml_summary(self, file_path: str | Path, kind: str):
+        """
+        Returns the stored summary of the given kind for the .xml file, or None if there is none or the file changed since it was stored.
+        """
+        file_stat = AssetCatalog.__get_stat(file_path)
+        if file_stat is None:
+            return None
+        with self.__lock:
+            row = self.__connection.execute("SELECT data FROM xml_summaries WHERE path = ? AND kind = ? AND mtime_ns = ? AND size = ?",
+                                            (AssetCatalog.__get_key(file_path), kind, file_stat.st_mtime_ns, file_stat.st_size)).fetchone()
+        if row is None:
+            return None
+        return AssetCatalog.xml_summary_kinds[kind][1](json.loads(row[0]))
+
+    def store_xml_summary(self, file_path: str | Path, kind: str, summary):
+        file_stat = AssetCatalog.__get_stat(file_path)
+        if file_stat is None or summary is None:
+            return
+        with self.__lock:
+            self.__connection.execute("INSERT OR REPLACE INTO xml_summaries (path, kind, mtime_ns, size, data) VALUES (?, ?, ?, ?, ?)",
+                                      (AssetCatalog.__get_key(file_path), kind, file_stat.st_mtime_ns, file_stat.st_size, json.dumps(summary)))
+            self.__connection.commit()
+
+    def get_xml_summary(self, msg_handler: Utils.MessageHandler, file_path: str | Path, kind: str):
+        """
+        Returns the summary of the given kind for the .xml file, reading the file only if the catalog has no up to date entry for it.
+        """
+        summary = self.peek_xml_summary(file_path, kind)
+        if summary is None:
+            msg_handler.debug_print(f"Asset catalog miss for [{kind}] of [{file_path}]")
+            summary = AssetCatalog.xml_summary_kinds[kind][0](msg_handler, file_path)
+            self.store_xml_summary(file_path, kind, summary)
+        return summary
+
+    def get_asset_header(self, file_path: str | Path) -> Optional[dict]:
+        file_stat = AssetCatalog.__get_stat(file_path)
+        if file_stat is None:
+            return None
+        with self.__lock:
+            row = self.__connection.execute("SELECT data FROM asset_headers WHERE path = ? AND mtime_ns = ? AND size = ?",
+                                            (AssetCatalog.__get_key(file_path), file_stat.st_mtime_ns, file_stat.st_size)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def store_asset_header(self, file_path: str | Path, header: dict):
+        """
+        Stores the header summary (name, vertex/triangle/bone/frame counts) of a binary asset.
+        """
+        file_stat = AssetCatalog.__get_stat(file_path)
+        if file_stat is None:
+            return
+        with self.__lock:
+            self.__connection.execute("INSERT OR REPLACE INTO asset_headers (path, mtime_ns, size, data) VALUES (?, ?, ?, ?)",
+                                      (AssetCatalog.__get_key(file_path), file_stat.st_mtime_ns, file_stat.st_size, json.dumps(header)))
+            self.__connection.commit()
+
+    def store_asset_headers(self, headers: list[tuple[str | Path, dict]]):
+        """
+        Same as store_asset_header, but for many files in a single transaction.
+        """
+        rows = []
+        for file_path, header in headers:
+            file_stat = AssetCatalog.__get_stat(file_path)
+            if file_stat is not None:
+                rows.append((AssetCatalog.__get_key(file_path), file_stat.st_mtime_ns, file_stat.st_size, json.dumps(header)))
+        with self.__lock:
+            self.__connection.executemany("INSERT OR REPLACE INTO asset_headers (path, mtime_ns, size, data) VALUES (?, ?, ?, ?)", rows)
+            self.__connection.commit()
+
+    def walk(self, top: str | Path) -> Iterator[tuple[str, list[str], list[str]]]:
+        """
+        Same as a top-down os.walk, but the listing of a directory is only read from disk when its mtime changed since it was stored.
+        Unlike os.walk, which lists them with the directories, symbolic links to directories are listed with the files, so they are never followed
+        and a link loop can't recurse forever.
+        """
+        top = str(top)
+        directory_stat = AssetCatalog.__get_stat(top)
+        if directory_stat is None:
+            return
+
+        key = AssetCatalog.__get_key(top)
+        with self.__lock:
+            row = self.__connection.execute("SELECT directories, files FROM directory_listings WHERE path = ? AND mtime_ns = ?", (key, directory_stat.st_mtime_ns)).fetchone()
+        if row is not None:
+            directories, files = json.loads(row[0]), json.loads(row[1])
+        else:
+            directories, files = [], []
+            try:
+                with os.scandir(top) as entries:
+                    for entry in entries:
+                        (directories if entry.is_dir(follow_symlinks=False) else files).append(entry.name)
+            except OSError:
+                return
+            with self.__lock:
+                self.__connection.execute("INSERT OR REPLACE INTO directory_listings (path, mtime_ns, directories, files) VALUES (?, ?, ?, ?)",
+                                          (key, directory_stat.st_mtime_ns, json.dumps(directories), json.dumps(files)))
+                self.__connection.commit()
+
+        yield top, directories, files
+        for directory in directories:
+            yield from self.walk(os.path.join(top, directory))
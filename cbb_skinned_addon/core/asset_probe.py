@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+from utils import Utils
+from .asset_catalog import AssetCatalog
+from .mesh_core import probe_skinnedmesh
+from .animation_core import probe_skinnedanim
+from .skeleton_core import SkeletonData
+
+# Header probe of each asset type, keyed by the casefolded file extension
+asset_probes: dict[str, Callable[[str | Path], dict]] = {
+    ".skinnedmesh": probe_skinnedmesh,
+    ".skinnedanim": probe_skinnedanim,
+    ".skeleton": SkeletonData.probe_skeleton,
+}
+
+def get_asset_probe(file_path: str | Path) -> Optional[Callable[[str | Path], dict]]:
+    return asset_probes.get(os.path.splitext(str(file_path))[1].casefold())
+
+def probe_assets(msg_handler: Utils.MessageHandler, file_paths: list[str | Path], max_workers: Optional[int] = None) -> dict[str, Optional[dict]]:
+    """
+    Returns the header of each file, keyed by the file path as given, or None for files that couldn't be probed.
+    Headers already in the AssetCatalog are taken from it, the others are probed in parallel (one small read per file) and stored back in a single transaction.
+    """
+    catalog = AssetCatalog.get()
+    headers: dict[str, Optional[dict]] = {}
+    unknown_file_paths: list[str] = []
+    for file_path in map(str, file_paths):
+        if file_path in headers:
+            continue
+        headers[file_path] = catalog.get_asset_header(file_path)
+        if headers[file_path] is None and get_asset_probe(file_path) is not None:
+            unknown_file_paths.append(file_path)
+
+    if not unknown_file_paths:
+        return headers
+
+    def probe(file_path: str) -> Optional[dict]:
+        try:
+            return get_asset_probe(file_path)(file_path)
+        except Exception as e:
+            msg_handler.debug_print(f"Could not probe the header of [{file_path}]: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        probed_headers = list(executor.map(probe, unknown_file_paths))
+
+    msg_handler.debug_print(f"Probed {len(unknown_file_paths)} asset headers, {len(headers) - len(unknown_file_paths)} were cataloged")
+    headers.update(zip(unknown_file_paths, probed_headers))
+    catalog.store_asset_headers([(file_path, header) for file_path, header in zip(unknown_file_paths, probed_headers) if header is not None])
+    return headers
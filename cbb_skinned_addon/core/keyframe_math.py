@@ -0,0 +1,107 @@
+"""
+Error-bounded keyframe reduction and resampling of sampled animation channels over NumPy arrays, used by the SkinnedAnim import.
+Channels are (F, B, C) arrays: F samples (one per frame) of B bones with C components, 3 for positions and 4 for (w, x, y, z) quaternions.
+Keys are linearly interpolated per component like LINEAR F-Curves, which for quaternions amounts to a normalized lerp once the pose is evaluated.
+"""
+
+import numpy as np
+from typing import Callable, NamedTuple
+
+class ReductionTolerances(NamedTuple):
+    # Maximum distance between a sample and the interpolated keys, in Blender units
+    position: float
+    # Maximum angle between a sample and the interpolated keys, in radians
+    rotation: float
+
+def make_quaternions_continuous(quaternions: np.ndarray) -> np.ndarray:
+    """
+    Negates the quaternions that are in the opposite hemisphere of the previous frame, so that interpolating between any two frames
+    takes the short path. The rotations themselves don't change.
+    """
+    quaternions = np.asarray(quaternions, dtype=np.float64)
+    flips = np.sum(quaternions[1:] * quaternions[:-1], axis=-1) < 0.0
+    signs = np.ones(quaternions.shape[:-1])
+    signs[1:] = np.where(np.cumsum(flips, axis=0) % 2 == 1, -1.0, 1.0)
+    return quaternions * signs[..., np.newaxis]
+
+def get_position_errors(samples: np.ndarray, interpolated: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(samples - interpolated, axis=-1)
+
+def get_rotation_errors(samples: np.ndarray, interpolated: np.ndarray) -> np.ndarray:
+    """
+    Angle between each sampled rotation and the normalized interpolated one.
+    """
+    norms = np.linalg.norm(interpolated, axis=-1)
+    dots = np.abs(np.sum(samples * interpolated, axis=-1)) / np.maximum(norms, 1e-12)
+    return 2.0 * np.arccos(np.clip(dots, 0.0, 1.0))
+
+def get_constant_components(values: np.ndarray) -> np.ndarray:
+    """
+    Returns a (B, C) mask of the components whose samples are all equal, which a single key reproduces.
+    """
+    return np.all(values == values[:1], axis=0)
+
+def interpolate_keys(values: np.ndarray, keep: np.ndarray) -> np.ndarray:
+    """
+    Returns the value of every frame linearly interpolated between the kept frames around it. The first and last frames must be kept.
+    """
+    frame_count = len(values)
+    frame_ids = np.arange(frame_count)[:, np.newaxis]
+    previous_keys = np.maximum.accumulate(np.where(keep, frame_ids, 0), axis=0)
+    next_keys = np.flip(np.minimum.accumulate(np.flip(np.where(keep, frame_ids, frame_count - 1), axis=0), axis=0), axis=0)
+    spans = next_keys - previous_keys
+    factors = np.divide(frame_ids - previous_keys, spans, out=np.zeros(spans.shape), where=spans > 0)
+    previous_values = np.take_along_axis(values, previous_keys[..., np.newaxis], axis=0)
+    next_values = np.take_along_axis(values, next_keys[..., np.newaxis], axis=0)
+    return previous_values + factors[..., np.newaxis] * (next_values - previous_values)
+
+def reduce_keyframes(values: np.ndarray, tolerance: float, get_errors: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Returns a (F, B) mask of the frames to key so that every sample is reproduced within the tolerance by the interpolated keys.
+    Ramer-Douglas-Peucker reduction run on all bones together: every pass splits each segment that is out of tolerance at its worst sample,
+    so the number of passes is the depth of the subdivision rather than the number of keys.
+    All the components of a channel share their keys, which keeps the error of a quaternion an angle.
+    """
+    frame_count, bone_count = values.shape[:2]
+    keep = np.zeros((frame_count, bone_count), dtype=bool)
+    if frame_count == 0:
+        return keep
+    keep[0] = True
+    keep[-1] = True
+    frame_ids = np.arange(frame_count)[:, np.newaxis]
+    while True:
+        errors = get_errors(values, interpolate_keys(values, keep))
+        errors[keep] = 0.0
+        error_frames, error_bones = np.nonzero(errors > tolerance)
+        if len(error_frames) == 0:
+            return keep
+        previous_keys = np.maximum.accumulate(np.where(keep, frame_ids, 0), axis=0)
+        segments = previous_keys[error_frames, error_bones] * bone_count + error_bones
+        order = np.lexsort((-errors[error_frames, error_bones], segments))
+        sorted_segments = segments[order]
+        worst = order[np.concatenate(([True], sorted_segments[1:] != sorted_segments[:-1]))]
+        keep[error_frames[worst], error_bones[worst]] = True
+
+def get_resample_times(frame_count: int, frame_step: float) -> np.ndarray:
+    """
+    Returns the source frames sampled every frame_step frames, starting at the first frame and never past the last one.
+    """
+    if frame_count <= 1:
+        return np.zeros(min(frame_count, 1))
+    return np.arange(0.0, frame_count - 1 + 1e-6, frame_step)
+
+def resample_linear(values: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    Returns the (len(times), B, C) values linearly interpolated at the given fractional frames.
+    """
+    previous_frames = np.minimum(np.floor(times).astype(np.int64), len(values) - 1)
+    next_frames = np.minimum(previous_frames + 1, len(values) - 1)
+    factors = (times - previous_frames)[:, np.newaxis, np.newaxis]
+    return values[previous_frames] + factors * (values[next_frames] - values[previous_frames])
+
+def resample_quaternions(quaternions: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    Returns the (len(times), B, 4) quaternions normalized-lerped at the given fractional frames, along the short path.
+    """
+    resampled = resample_linear(make_quaternions_continuous(quaternions), times)
+    return resampled / np.maximum(np.linalg.norm(resampled, axis=-1, keepdims=True), 1e-12)
@@ -13,63 +13,50 @@ Serializer = Utils.Serializer
 CoordinatesConverter = Utils.CoordinatesConverter
 import os
 import xml.etree.ElementTree as ET
-from .skeleton_core import SkeletonData
+from .skeleton_core import SkeletonData, SkeletonDataCache, ArmatureIndex
+from .project_index import ProjectIndex
+from .asset_catalog import AssetCatalog, HEADER_PROBE_SIZE
+from .prefetch import AssetPrefetcher
+from typing import Optional
 from pathlib import Path
 
-def import_skinnedmesh(debug: bool, file_name: str, directory: str, apply_to_armature_in_selected: bool, only_deform_bones:bool, skeleton_name = "", texture_directory = "", texture_file_name = "", operator: Operator = None):
+def probe_skinnedmesh(filepath: str | Path) -> dict:
     """
-    Imports any amount of given skinned mesh files. The function also tries to find suitable values for the default empty strings, if no value is given.
+    Reads only the header of a .SkinnedMesh file: {name, vertex_count, triangle_count}, the same summary import_skinnedmesh stores in the AssetCatalog.
+    Raises an exception if the file can't be read or the header is incomplete.
+    """
+    with open(filepath, "rb") as opened_file:
+        data = opened_file.read(HEADER_PROBE_SIZE)
+        name_length_in_bytes = struct.unpack_from("<I", data, 0)[0] * 2
+        if 4 + name_length_in_bytes + 8 > len(data):
+            # Names longer than the probe are only read in full when the file actually has that many bytes.
+            data += opened_file.read(4 + name_length_in_bytes + 8 - len(data))
+    object_name = Serializer.decode_fixed_string(data[4:4 + name_length_in_bytes], "utf-16-le")
+    vertex_amount, triangle_index_amount = struct.unpack_from("<2I", data, 4 + name_length_in_bytes)
+    return {"name": object_name, "vertex_count": vertex_amount, "triangle_count": triangle_index_amount // 3}
+
+class SkinnedMeshData:
+    """
+    Decoded contents of a .SkinnedMesh file, with the vertices and normals already converted to Blender coordinates.
     """
-    msg_handler = Utils.MessageHandler(debug, operator.report) if operator is not None else Utils.MessageHandler(debug)
-    context = bpy.context
     
-    return_value = {"CANCELLED"}
+    def __init__(self):
+        self.object_name: str = ""
+        self.vertex_count: int = 0
+        self.triangles: list[tuple[int, int, int]] = []
+        self.vertices: list[Vector] = []
+        self.normals: list[Vector] = []
+        self.uvs: list[tuple[float, float]] = []
+        # (total bones with weights, bone indices, weight values) of each vertex
+        self.weights: list[tuple[int, list[int], list[float]]] = []
     
-    msg_handler.debug_print(f"Skeleton name [{skeleton_name}] | Texture dir [{texture_directory}] | Texture name [{texture_file_name}]")
-    
-    if file_name.casefold().endswith(".skinnedmesh"):
-        filepath: Path = Path(directory) / file_name
-        
-        
-        base_file_name: str = filepath.stem
-        
-        # file_base_name is used to try and get the appropriate skeleton faster. Sometimes this is not possible, so we resort to searching in the xml files.
-        item_base_identifier: str = base_file_name.split("_")[0]
-        
-        msg_handler.debug_print(f"Directory: {directory} \n File name: {file_name} \n base file name: {base_file_name} \n item identifier name: {item_base_identifier}")
-        
-        target_armature: bpy.types.Armature = None
-        
-        if apply_to_armature_in_selected == False:
-            for obj in context.scene.objects:
-                if obj.name.casefold() == item_base_identifier.casefold() and obj.type == "ARMATURE":
-                    target_armature = obj
-                    break
-            if target_armature is None:
-                skeleton_name = try_get_skeleton_name_for_mesh(Path(filepath), directory, msg_handler) if skeleton_name == "" else skeleton_name
-                msg_handler.debug_print(f"Skeleton_name found: [{skeleton_name}]")
-                if skeleton_name != "":
-                    for obj in context.scene.objects:
-                        if obj.name.casefold() == skeleton_name.casefold() and obj.type == "ARMATURE":
-                            target_armature = obj
-                            break
-        
-        else:
-            for obj in context.selected_objects:
-                if obj.type == "ARMATURE":
-                    if target_armature is None:
-                        target_armature = obj
-                    else:
-                        msg_handler.report("ERROR", f"More than one armature has been found in the current selection. The imported mesh can only be assigned to one armature at a time.")
-
-        skeleton_data = None
-        if target_armature:
-            skeleton_data = SkeletonData.build_skeleton_from_armature(target_armature, only_deform_bones, False, msg_handler)
-            if skeleton_data is None:
-                msg_handler.report("INFO", f"Armature [{target_armature.name}] was found not valid. Weights won't be assigned to bones, but assigned to vertex groups with their IDs instead.") 
-        else:
-            msg_handler.report("INFO", f"Target armature of the file [{file_name}] could not be found. Weights won't be assigned to bones, but assigned to vertex groups with their IDs instead.")
-        
+    @staticmethod
+    def read_skinnedmesh_data(filepath: str | Path, msg_handler: Utils.MessageHandler) -> Optional["SkinnedMeshData"]:
+        """
+        Reads the whole file without touching any Blender data, so it can also run outside of the main thread.
+        """
+        base_file_name = Path(filepath).stem
+        mesh_data = SkinnedMeshData()
         co_conv = CoordinatesConverter(CoordsSys.Unity, CoordsSys.Blender)
         
         try:
@@ -79,67 +66,120 @@ def import_skinnedmesh(debug: bool, file_name: str, directory: str, apply_to_arm
                 try:
                     # Read the file header
                     name_length_in_bytes = reader.read_uint()*2
-                    object_name = reader.read_fixed_string(name_length_in_bytes, "utf-16-le")
-                    vertex_amount = reader.read_uint()
+                    mesh_data.object_name = reader.read_fixed_string(name_length_in_bytes, "utf-16-le")
+                    mesh_data.vertex_count = reader.read_uint()
                     triangle_index_amount = reader.read_uint()
                     
-                    msg_handler.debug_print(f"File [{base_file_name}] vertex amount: {vertex_amount}")
+                    msg_handler.debug_print(f"File [{base_file_name}] vertex amount: {mesh_data.vertex_count}")
                     msg_handler.debug_print(f"File [{base_file_name}] triangle amount: {triangle_index_amount}")
                     
                     # 
                     opened_file.seek(24, 1)
                     
                     # Read the triangles
-                    triangles = []
                     for _ in range(int(triangle_index_amount / 3)):
-                        triangles.append((reader.read_ushort(), reader.read_ushort(), reader.read_ushort()))
+                        mesh_data.triangles.append((reader.read_ushort(), reader.read_ushort(), reader.read_ushort()))
 
                     opened_file.seek(4, 1)
                     # Read the vertices
-                    vertices = []
-                    for _ in range(vertex_amount):
-                        vertices.append(reader.read_converted_vector3f())
+                    for _ in range(mesh_data.vertex_count):
+                        mesh_data.vertices.append(reader.read_converted_vector3f())
 
                     # Read the normals
                     normal_amount = reader.read_uint()
                     msg_handler.debug_print(f"File [{base_file_name}] normal amount: {normal_amount}")
-                    normals = []
                     for _ in range(normal_amount):
-                        normals.append(reader.read_converted_vector3f())
+                        mesh_data.normals.append(reader.read_converted_vector3f())
 
                     # Read the texture coordinates
                     uv_amount = reader.read_uint()
                     msg_handler.debug_print(f"File [{base_file_name}] uv coordinates amount: {uv_amount}")
-                    uvs = []
                     for _ in range(uv_amount):
-                        uvs.append((reader.read_float(), -reader.read_float()))
+                        mesh_data.uvs.append((reader.read_float(), -reader.read_float()))
 
                     # Read the bone weights
                     weight_amount = reader.read_uint()
                     msg_handler.debug_print(f"File [{base_file_name}] weight structure amount: {weight_amount}")
-                    weights = []
                     for _ in range(weight_amount):
                         total_bones_with_weights_amount = reader.read_uint()
                         indice_amount = reader.read_uint()
                         indices = [reader.read_uint() for _ in range(indice_amount)]
                         weight_value_amount = reader.read_uint()
                         weight_values = [reader.read_float() for _ in range(weight_value_amount)]
-                        weights.append((total_bones_with_weights_amount, indices, weight_values))
+                        mesh_data.weights.append((total_bones_with_weights_amount, indices, weight_values))
+                    
+                    AssetCatalog.get().store_asset_header(filepath, {"name": mesh_data.object_name, "vertex_count": mesh_data.vertex_count, "triangle_count": triangle_index_amount // 3})
                     
                 except UnicodeDecodeError as e:
                     msg_handler.report("ERROR", f"Unicode decode error while opening file at [{filepath}]: {e}")
                     traceback.print_exc()
-                    return return_value
+                    return None
                 
                 except Exception as e:
                     msg_handler.report("ERROR", f"Unexpected error while opening file at [{filepath}]: {e}")
                     traceback.print_exc()
-                    return return_value
+                    return None
                 
         except Exception as e:
             msg_handler.report("ERROR", f"Could not open file for reading at [{filepath}]: {e}")
             traceback.print_exc()
+            return None
+        
+        return mesh_data
+
+def import_skinnedmesh(debug: bool, file_name: str, directory: str, apply_to_armature_in_selected: bool, only_deform_bones:bool, skeleton_name = "", texture_directory = "", texture_file_name = "", operator: Operator = None):
+    """
+    Imports any amount of given skinned mesh files. The function also tries to find suitable values for the default empty strings, if no value is given.
+    """
+    msg_handler = Utils.MessageHandler(debug, operator.report) if operator is not None else Utils.MessageHandler(debug)
+    context = bpy.context
+    
+    return_value = {"CANCELLED"}
+    
+    msg_handler.debug_print(f"Skeleton name [{skeleton_name}] | Texture dir [{texture_directory}] | Texture name [{texture_file_name}]")
+    
+    if file_name.casefold().endswith(".skinnedmesh"):
+        filepath: Path = Path(directory) / file_name
+        
+        
+        base_file_name: str = filepath.stem
+        
+        # file_base_name is used to try and get the appropriate skeleton faster. Sometimes this is not possible, so we resort to searching in the xml files.
+        item_base_identifier: str = base_file_name.split("_")[0]
+        
+        msg_handler.debug_print(f"Directory: {directory} \n File name: {file_name} \n base file name: {base_file_name} \n item identifier name: {item_base_identifier}")
+        
+        target_armature: bpy.types.Armature = None
+        
+        if apply_to_armature_in_selected == False:
+            armature_index = ArmatureIndex.get(context.scene)
+            target_armature = armature_index.find_by_name(item_base_identifier)
+            if target_armature is None:
+                skeleton_name = try_get_skeleton_name_for_mesh(Path(filepath), directory, msg_handler) if skeleton_name == "" else skeleton_name
+                msg_handler.debug_print(f"Skeleton_name found: [{skeleton_name}]")
+                if skeleton_name != "":
+                    target_armature = armature_index.find_by_name(skeleton_name)
+        
+        else:
+            for obj in context.selected_objects:
+                if obj.type == "ARMATURE":
+                    if target_armature is None:
+                        target_armature = obj
+                    else:
+                        msg_handler.report("ERROR", f"More than one armature has been found in the current selection. The imported mesh can only be assigned to one armature at a time.")
+
+        skeleton_data = None
+        if target_armature:
+            skeleton_data = SkeletonDataCache.get(target_armature, only_deform_bones, False, msg_handler)
+            if skeleton_data is None:
+                msg_handler.report("INFO", f"Armature [{target_armature.name}] was found not valid. Weights won't be assigned to bones, but assigned to vertex groups with their IDs instead.") 
+        else:
+            msg_handler.report("INFO", f"Target armature of the file [{file_name}] could not be found. Weights won't be assigned to bones, but assigned to vertex groups with their IDs instead.")
+        
+        mesh_data = AssetPrefetcher.get().take(filepath) or SkinnedMeshData.read_skinnedmesh_data(filepath, msg_handler)
+        if mesh_data is None:
             return return_value
+        vertices, triangles, uvs, weights = mesh_data.vertices, mesh_data.triangles, mesh_data.uvs, mesh_data.weights
         
         # At least one action modifies the scene, return FINISHED to allow undo
         return_value = {"FINISHED"}
@@ -163,7 +203,7 @@ def import_skinnedmesh(debug: bool, file_name: str, directory: str, apply_to_arm
                     
         # If the texture file name was not given as a parameter, try to search for it
         if (texture_file_name == ""):
-            texture_directory, texture_file_name = get_texture_directory_and_name(Path(opened_file.name), Path(directory), msg_handler)
+            texture_directory, texture_file_name = get_texture_directory_and_name(filepath, Path(directory), msg_handler)
 
         msg_handler.debug_print(f"texture_directory found: {texture_directory}")
         msg_handler.debug_print(f"texture_file_name found: {texture_file_name}")
@@ -175,7 +215,7 @@ def import_skinnedmesh(debug: bool, file_name: str, directory: str, apply_to_arm
             else:
                 msg_handler.report("INFO", f"Texture could not be found despite .xml file pointing to one: \n Directory: {texture_directory} \n Texture file name: {texture_file_name}")
         else:
-            msg_handler.report("INFO", f"Texture file path for object [{file_name.name}] was not found.")
+            msg_handler.report("INFO", f"Texture file path for object [{file_name}] was not found.")
         
         # Assign weights
         if weights:
@@ -224,7 +264,7 @@ def find_target_directory(start_path: str, target_dir: str, max_levels: int) ->
     return None
 
 def find_texture_in_directory(target_directory, mesh_name, possible_extensions=[".png", ".jpg", ".jpeg", ".bmp", ".tga", ".dds"]):
-    for root, dirs, files in os.walk(target_directory):
+    for root, dirs, files in AssetCatalog.get().walk(target_directory):
         for file in files:
             for ext in possible_extensions:
                 if file.casefold() == (mesh_name + ext).casefold():
@@ -268,155 +308,23 @@ def apply_texture_to_mesh(mesh_obj, texture_path):
     organizer.arrange_nodes_no_context(mat.node_tree, 300, 300)
         
 def get_texture_directory_and_name(file_path: Path, directory: Path, msg_handler: Utils.MessageHandler):
-    mesh_material_file_name: str = ""
-    mesh_material_name: str = ""
-
     msg_handler.debug_print("[get_texture_directory_and_name] method")
     msg_handler.debug_print(f"File_path used: {file_path}")
 
-    def __get_material_file_and_name(xml_root_element):
-        if xml_root_element is not None:
-            model_element = xml_root_element.find(".//Models")
-            for item_element in model_element.iterfind(".//item"):
-                for item_child in item_element:
-                    if item_child.tag == "Mesh":
-                        mesh_attribute: str = item_child.get("value").lstrip("/")
-                        if mesh_attribute is not None:
-                            msg_handler.debug_print(f"Compared files: \n {mesh_attribute.casefold()} \n {file_path.name.casefold()}")
-                            
-                            if mesh_attribute.casefold() == file_path.name.casefold():
-                                msg_handler.debug_print(f"Found match in mesh attribute and file name.")
-                                for item_child_for_mesh in item_element:
-                                    if item_child_for_mesh.tag == "Material":
-                                        material_attibute = item_child_for_mesh.get("value").lstrip("/")
-                                        if material_attibute is not None:
-                                            mesh_material_file_name = material_attibute.split("|")[0]
-                                            mesh_material_name = material_attibute.split("|")[1]
-                                            return mesh_material_file_name, mesh_material_name
-                        else:
-                            for item_child_for_mesh in item_element:
-                                if item_child_for_mesh.tag == "Name":
-                                    material_attibute = item_child_for_mesh.get("value")
-                                    if material_attibute is not None:
-                                        msg_handler.debug_print(f"Model of name: {material_attibute} failed to give value of Mesh tag.")
+    project_index = ProjectIndex.get(directory, msg_handler)
+    if not project_index.has_material(msg_handler, file_path.name):
+        msg_handler.report("INFO", f"File [{file_path.name}]: .material.xml file for this file mesh was not found in any source .xml in the file directory.")
         return "", ""
-    
-    for file in Utils.find_single_xml_files(directory):
-        msg_handler.debug_print(f"Trying to find .material.xml in the file {file}")
-        filepath: Path = directory / file
-        mesh_material_file_name, mesh_material_name = __get_material_file_and_name(Utils.read_xml_file(msg_handler, filepath, f"Error while trying to read source .xml file at [{filepath}]"))
-        if mesh_material_file_name != "":
-            break
 
-
-    if mesh_material_file_name == "":
-        msg_handler.report({"INFO"}, f"File [{file_path.name}]: .material.xml file for this file mesh was not found in any source .xml in the file directory.")
-        return "", ""
-    
-    def __read_texture_xml(texture_xml_identifier):
-        texture_xml_file_name: str = texture_xml_identifier.split("|")[0]
-        texture_name_in_xml: str = texture_xml_identifier.split("|")[1]
-        texture_xml_root = Utils.read_xml_file(msg_handler, directory / texture_xml_file_name, f"Error while trying to read .texture.xml file at [{directory / texture_xml_file_name}]")
-        if texture_xml_root is not None:
-            for texture_element in texture_xml_root.iterfind(".//texture"):
-                if texture_element is not None and texture_element.get("name").casefold() == texture_name_in_xml.casefold():
-                    for texture_child in texture_element:
-                        if texture_child.tag == "source":
-                            texture_attibute = texture_child.get("value")
-                            if texture_attibute is not None:
-                                target_dir = texture_attibute.split("/")
-                                texture_file_name = target_dir[-1].split(".")[0]
-                                target_dir = target_dir[:-1]
-                                return "/".join(target_dir), texture_file_name
-        else:
-            return "", ""
-
-        
-
-    material_xml_root = Utils.read_xml_file(msg_handler, directory / mesh_material_file_name, f"Error while trying to read  .material.xml file at [{directory / mesh_material_file_name}]")
-
-    target_dir = ""
-    texture_file_name = ""
-    if material_xml_root is not None:
-        for material_element in material_xml_root.iterfind(".//material"):
-            material_element_attribute = material_element.get("name")
-            if material_element_attribute is not None and material_element_attribute.casefold() == mesh_material_name.casefold():
-                for material_child in material_element:
-                        if material_child.tag == "diffuse_tex":
-                            material_child_attribute = material_child.get("value").lstrip("/")
-                            if material_child_attribute is not None:
-                                if material_child_attribute.split("|")[0].split(".")[-1].casefold() != "xml".casefold():
-                                    target_dir = material_child_attribute.split("/")
-                                    texture_file_name = target_dir[-1].split(".")[0]
-                                    target_dir = target_dir[:-1]
-                                    return "/".join(target_dir), texture_file_name
-                                else:
-                                    return __read_texture_xml(material_child_attribute)
-    else:
-        return "", ""
-
-
-    return target_dir, texture_file_name
+    return project_index.get_texture_directory_and_name(msg_handler, file_path.name)
 
 def try_get_skeleton_name_for_mesh(file_path: Path, directory: str, msg_handler: Utils.MessageHandler):
-    mesh_animation_file_name: str = ""
-
     msg_handler.debug_print("[get_skeleton_name] method")
     msg_handler.debug_print(f"File_path used: {file_path}")
 
-    def get_animation_file_and_name(xml_root_element: ET.Element):
-        if xml_root_element is not None:
-            model_element = xml_root_element.find(".//Models")
-            for item_element in model_element.iterfind(".//item"):
-                for item_child in item_element:
-                    if item_child.tag == "Mesh":
-                        mesh_attribute: str = item_child.get("value")
-                        if mesh_attribute is not None:
-                            mesh_attribute = mesh_attribute.lstrip("/")
-                            msg_handler.debug_print(f"Compared files: \n {mesh_attribute.casefold()} \n {file_path.name.casefold()}")
-                            if mesh_attribute.casefold() == file_path.name.casefold():
-                                msg_handler.debug_print(f"Found match in mesh attribute and file name.")
-                                animation_element = xml_root_element.find(".//Animation")
-                                if animation_element is not None:
-                                    animation_attribute = animation_element.get("value")
-                                    if animation_attribute is not None:
-                                        mesh_animation_file_name = animation_attribute.lstrip("/").split("|")[0]
-                                        return mesh_animation_file_name
-                                else:
-                                    msg_handler.debug_print(f"Animation element could not be found inside a .xml source file.")
-                        else:
-                            for item_child_for_mesh in item_element:
-                                if item_child_for_mesh.tag == "Name":
-                                    name_attribute = item_child_for_mesh.get("value")
-                                    if name_attribute is not None:
-                                        msg_handler.debug_print(f"Model of name: {name_attribute} failed to give value of Mesh tag.")
-        return ""
-    
-    for file in Utils.find_single_xml_files(directory):
-        msg_handler.debug_print(f"Trying to find .animation.xml in the file {file}")
-        filepath: str = Path(directory) / file
-        mesh_animation_file_name = get_animation_file_and_name(Utils.read_xml_file(msg_handler, filepath, f"Error while trying to read source .xml file at [{filepath}]"))
-        if mesh_animation_file_name != "":
-            break
-
-
-    if mesh_animation_file_name == "":
+    skeleton_name = ProjectIndex.get(directory, msg_handler).get_skeleton_name_for_mesh(msg_handler, file_path.name)
+    if skeleton_name is None:
         msg_handler.report("INFO", f"File [{file_path.name}]: .animation.xml file for this file mesh was not found in any source .xml in the file directory.")
         return ""
 
-    animation_xml_root = Utils.read_xml_file(msg_handler, Path(directory) / mesh_animation_file_name, f"Error while trying to read  .animation.xml file at [{Path(directory) / mesh_animation_file_name}]")
-
-    skeleton_name = ""
-    if animation_xml_root is not None:
-        for animation_element in animation_xml_root.iterfind(".//animation"):
-            skeleton_element = animation_element.find(".//skeleton")
-            if skeleton_element is not None:
-                skeleton_attribute: str = skeleton_element.get("value")
-                if skeleton_attribute is not None:
-                    skeleton_name = skeleton_attribute.lstrip("/").split(".")[0]
-    else:
-        return ""
-
-
     return skeleton_name
-
@@ -0,0 +1,178 @@
+import os
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+from utils import Utils
+
+class AssetPrefetcher:
+    """
+    Optional background decoder of the assets the user is likely to import next. Files are decoded on worker threads, in the given order,
+    into an in-memory cache whose estimated size is kept under a memory budget. Importers take their results out of the cache with take(),
+    which frees that part of the budget for the next files, while previews read them with peek() and leave them for the import.
+    Results are only handed out if the file didn't change since it was decoded.
+    """
+
+    DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+    # Rough ratios between the memory used by the decoded data and the size of the file on disk. Meshes are decoded into Python objects,
+    # a Vector or tuple per vertex, uv, weight and triangle, about 12 times their packed values. Clips and skeletons are decoded into
+    # NumPy arrays, whose float64 (clips) or float32 (skeletons) values take at most twice the float32 values of the file.
+    PYTHON_OBJECTS_SIZE_FACTOR = 12
+    NUMPY_ARRAYS_SIZE_FACTOR = 2
+
+    class Entry:
+        def __init__(self, stamp: tuple[int, int], estimated_size: int, future: Future):
+            self.stamp = stamp
+            self.estimated_size = estimated_size
+            self.future = future
+
+    __instance: Optional["AssetPrefetcher"] = None
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self.memory_budget = AssetPrefetcher.DEFAULT_MEMORY_BUDGET
+        self.__condition = threading.Condition()
+        self.__entries: dict[str, AssetPrefetcher.Entry] = {}
+        self.__used_memory = 0
+        self.__generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get() -> "AssetPrefetcher":
+        if AssetPrefetcher.__instance is None:
+            AssetPrefetcher.__instance = AssetPrefetcher()
+        return AssetPrefetcher.__instance
+
+    @staticmethod
+    def __get_key(file_path: str | Path) -> str:
+        return os.path.normcase(os.path.abspath(str(file_path)))
+
+    @staticmethod
+    def __get_stamp(file_path: str | Path) -> Optional[tuple[int, int]]:
+        try:
+            file_stat = os.stat(file_path)
+            return file_stat.st_mtime_ns, file_stat.st_size
+        except OSError:
+            return None
+
+    def start(self, jobs: list[tuple[str | Path, Callable[[str | Path, Utils.MessageHandler], object], int]], memory_budget: Optional[int] = None):
+        """
+        Starts decoding the (file path, reader, decoded size factor) jobs in order, replacing the jobs of any previous call. Readers are called as
+        reader(file_path, msg_handler) and must not touch Blender data, and the factor is the *_SIZE_FACTOR constant matching what they decode into.
+        Already cached results of files that are still in the jobs are kept.
+        """
+        job_keys = {AssetPrefetcher.__get_key(file_path) for file_path, _, _ in jobs}
+        with self.__condition:
+            self.__generation += 1
+            if memory_budget is not None:
+                self.memory_budget = memory_budget
+            for key in [key for key in self.__entries if key not in job_keys]:
+                self.__drop(key)
+            self.__condition.notify_all()
+            generation = self.__generation
+        threading.Thread(target=self.__dispatch, args=(generation, list(jobs)), daemon=True).start()
+
+    def stop(self):
+        """
+        Cancels the pending jobs and empties the cache.
+        """
+        with self.__condition:
+            self.__generation += 1
+            for key in list(self.__entries):
+                self.__drop(key)
+            self.__condition.notify_all()
+
+    def take(self, file_path: str | Path) -> Optional[object]:
+        """
+        Removes the decoded result of the file from the cache and returns it, waiting for it if it's being decoded right now.
+        Returns None if the file wasn't prefetched, failed to decode or changed since it was decoded, in which case the caller decodes it itself.
+        """
+        key = AssetPrefetcher.__get_key(file_path)
+        with self.__condition:
+            entry = self.__entries.get(key)
+            if entry is None or entry.future.cancel():
+                # Jobs that didn't start yet are decoded by the caller right away instead of waiting for a worker.
+                if entry is not None:
+                    self.__drop(key)
+                self.misses += 1
+                return None
+            self.__drop(key)
+
+        try:
+            result = entry.future.result()
+        except Exception as e:
+            print(f"Prefetched decode of [{file_path}] failed: {e}")
+            result = None
+        if result is None or AssetPrefetcher.__get_stamp(file_path) != entry.stamp:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def peek(self, file_path: str | Path) -> Optional[object]:
+        """
+        Returns the decoded result of the file like take(), but leaves it in the cache for the next caller, such as the import that usually follows a preview.
+        Jobs that didn't start yet stay queued. The result is shared and must not be modified.
+        """
+        key = AssetPrefetcher.__get_key(file_path)
+        with self.__condition:
+            entry = self.__entries.get(key)
+            if entry is None or not (entry.future.running() or entry.future.done()):
+                self.misses += 1
+                return None
+
+        try:
+            result = entry.future.result()
+        except Exception as e:
+            print(f"Prefetched decode of [{file_path}] failed: {e}")
+            result = None
+        if result is None or AssetPrefetcher.__get_stamp(file_path) != entry.stamp:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def get_stats(self) -> dict:
+        with self.__condition:
+            return {"entries": len(self.__entries), "used_memory": self.__used_memory, "memory_budget": self.memory_budget, "hits": self.hits, "misses": self.misses}
+
+    def __drop(self, key: str):
+        # Must be called with the condition acquired.
+        entry = self.__entries.pop(key)
+        entry.future.cancel()
+        self.__used_memory -= entry.estimated_size
+        self.__condition.notify_all()
+
+    def __dispatch(self, generation: int, jobs: list):
+        msg_handler = Utils.MessageHandler(False)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for file_path, reader, decoded_size_factor in jobs:
+                stamp = AssetPrefetcher.__get_stamp(file_path)
+                if stamp is None:
+                    continue
+                key = AssetPrefetcher.__get_key(file_path)
+                estimated_size = stamp[1] * decoded_size_factor
+                with self.__condition:
+                    if estimated_size > self.memory_budget:
+                        continue
+                    # Waits until take() or a new start() frees enough of the budget.
+                    while self.__generation == generation and self.__used_memory + estimated_size > self.memory_budget:
+                        self.__condition.wait()
+                    if self.__generation != generation:
+                        return
+                    if key in self.__entries:
+                        continue
+                    self.__entries[key] = AssetPrefetcher.Entry(stamp, estimated_size, executor.submit(AssetPrefetcher.__decode, reader, file_path, msg_handler))
+                    self.__used_memory += estimated_size
+        except Exception as e:
+            print(f"Asset prefetch stopped: {e}")
+            traceback.print_exc()
+        finally:
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def __decode(reader: Callable, file_path: str | Path, msg_handler: Utils.MessageHandler):
+        return reader(file_path, msg_handler)
@@ -0,0 +1,189 @@
+import os
+from pathlib import Path
+from typing import Callable, Optional
+from utils import Utils
+from .xml_scanner import AnimationReference, ModelReference
+from .asset_catalog import AssetCatalog
+
+def split_texture_path(texture_value: str) -> tuple[str, str]:
+    """
+    Splits a texture path from the .xml files in the (directory, texture name without extension) pair used to search for the texture file.
+    """
+    target_dir = texture_value.split("/")
+    return "/".join(target_dir[:-1]), target_dir[-1].split(".")[0]
+
+class ProjectIndex:
+    """
+    Resolved dependency graph of the Lunia .xml data of a directory. The mesh -> material -> texture, mesh -> .animation.xml -> skeleton and
+    clip file -> skeleton relations are stored in dictionaries keyed by the casefolded file names.
+    Source .xml files are read lazily, whole and in directory order, only until one of them answers the lookup, and every file is read at most once.
+    Fully read files are stored in the AssetCatalog, so later sessions don't read them again until they change.
+    The index is rebuilt when the directory listing or any of the .xml files it has read change.
+    """
+
+    __indices: dict[str, "ProjectIndex"] = {}
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.file_stamps: dict[str, Optional[int]] = {}
+        self.source_files: list[str] = []
+        self.sources_by_mesh: dict[str, list[str]] = {}
+        self.material_by_mesh: dict[str, tuple[str, str]] = {}
+        self.texture_by_mesh: dict[str, tuple[str, str]] = {}
+        self.skeleton_by_mesh: dict[str, str] = {}
+        self.skeleton_by_clip: dict[str, str] = {}
+        self.__summaries: dict[tuple[str, str], object] = {}
+        self.__animation_value_by_source: dict[str, str] = {}
+        self.__model_scan_position = 0
+        self.__clip_scan_position = 0
+
+    @staticmethod
+    def get(directory: str | Path, msg_handler: Utils.MessageHandler) -> "ProjectIndex":
+        """
+        Returns the index of the given directory, creating it if it doesn't exist yet or if any of the files it depends on has changed since they were read.
+        """
+        key = os.path.normcase(os.path.abspath(str(directory)))
+        project_index = ProjectIndex.__indices.get(key)
+        if project_index is None or project_index.is_stale():
+            msg_handler.debug_print(f"Creating project index for directory [{directory}]")
+            project_index = ProjectIndex(directory)
+            project_index.__track(project_index.directory)
+            project_index.source_files = Utils.find_single_xml_files(project_index.directory)
+            ProjectIndex.__indices[key] = project_index
+        return project_index
+
+    @staticmethod
+    def clear():
+        ProjectIndex.__indices.clear()
+
+    @staticmethod
+    def __get_stamp(file_path: str | Path) -> Optional[int]:
+        try:
+            return os.stat(file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def __track(self, file_path: str | Path):
+        self.file_stamps.setdefault(str(file_path), ProjectIndex.__get_stamp(file_path))
+
+    def is_stale(self) -> bool:
+        for file_path, stamp in self.file_stamps.items():
+            if ProjectIndex.__get_stamp(file_path) != stamp:
+                return True
+        return False
+
+    def __get_summary(self, msg_handler: Utils.MessageHandler, kind: str, file_name: str):
+        key = (kind, file_name)
+        if key not in self.__summaries:
+            file_path = self.directory / file_name
+            self.__track(file_path)
+            self.__summaries[key] = AssetCatalog.get().get_xml_summary(msg_handler, file_path, kind)
+        return self.__summaries[key]
+
+    def __get_animation_value(self, msg_handler: Utils.MessageHandler, source_file: str) -> str:
+        return self.__get_summary(msg_handler, "animation_value", source_file) or ""
+
+    def __scan_models(self, msg_handler: Utils.MessageHandler, is_done: Callable[[], bool]):
+        """
+        Adds the models of the source files to the index, in order and one whole file at a time, until is_done returns True.
+        Each file is read once, in a single pass that closes it, and its models are stored in the catalog.
+        """
+        catalog = AssetCatalog.get()
+        while not is_done() and self.__model_scan_position < len(self.source_files):
+            source_file = self.source_files[self.__model_scan_position]
+            self.__model_scan_position += 1
+            file_path = self.directory / source_file
+            self.__track(file_path)
+            msg_handler.debug_print(f"Reading models of source file {source_file}")
+            models: Optional[list[ModelReference]] = catalog.get_xml_summary(msg_handler, file_path, "source_models")
+            for model in models or []:
+                self.__add_model(msg_handler, source_file, model)
+
+    def __add_model(self, msg_handler: Utils.MessageHandler, source_file: str, model):
+        if not model.in_models:
+            return
+        if model.mesh == "":
+            msg_handler.debug_print(f"Model of name: {model.name} failed to give value of Mesh tag.")
+            return
+        mesh_key = model.mesh.casefold()
+        self.sources_by_mesh.setdefault(mesh_key, []).append(source_file)
+        if model.material != "" and mesh_key not in self.material_by_mesh:
+            material_data = model.material.split("|")
+            if len(material_data) >= 2:
+                self.material_by_mesh[mesh_key] = (material_data[0], material_data[1])
+
+    def has_material(self, msg_handler: Utils.MessageHandler, mesh_file_name: str) -> bool:
+        mesh_key = mesh_file_name.casefold()
+        self.__scan_models(msg_handler, lambda: mesh_key in self.material_by_mesh)
+        return mesh_key in self.material_by_mesh
+
+    def get_texture_directory_and_name(self, msg_handler: Utils.MessageHandler, mesh_file_name: str) -> tuple[str, str]:
+        mesh_key = mesh_file_name.casefold()
+        if mesh_key in self.texture_by_mesh:
+            return self.texture_by_mesh[mesh_key]
+        if not self.has_material(msg_handler, mesh_file_name):
+            return "", ""
+
+        texture = ("", "")
+        material_file_name, material_name = self.material_by_mesh[mesh_key]
+        diffuse_by_material = self.__get_summary(msg_handler, "material", material_file_name)
+        diffuse_value = diffuse_by_material.get(material_name.casefold()) if diffuse_by_material else None
+        if diffuse_value is not None:
+            texture_identifier = diffuse_value.split("|")
+            if texture_identifier[0].split(".")[-1].casefold() != "xml":
+                texture = split_texture_path(diffuse_value)
+            elif len(texture_identifier) >= 2:
+                source_by_texture = self.__get_summary(msg_handler, "texture", texture_identifier[0])
+                if source_by_texture and texture_identifier[1].casefold() in source_by_texture:
+                    texture = split_texture_path(source_by_texture[texture_identifier[1].casefold()])
+
+        self.texture_by_mesh[mesh_key] = texture
+        return texture
+
+    def get_skeleton_name_for_mesh(self, msg_handler: Utils.MessageHandler, mesh_file_name: str) -> Optional[str]:
+        """
+        Returns None if no source .xml file of the mesh points to an .animation.xml file.
+        """
+        mesh_key = mesh_file_name.casefold()
+        if mesh_key in self.skeleton_by_mesh:
+            return self.skeleton_by_mesh[mesh_key]
+
+        def get_animation_source():
+            for source_file in self.sources_by_mesh.get(mesh_key, []):
+                if self.__get_animation_value(msg_handler, source_file) != "":
+                    return source_file
+            return None
+
+        self.__scan_models(msg_handler, lambda: get_animation_source() is not None)
+        animation_source = get_animation_source()
+        if animation_source is None:
+            return None
+
+        skeleton_name = ""
+        animation_file_name = self.__get_animation_value(msg_handler, animation_source).split("|")[0]
+        for animation in self.__get_summary(msg_handler, "animation", animation_file_name) or []:
+            if animation.skeleton != "":
+                # The last animation element with a skeleton is the one that defines the skeleton of the meshes of the source file.
+                skeleton_name = Path(animation.skeleton).stem
+        self.skeleton_by_mesh[mesh_key] = skeleton_name
+        return skeleton_name
+
+    def get_skeleton_name_for_clip(self, msg_handler: Utils.MessageHandler, clip_file_name: str) -> str:
+        clip_key = clip_file_name.casefold()
+        while clip_key not in self.skeleton_by_clip and self.__clip_scan_position < len(self.source_files):
+            source_file = self.source_files[self.__clip_scan_position]
+            self.__clip_scan_position += 1
+            msg_handler.debug_print(f"Trying to find .animation.xml in the file {source_file}")
+
+            animation_file_name = self.__get_animation_value(msg_handler, source_file).split("|")[0]
+            if animation_file_name == "":
+                continue
+            animations: list[AnimationReference] = self.__get_summary(msg_handler, "animation", animation_file_name) or []
+            for animation in animations:
+                if animation.skeleton == "":
+                    continue
+                for _, clip_file in animation.clips:
+                    if clip_file != "":
+                        self.skeleton_by_clip.setdefault(clip_file.casefold(), Path(animation.skeleton).stem)
+
+        return self.skeleton_by_clip.get(clip_key, "")
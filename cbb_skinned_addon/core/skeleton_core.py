@@ -6,174 +6,372 @@ from mathutils import Vector, Quaternion, Matrix
 from utils import Utils, CoordsSys
 Serializer = Utils.Serializer
 CoordinatesConverter = Utils.CoordinatesConverter
-from typing import Optional
+from typing import NamedTuple, Optional
 import os
+import hashlib
 from pathlib import Path
+from .asset_catalog import AssetCatalog, HEADER_PROBE_SIZE
+from .prefetch import AssetPrefetcher
+from . import transform_math
+import numpy as np
 
 MIN_BONE_LENGTH = 0.05
+# Custom property of the armature data that holds the fingerprint of the .Skeleton file it was imported from
+SKELETON_FINGERPRINT_PROPERTY = "skeleton_fingerprint"
+# Custom property of the armature data that holds the bone hierarchy stamp of its bones when the fingerprint was stored
+SKELETON_FINGERPRINT_BONES_PROPERTY = "skeleton_fingerprint_bones"
 
 def import_skeleton(debug: bool, file_name: str, directory: str, operator: Operator = None):
+    return import_skeletons(debug, [file_name], directory, operator)
+
+def import_skeletons(debug: bool, file_names: list[str], directory: str, operator: Operator = None):
+    """
+    Imports the given skeleton files in one batch: every armature object is created first, then all of them enter edit mode together (multi-object editing)
+    to create and position their bones, and leave it together, so the whole batch costs a single pair of mode switches.
+    """
     context = bpy.context
     msg_handler = Utils.MessageHandler(debug=debug, report_function=operator.report)
     
     return_value = {"CANCELLED"}
     
-    old_active_object = context.view_layer.objects.active
-    old_active_selected = None
-    old_active_mode = None
-    if old_active_object is not None:
-        old_active_selected = context.view_layer.objects.active.select_get()
-        old_active_mode = context.view_layer.objects.active.mode
-    old_selection = [obj for obj in context.selected_objects]
+    imported_armatures: list[tuple[bpy.types.Object, SkeletonData]] = []
     try:
-        if file_name.casefold().endswith(".skeleton"):
-            file_path = Path(directory) / file_name
+        with Utils.SceneState(context) as scene_state:
+            for file_name in file_names:
+                if not file_name.casefold().endswith(".skeleton"):
+                    msg_handler.report("ERROR", f"File [{file_name}] does not have the skeleton extension.")
+                    continue
+                file_path = Path(directory) / file_name
 
-            msg_handler.debug_print(f"Importing skeleton from: {file_path}")
-            
-            skeleton_data = SkeletonData.read_skeleton_data(file_path, msg_handler)
+                msg_handler.debug_print(f"Importing skeleton from: {file_path}")
+                
+                skeleton_data = AssetPrefetcher.get().take(file_path) or SkeletonData.read_skeleton_data(file_path, msg_handler)
+                
+                # Invalid skeleton, skip it
+                if skeleton_data is None:
+                    continue
+                
+                # Create armature
+                armature = bpy.data.armatures.new(file_path.stem)
+                armature_obj = bpy.data.objects.new(file_path.stem, armature)
+                context.collection.objects.link(armature_obj)
+                imported_armatures.append((armature_obj, skeleton_data))
             
-            # Invalid skeleton, abort import
-            if skeleton_data is None:
+            if not imported_armatures:
                 return return_value
             
             return_value = {"FINISHED"}
             
-            # Create armature and enter edit mode
-            armature = bpy.data.armatures.new(file_path.stem)
-            armature_obj = bpy.data.objects.new(file_path.stem, armature)
-            context.collection.objects.link(armature_obj)
-            context.view_layer.objects.active = armature_obj
-            bpy.ops.object.mode_set(mode="EDIT")
-
-            edit_bones = armature_obj.data.edit_bones
-            bones = []
-            bone_lengths: float = []
-            bone_local_matrices: Matrix = []
-            bone_world_matrices: Matrix = []
-            
-            
-            # Create bones and map indices
-            for i in range(skeleton_data.bone_count):
-                bone = edit_bones.new(skeleton_data.bone_names[i])
-                bone["bone_id"] = i
-                bones.append(bone)
-                ## Initialized to 9999 to indicate errors.
-                bone_lengths.append (9999)
-                bone_local_matrices.append(Matrix.Identity(4))
-                bone_world_matrices.append(Matrix.Identity(4))
-            
-            msg_handler.debug_print(f"Created [{len(edit_bones)}] bones in Blender armature.")
-            
-            def _process_bone(bone_id):
-                position = skeleton_data.bone_absolute_positions[bone_id]
-
-                rotation = skeleton_data.bone_absolute_rotations[bone_id]
-
-                # Calculate bone matrices
-                if skeleton_data.bone_parent_ids[bone_id] == SkeletonData.NO_PARENT:
-                    bone_world_matrices[bone_id] = Matrix.Identity(4) @ Matrix.Translation(position) @ rotation.to_matrix().to_4x4()
-                    bone_local_matrices[bone_id] = bone_world_matrices[bone_id]
-                else:
-                    parent_world_matrix = bone_world_matrices[skeleton_data.bone_parent_ids[bone_id]]
-                    bone_world_matrices[bone_id] = Matrix.Identity(4) @ Matrix.Translation(position) @ rotation.to_matrix().to_4x4()
-                    bone_local_matrices[bone_id] = parent_world_matrix.inverted() @ bone_world_matrices[bone_id]
-
-                # Process children
-                for child_id in [idx for idx, pid in enumerate(skeleton_data.bone_parent_ids) if pid == bone_id]:
-                    _process_bone(child_id)
-
-            # Find root bones and process recursively
-            root_bones = [i for i in range(skeleton_data.bone_count) if skeleton_data.bone_parent_ids[i] == SkeletonData.NO_PARENT]
-            for root_bone_id in root_bones:
-                _process_bone(root_bone_id)
-
-            def __calculate_bone_length(cur_bone_id):
-                def pick_bone_length():
-                    child_locs = []
-                    for child_id in [idx for idx, pid in enumerate(skeleton_data.bone_parent_ids) if pid == cur_bone_id]:
-                        child_locs.append(bone_local_matrices[child_id].to_translation())
-                    # If the bone has children, return the min of the children's position length
-                    if child_locs:
-                        min_length = min((loc.length for loc in child_locs))
-                        if min_length > MIN_BONE_LENGTH:
-                            return min_length
-                        else:
-                            return MIN_BONE_LENGTH
-                        
-                    # If the bone is not a root bone and has no children, return the parent's length
-                    if skeleton_data.bone_parent_ids[cur_bone_id] != SkeletonData.NO_PARENT:
-                        parent_bone_length = bone_lengths[skeleton_data.bone_parent_ids[cur_bone_id]]
-                        if parent_bone_length > MIN_BONE_LENGTH:
-                            return parent_bone_length
-                        else:
-                            return MIN_BONE_LENGTH
-
-                    return 1
-                
-                bone_lengths[cur_bone_id] = pick_bone_length()
-                for child_id in [idx for idx, pid in enumerate(skeleton_data.bone_parent_ids) if pid == cur_bone_id]:
-                    __calculate_bone_length(child_id)
-
-            for root_bone_id in root_bones:
-                __calculate_bone_length(root_bone_id)
-            
-            for i in range(skeleton_data.bone_count):
-                bones[i].length = bone_lengths[i]
-                edit_bone = armature_obj.data.edit_bones[skeleton_data.bone_names[i]]
-                edit_bone.matrix = bone_world_matrices[i]
-                
-                msg_handler.debug_print(f"Bone [{bones[i].name}] matrix rotation: [{bone_world_matrices[i].to_quaternion()}]")
-                msg_handler.debug_print(f"Bone [{bones[i].name}] as edit_bone matrix rotation: [{edit_bone.matrix.to_quaternion()}]")
-                
-                if skeleton_data.bone_parent_ids[i] != SkeletonData.NO_PARENT and i != 0:
-                    # These bones are manually overriden in the game to have no parent and their animations are given in world coordinates, so we fix these cases manually.
-                    if bones[i].name.casefold() != "staffjoint2" and bones[i].name.casefold() != "r_handend1" and bones[i].name.casefold() != "l_handend1":
-                        bones[i].parent = bones[skeleton_data.bone_parent_ids[i]]
-                
-                msg_handler.debug_print(f"Length of bone [{bones[i].name}]: {bones[i].length}")
+            # Every selected armature enters edit mode with the active one
+            scene_state.activate([armature_obj for armature_obj, _ in imported_armatures], "EDIT")
+            for armature_obj, skeleton_data in imported_armatures:
+                try:
+                    create_edit_bones(armature_obj.data.edit_bones, skeleton_data, msg_handler)
+                    armature_obj.data[SKELETON_FINGERPRINT_PROPERTY] = skeleton_data.get_fingerprint()
+                    armature_obj.data[SKELETON_FINGERPRINT_BONES_PROPERTY] = get_bone_hierarchy_stamp(armature_obj.data.edit_bones)
+                    SkeletonDataCache.invalidate(armature_obj.data)
+                except Exception as e:
+                    msg_handler.report("ERROR", f"Failed to import skeleton [{armature_obj.name}]: {e} \n{traceback.format_exc()}")
 
             context.view_layer.update()
-            bpy.ops.object.mode_set(mode="OBJECT")
-        else:
-            msg_handler.report("ERROR", f"File [{file_name}] does not have the skeleton extension.")
+            Utils.set_object_mode(context, imported_armatures[0][0], "OBJECT")
     except Exception as e:
         msg_handler.report("ERROR", f"Failed to import skeleton: {e} \n{traceback.format_exc()}")
-    finally:
-        bpy.ops.object.select_all(action='DESELECT')
-        if old_active_object is not None:
-            bpy.context.view_layer.objects.active = old_active_object
-            bpy.context.view_layer.objects.active.select_set(old_active_selected)
-            bpy.ops.object.mode_set(mode=old_active_mode)
-        elif bpy.context.view_layer.objects.active is not None:
-            bpy.ops.object.mode_set(mode="OBJECT")
+    
+    return return_value
+
+def get_bone_hierarchy_stamp(bones: bpy.types.ArmatureBones | bpy.types.ArmatureEditBones) -> str:
+    """
+    Returns a hash of the bone count and of the name and parent name of every bone, which changes when bones are renamed, added, removed or reparented.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(struct.pack("<I", len(bones)))
+    for bone_name, parent_name in sorted((bone.name, bone.parent.name if bone.parent is not None else "") for bone in bones):
+        digest.update(bone_name.encode("utf-8") + b"\0" + parent_name.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+def create_edit_bones(edit_bones: bpy.types.ArmatureEditBones, skeleton_data: "SkeletonData", msg_handler: Utils.MessageHandler):
+    """
+    Creates and positions the bones of the skeleton in an armature that is in edit mode.
+    """
+    bones = []
+    
+    # Create bones and map indices
+    for i in range(skeleton_data.bone_count):
+        bone = edit_bones.new(skeleton_data.bone_names[i])
+        bone["bone_id"] = i
+        bones.append(bone)
+    
+    msg_handler.debug_print(f"Created [{len(edit_bones)}] bones in Blender armature.")
+    
+    parent_ids = skeleton_data.parent_ids
+    bone_world_matrices = transform_math.compose_matrices(skeleton_data.positions, skeleton_data.rotations)
+    bone_local_matrices = transform_math.get_local_matrices(bone_world_matrices, parent_ids)
+    bone_lengths = transform_math.get_bone_lengths(bone_local_matrices, parent_ids, MIN_BONE_LENGTH)
+    
+    # The new armature holds only these bones, in creation order, so the whole collection can be written at once.
+    # Length goes first, since setting the matrix keeps the current length of the bone.
+    edit_bones.foreach_set("length", bone_lengths.astype(np.float32))
+    edit_bones.foreach_set("matrix", transform_math.to_blender_matrix_buffer(bone_world_matrices))
+    
+    for i in range(skeleton_data.bone_count):
+        if msg_handler.debug:
+            msg_handler.debug_print(f"Bone [{bones[i].name}] matrix: [{bone_world_matrices[i].tolist()}]")
+            msg_handler.debug_print(f"Bone [{bones[i].name}] as edit_bone matrix rotation: [{bones[i].matrix.to_quaternion()}]")
         
-        for obj in old_selection:
-            obj.select_set(True)
+        if skeleton_data.bone_parent_ids[i] != SkeletonData.NO_PARENT and i != 0:
+            # These bones are manually overriden in the game to have no parent and their animations are given in world coordinates, so we fix these cases manually.
+            if bones[i].name.casefold() != "staffjoint2" and bones[i].name.casefold() != "r_handend1" and bones[i].name.casefold() != "l_handend1":
+                bones[i].parent = bones[skeleton_data.bone_parent_ids[i]]
         
+        msg_handler.debug_print(f"Length of bone [{bones[i].name}]: {bones[i].length}")
+
+class ArmatureBoneLayout(NamedTuple):
+    # Names of all the bones of the armature, in armature order
+    bone_names: list[str]
+    # Armature indices of the bones that are exported (all of them, or only the deform bones)
+    bone_indices: list[int]
+    # bone_id property of each exported bone, None where it's missing
+    bone_ids: list
+    # Armature index of the closest exported ancestor of every bone, or NO_PARENT
+    exported_parent_indices: list[int]
+
+class ArmatureValidationReport(NamedTuple):
+    armature_name: str
+    bone_count: int
+    errors: list[str]
     
-    return return_value
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
 
 class SkeletonData:
     """
     Class that holds convenient skeleton information. Do note that absolute in the name of transform variables refers to them being 
     referent to the armature only, as if the armature transform was the center of the world.
+    Transforms are stored as contiguous float32 arrays with one row per bone (rotations in (w, x, y, z) order), so they can be used directly
+    in batched math. The bone_* properties give the old per bone mathutils access on top of them.
     """
     
     NO_PARENT: int = -1
     
-    def __init__(self):
+    class TransformView:
+        """
+        List-like view over a transform buffer of SkeletonData. Reading a bone gives a new mathutils value, writing a bone writes into the buffer.
+        """
+        __slots__ = ("__buffer", "__value_type")
+        
+        def __init__(self, buffer: np.ndarray, value_type: type):
+            self.__buffer = buffer
+            self.__value_type = value_type
+        
+        def __len__(self) -> int:
+            return len(self.__buffer)
+        
+        def __getitem__(self, bone_id: int):
+            return self.__value_type(self.__buffer[bone_id])
+        
+        def __setitem__(self, bone_id: int, value):
+            self.__buffer[bone_id] = tuple(value)
+        
+        def __iter__(self):
+            return (self.__value_type(row) for row in self.__buffer)
+    
+    __slots__ = ("skeleton_name", "bone_names", "bone_name_to_id", "parent_ids", "positions", "rotations", "scales", "local_positions", "local_rotations",
+                 "__hierarchy_parent_ids", "__bone_children", "__topological_order", "__bone_depths")
+    
+    def __init__(self, bone_count: int = 0):
         self.skeleton_name: str = ""
-        self.bone_name_to_id = {}
-        self.bone_count: int = 0
-        self.bone_names: str = []
-        self.bone_parent_ids: list[int] = []
-        self.bone_absolute_positions: list[Vector] = []
-        self.bone_absolute_scales: list[Vector]= []
-        self.bone_absolute_rotations: list[Quaternion] = []
-        self.bone_local_positions: list[Vector] = []
-        self.bone_local_rotations: list[Quaternion] = []
+        self.bone_name_to_id: dict[str, int] = {}
+        self.allocate(bone_count)
+        self.__hierarchy_parent_ids: Optional[tuple[int, ...]] = None
+        self.__bone_children: list[list[int]] = []
+        self.__topological_order: list[int] = []
+        self.__bone_depths: list[int] = []
+    
+    def allocate(self, bone_count: int):
+        """
+        Replaces the names and every buffer with ones for bone_count bones, with empty names, identity transforms and no parents.
+        """
+        self.bone_names: list[str] = [""] * bone_count
+        self.parent_ids = np.full(bone_count, SkeletonData.NO_PARENT, dtype=np.int16)
+        self.positions = np.zeros((bone_count, 3), dtype=np.float32)
+        self.rotations = np.zeros((bone_count, 4), dtype=np.float32)
+        self.rotations[:, 0] = 1.0
+        self.scales = np.ones((bone_count, 3), dtype=np.float32)
+        self.local_positions = np.zeros((bone_count, 3), dtype=np.float32)
+        self.local_rotations = self.rotations.copy()
+    
+    def update_local_transforms(self):
+        """
+        Computes the local transforms of every bone from the absolute transforms and the parent ids.
+        """
+        local_positions, local_rotations = transform_math.inverse_kinematics(self.positions, self.rotations, self.parent_ids)
+        self.local_positions = local_positions.astype(np.float32)
+        self.local_rotations = local_rotations.astype(np.float32)
+    
+    @property
+    def bone_count(self) -> int:
+        return len(self.parent_ids)
+    
+    @property
+    def bone_parent_ids(self) -> np.ndarray:
+        return self.parent_ids
+    
+    @bone_parent_ids.setter
+    def bone_parent_ids(self, parent_ids):
+        self.parent_ids = np.asarray(parent_ids, dtype=np.int16)
+    
+    @property
+    def bone_absolute_positions(self) -> "SkeletonData.TransformView":
+        return SkeletonData.TransformView(self.positions, Vector)
+    
+    @bone_absolute_positions.setter
+    def bone_absolute_positions(self, positions):
+        self.positions = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    
+    @property
+    def bone_absolute_scales(self) -> "SkeletonData.TransformView":
+        return SkeletonData.TransformView(self.scales, Vector)
     
+    @bone_absolute_scales.setter
+    def bone_absolute_scales(self, scales):
+        self.scales = np.array(scales, dtype=np.float32).reshape(-1, 3)
+    
+    @property
+    def bone_absolute_rotations(self) -> "SkeletonData.TransformView":
+        return SkeletonData.TransformView(self.rotations, Quaternion)
+    
+    @bone_absolute_rotations.setter
+    def bone_absolute_rotations(self, rotations):
+        self.rotations = np.array(rotations, dtype=np.float32).reshape(-1, 4)
+    
+    @property
+    def bone_local_positions(self) -> "SkeletonData.TransformView":
+        return SkeletonData.TransformView(self.local_positions, Vector)
+    
+    @bone_local_positions.setter
+    def bone_local_positions(self, positions):
+        self.local_positions = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    
+    @property
+    def bone_local_rotations(self) -> "SkeletonData.TransformView":
+        return SkeletonData.TransformView(self.local_rotations, Quaternion)
+    
+    @bone_local_rotations.setter
+    def bone_local_rotations(self, rotations):
+        self.local_rotations = np.array(rotations, dtype=np.float32).reshape(-1, 4)
+    
+    @staticmethod
+    def build_hierarchy(parent_ids: list[int]) -> tuple[list[list[int]], list[int], list[int]]:
+        """
+        Returns the children of each bone, the topological order and the depth of each bone for the given parent ids, in a single pass.
+        """
+        bone_count = len(parent_ids)
+        bone_children: list[list[int]] = [[] for _ in range(bone_count)]
+        roots = []
+        for bone_id, parent_id in enumerate(parent_ids):
+            if parent_id == SkeletonData.NO_PARENT:
+                roots.append(bone_id)
+            elif 0 <= parent_id < bone_count:
+                bone_children[parent_id].append(bone_id)
+        
+        # Breadth first from the roots: bones with an invalid parent or in a parent cycle are never reached, and are left out of the order.
+        topological_order = roots
+        bone_depths = [-1] * bone_count
+        for root_id in roots:
+            bone_depths[root_id] = 0
+        for bone_id in topological_order:
+            for child_id in bone_children[bone_id]:
+                bone_depths[child_id] = bone_depths[bone_id] + 1
+                topological_order.append(child_id)
+        return bone_children, topological_order, bone_depths
+    
+    def __update_hierarchy(self):
+        """
+        Rebuilds the hierarchy of the bones only when bone_parent_ids changed since the last build.
+        """
+        parent_ids = tuple(self.parent_ids.tolist())
+        if parent_ids == self.__hierarchy_parent_ids:
+            return
+        
+        self.__bone_children, self.__topological_order, self.__bone_depths = SkeletonData.build_hierarchy(parent_ids)
+        self.__hierarchy_parent_ids = parent_ids
+    
+    def get_bone_children(self) -> list[list[int]]:
+        """
+        Returns the ids of the children of each bone, indexed by bone id.
+        """
+        self.__update_hierarchy()
+        return self.__bone_children
+    
+    def get_topological_order(self) -> list[int]:
+        """
+        Returns the ids of the bones reachable from a root bone, ordered so every parent comes before its children (and bones of lower depth come first).
+        """
+        self.__update_hierarchy()
+        return self.__topological_order
+    
+    def get_bone_depths(self) -> list[int]:
+        """
+        Returns the depth of each bone (0 for root bones), or -1 for bones that can't be reached from a root bone.
+        """
+        self.__update_hierarchy()
+        return self.__bone_depths
+    
+    @staticmethod
+    def compute_fingerprint(bone_names: list[str], parent_ids) -> str:
+        """
+        Returns a hash of the bone count, the ordered bone names and the parent ids of a skeleton. Skeletons with the same fingerprint can use the same animations.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(struct.pack("<I", len(bone_names)))
+        for bone_name in bone_names:
+            digest.update(bone_name.encode("utf-8") + b"\0")
+        digest.update(np.asarray(parent_ids, dtype="<i4").tobytes())
+        return digest.hexdigest()
+    
+    def get_fingerprint(self) -> str:
+        return SkeletonData.compute_fingerprint(self.bone_names, self.parent_ids)
+    
+    @staticmethod
+    def get_file_fingerprint(filepath: str | Path) -> Optional[str]:
+        """
+        Returns the fingerprint of a .Skeleton file from its AssetCatalog header, probing the file only if the header isn't cataloged yet.
+        Returns None if the file can't be probed.
+        """
+        catalog = AssetCatalog.get()
+        header = catalog.get_asset_header(filepath)
+        if header is None or "fingerprint" not in header:
+            try:
+                header = SkeletonData.probe_skeleton(filepath)
+            except Exception:
+                return None
+            catalog.store_asset_header(filepath, header)
+        return header["fingerprint"]
+    
+    @staticmethod
+    def probe_skeleton(filepath: str | Path) -> dict:
+        """
+        Reads only the bone count, bone names and parent ids of a .Skeleton file: {bone_count, bone_names, fingerprint}, the same summary read_skeleton_data
+        stores in the AssetCatalog. The data that doesn't fit in the first read is read right after it. Raises an exception if the file can't be read or is incomplete.
+        """
+        with open(filepath, "rb") as opened_file:
+            data = opened_file.read(HEADER_PROBE_SIZE)
+            bone_count = struct.unpack_from("<I", data, 280)[0]
+            names_end = 308 + 128 * bone_count
+            parent_ids_end = names_end + 12 + 4 * bone_count
+            if parent_ids_end > len(data):
+                data += opened_file.read(parent_ids_end - len(data))
+        if parent_ids_end > len(data):
+            raise EOFError(f"Skeleton file [{filepath}] ends before the names and parents of its {bone_count} bones")
+        bone_names = [Serializer.decode_fixed_string(data[offset:offset + 128], "ascii") for offset in range(308, names_end, 128)]
+        parent_ids = list(struct.unpack_from(f"<{bone_count}i", data, names_end + 12))
+        if bone_count > 0:
+            # Same fix as read_skeleton_data
+            parent_ids[0] = SkeletonData.NO_PARENT
+        return {"bone_count": bone_count, "bone_names": bone_names, "fingerprint": SkeletonData.compute_fingerprint(bone_names, parent_ids)}
+
     @staticmethod
     def read_skeleton_data(filepath: str, msg_handler: Utils.MessageHandler) -> Optional["SkeletonData"]:
         skeletonData = SkeletonData()
@@ -185,19 +383,18 @@ class SkeletonData:
                 # Skip irrelevant data
                 opened_file.seek(280, 0)
 
-                skeletonData.bone_count = reader.read_uint()
+                skeletonData.allocate(reader.read_uint())
                 
                 opened_file.seek(24, 1)
                 
                 msg_handler.debug_print(f"Bone count from source skeleton: {skeletonData.bone_count}")
 
-                for _ in range(skeletonData.bone_count):
-                    bone_name = reader.read_fixed_string(128, "ascii")
-                    skeletonData.bone_names.append(bone_name)
+                skeletonData.bone_names = [reader.read_fixed_string(128, "ascii") for _ in range(skeletonData.bone_count)]
+                skeletonData.bone_name_to_id = {bone_name: bone_id for bone_id, bone_name in enumerate(skeletonData.bone_names)}
 
                 opened_file.seek(12, 1)
                 
-                skeletonData.bone_parent_ids = list(reader.read_values(f"{skeletonData.bone_count}i", 4 * skeletonData.bone_count))
+                skeletonData.parent_ids[:] = reader.read_values(f"{skeletonData.bone_count}i", 4 * skeletonData.bone_count)
 
                 # Some skeletons have the first bone, which is the root bone, with a parent to itself. That's obviously wrong, so we fix it manually.
                 # The first bone is also usually treated as the root bone and ignores any attempts of parenting. That's why it's important to always have
@@ -217,23 +414,19 @@ class SkeletonData:
                     msg_handler.debug_print(f"Bone scale (no conversion is done): [{bone_scale}]")
                     msg_handler.debug_print(f"Bone rotation (after conversion): [{bone_rotation}]")
                     
-                    skeletonData.bone_absolute_positions.append(bone_position)
-                    skeletonData.bone_absolute_scales.append(bone_scale)
-                    skeletonData.bone_absolute_rotations.append(bone_rotation)
+                    skeletonData.positions[_] = bone_position
+                    skeletonData.scales[_] = bone_scale
+                    skeletonData.rotations[_] = bone_rotation
+                
+                skeletonData.update_local_transforms()
                 
                 for bone_id in range(skeletonData.bone_count):
                     msg_handler.debug_print(f"Bone name: [{skeletonData.bone_names[bone_id]}], local data:")
-                    
-                    if skeletonData.bone_parent_ids[bone_id] != SkeletonData.NO_PARENT:
-                        parent_bone_id = skeletonData.bone_parent_ids[bone_id]
-                        skeletonData.bone_local_positions.append(Utils.get_local_position(skeletonData.bone_absolute_positions[parent_bone_id], skeletonData.bone_absolute_rotations[parent_bone_id], skeletonData.bone_absolute_positions[bone_id]))
-                        skeletonData.bone_local_rotations.append(Utils.get_local_rotation(skeletonData.bone_absolute_rotations[parent_bone_id], skeletonData.bone_absolute_rotations[bone_id]))
-                    else:
-                        skeletonData.bone_local_positions.append(skeletonData.bone_absolute_positions[bone_id])
-                        skeletonData.bone_local_rotations.append(skeletonData.bone_absolute_rotations[bone_id])
                     msg_handler.debug_print(f"Local position: [{skeletonData.bone_local_positions[bone_id]}]")
                     msg_handler.debug_print(f"Local rotation: [{skeletonData.bone_local_rotations[bone_id]}]")
 
+            AssetCatalog.get().store_asset_header(filepath, {"bone_count": skeletonData.bone_count, "bone_names": skeletonData.bone_names, "fingerprint": skeletonData.get_fingerprint()})
+
         except Exception as e:
             msg_handler.report("ERROR", f"Failed to read file to read skeleton data: {e}")
             traceback.print_exc()
@@ -270,7 +463,7 @@ class SkeletonData:
                     writer.write_uint(4 * skeleton_data.bone_count)
                     writer.write_uint(0xFFFFFFFF)
                     
-                    for parent_id in skeleton_data.bone_parent_ids:
+                    for parent_id in skeleton_data.parent_ids.tolist():
                         writer.write_int(parent_id)
                     
                     writer.write_uint(50331904)
@@ -301,136 +494,147 @@ class SkeletonData:
         return True
     
     
-    @staticmethod 
-    def build_skeleton_from_armature(armature_object: bpy.types.Object, only_deform_bones: bool, check_for_exportation: bool, msg_handler: Utils.MessageHandler) -> "SkeletonData":
+    @staticmethod
+    def read_bone_layout(armature_data: bpy.types.Armature, only_deform_bones: bool) -> "ArmatureBoneLayout":
         """
-            Function returns a SkeletonData class built from a Blender armature. It also performs checks to see if the given armature is valid, since the information in this class is used to do any import/export operation.
+        Reads the bone data needed to validate an armature, without any transform: names, bone ids, deform flags and parents.
+        Deform flags are read for all bones with foreach_get, the rest with one pass over the bones.
         """
+        armature_bones = armature_data.bones
+        armature_bone_count = len(armature_bones)
+        
+        bone_names = [bone.name for bone in armature_bones]
+        bone_index_by_name = {bone_name: bone_index for bone_index, bone_name in enumerate(bone_names)}
+        parent_indices = [bone_index_by_name[bone.parent.name] if bone.parent is not None else SkeletonData.NO_PARENT for bone in armature_bones]
         
-        bones: list[bpy.types.Bone] = None
         if only_deform_bones:
-            bones = [bone for bone in armature_object.data.bones if bone.use_deform]
+            use_deform = np.zeros(armature_bone_count, dtype=bool)
+            armature_bones.foreach_get("use_deform", use_deform)
+            is_exported = use_deform.tolist()
         else:
-            bones = armature_object.data.bones
+            is_exported = [True] * armature_bone_count
+        bone_indices = [bone_index for bone_index in range(armature_bone_count) if is_exported[bone_index]]
+        bone_ids = [bone.get("bone_id") for bone, exported in zip(armature_bones, is_exported) if exported]
         
-        msg_handler.debug_print(f"Validating armature: {armature_object.name}. Checking for exportation: {check_for_exportation}")
-        msg_handler.debug_print(f"Amount of bones: {len(bones)}")
+        # The closest exported ancestor of every bone, resolved parents first so each bone only looks at its direct parent.
+        exported_parent_indices = [SkeletonData.NO_PARENT] * armature_bone_count
+        for bone_index in SkeletonData.build_hierarchy(parent_indices)[1]:
+            parent_index = parent_indices[bone_index]
+            if parent_index != SkeletonData.NO_PARENT:
+                exported_parent_indices[bone_index] = parent_index if is_exported[parent_index] else exported_parent_indices[parent_index]
         
-        if len(bones) == 0:
-            msg_handler.report("ERROR", f"Armature [{armature_object.name}] has no bones in it.")
+        return ArmatureBoneLayout(bone_names, bone_indices, bone_ids, exported_parent_indices)
+    
+    @staticmethod
+    def iterate_armature_errors(armature_name: str, bone_layout: "ArmatureBoneLayout", check_for_exportation: bool, msg_handler: Utils.MessageHandler):
+        """
+        Yields the message of every problem that makes the armature invalid for importation, or for exportation if check_for_exportation is true, in the order
+        they are found. Callers that only need to know if the armature is valid can stop at the first one.
+        """
+        bone_count = len(bone_layout.bone_indices)
+        if bone_count == 0:
+            yield f"Armature [{armature_name}] has no bones in it."
             return
-        if len(bones) > 256:
-            msg_handler.report("ERROR", f"Armature [{armature_object.name}] has more than 256 bones.")
+        if bone_count > 256:
+            yield f"Armature [{armature_name}] has more than 256 bones."
             return
         
-        existing_bone_names: list[str] = []
         has_Head_bone = False
-        
-        skeleton_data = SkeletonData()
-        skeleton_data.skeleton_name = armature_object.name
-        skeleton_data.bone_count = len(bones)
-        skeleton_data.bone_names = [""] * skeleton_data.bone_count
-        skeleton_data.bone_parent_ids = [SkeletonData.NO_PARENT] * skeleton_data.bone_count
-        skeleton_data.bone_absolute_positions = [Vector((0.0, 0.0, 0.0))] * skeleton_data.bone_count
-        skeleton_data.bone_absolute_scales = [Vector((0.0, 0.0, 0.0))] * skeleton_data.bone_count
-        skeleton_data.bone_absolute_rotations = [Quaternion((0.0, 0.0, 0.0, 0.0))] * skeleton_data.bone_count
-        skeleton_data.bone_local_positions = [Vector((0.0, 0.0, 0.0))] * skeleton_data.bone_count
-        skeleton_data.bone_local_rotations = [Quaternion((0.0, 0.0, 0.0, 0.0))] * skeleton_data.bone_count
-        
-        existing_bone_ids = set()
-        
-        base_bone_id = None
-        for bone in bones:
-            bone_name = bone.name
+        base_bone_index = None
+        existing_bone_names: set[str] = set()
+        bone_name_by_id: dict[int, str] = {}
+        for bone_index, bone_id in zip(bone_layout.bone_indices, bone_layout.bone_ids):
+            bone_name = bone_layout.bone_names[bone_index]
             msg_handler.debug_print(f"Information for bone: {bone_name}")
-            
             msg_handler.debug_print(f" name length: {len(bone_name)}")
-            if len(bone_name) > 128:
-                msg_handler.report("ERROR", f"Bone name {bone_name} exceeds 128 characters.")
-                return
-            
-            try:
-                bone_name.encode('ascii')
-            except UnicodeEncodeError:
-                msg_handler.report("ERROR", f"Bone [{bone_name}] of armature [{armature_object.name}] contains non-ASCII characters.")
-                return
-            
-            if bone_name not in existing_bone_names:
-                existing_bone_names.append(bone_name)
-                if bone_name == "Head":
-                    has_Head_bone = True
-            else:
-                msg_handler.report("ERROR", f"Armature [{armature_object.name}] has bones with equal names.")
-                return
-            
-            # Check for invalid bone_id values
-            bone_id = bone.get("bone_id")
             msg_handler.debug_print(f" bone_id: {bone_id}")
-            if bone_id is not None:
-                if bone_id < 0 or bone_id >= len(bones):
-                    msg_handler.report("ERROR", f"Bone [{bone_name}] of armature [{armature_object.name}] has an invalid id(id<0 or id>=number_of_bones_in_armature(this number will be the amount of deform bones in case the consider only deform bones has been checked)), offending bone_id: [{bone_id}].")
-                    return
-            else:
-                msg_handler.report("ERROR", f"Bone [{bone_name}] of armature [{armature_object.name}] is missing the bone_id property.")
-                return
             
-            if bone_id in existing_bone_ids:
-                msg_handler.report("ERROR", f"Bone [{bone_name}] of armature [{armature_object.name}] has the same bone_id of another bone. Other bone with the same bone_id: {skeleton_data.bone_names[bone_id]}")
-                return
+            if len(bone_name) > 128:
+                yield f"Bone name {bone_name} exceeds 128 characters."
             
-            existing_bone_ids.add(bone_id)
+            if not bone_name.isascii():
+                yield f"Bone [{bone_name}] of armature [{armature_name}] contains non-ASCII characters."
             
-            skeleton_data.bone_names[bone_id] = bone_name
-            skeleton_data.bone_name_to_id[bone_name] = bone_id
-            edit_bone_position , edit_bone_rotation = Utils.decompose_blender_matrix_position_rotation(bone.matrix_local)
-            skeleton_data.bone_absolute_positions[bone_id] = edit_bone_position
-            skeleton_data.bone_absolute_rotations[bone_id] = edit_bone_rotation
-            skeleton_data.bone_absolute_scales[bone_id] = Vector((1.0, 1.0, 1.0))
-            bone_parent = None
-            if only_deform_bones:
-                def recursively_get_deform_parent(bone):
-                    if bone.parent is None:
-                        return None
-                    elif bone.parent in bones:
-                        return bone.parent
-                    else:
-                        return recursively_get_deform_parent(bone.parent)
-                bone_parent = recursively_get_deform_parent(bone)
-            else:
-                bone_parent = bone.parent
-            msg_handler.debug_print(f" edit position: {edit_bone_position}")
-            msg_handler.debug_print(f" edit rotation: {edit_bone_rotation}")
-            msg_handler.debug_print(f" parent: {bone_parent}")
-            if base_bone_id is None:
-                if bone_name.casefold() in {"base", "root"}:
-                    base_bone_id = bone_id
+            if bone_name in existing_bone_names:
+                yield f"Armature [{armature_name}] has bones with equal names."
+            existing_bone_names.add(bone_name)
+            if bone_name == "Head":
+                has_Head_bone = True
+            if base_bone_index is None and bone_name.casefold() in {"base", "root"}:
+                base_bone_index = bone_index
             
-            if bone_parent is not None:
-                parent_edit_bone_position , parent_edit_bone_rotation = Utils.decompose_blender_matrix_position_rotation(bone_parent.matrix_local)
-                skeleton_data.bone_local_positions[bone_id] = Utils.get_local_position(parent_edit_bone_position, parent_edit_bone_rotation, edit_bone_position)
-                skeleton_data.bone_local_rotations[bone_id] = Utils.get_local_rotation(parent_edit_bone_rotation, edit_bone_rotation)
-                msg_handler.debug_print(f" local position: {skeleton_data.bone_local_positions[bone_id]}")
-                msg_handler.debug_print(f" local rotation: {skeleton_data.bone_local_rotations[bone_id]}")
-                
-                skeleton_data.bone_parent_ids[bone_id] = bone_parent["bone_id"]
+            # Check for invalid bone_id values
+            if bone_id is None:
+                yield f"Bone [{bone_name}] of armature [{armature_name}] is missing the bone_id property."
+            elif bone_id < 0 or bone_id >= bone_count:
+                yield f"Bone [{bone_name}] of armature [{armature_name}] has an invalid id(id<0 or id>=number_of_bones_in_armature(this number will be the amount of deform bones in case the consider only deform bones has been checked)), offending bone_id: [{bone_id}]."
+            elif bone_id in bone_name_by_id:
+                yield f"Bone [{bone_name}] of armature [{armature_name}] has the same bone_id of another bone. Other bone with the same bone_id: {bone_name_by_id[bone_id]}"
             else:
-                skeleton_data.bone_local_positions[bone_id] = edit_bone_position
-                skeleton_data.bone_local_rotations[bone_id] = edit_bone_rotation
-                skeleton_data.bone_parent_ids[bone_id] = SkeletonData.NO_PARENT
-                
+                bone_name_by_id[bone_id] = bone_name
+        
         msg_handler.debug_print(f" has head bone: {has_Head_bone}")
-        msg_handler.debug_print(f" base bone id: {base_bone_id}")
+        msg_handler.debug_print(f" base bone: {bone_layout.bone_names[base_bone_index] if base_bone_index is not None else None}")
         if check_for_exportation:
             if not has_Head_bone:
-                msg_handler.report("ERROR", f"Armature [{armature_object.name}] is missing a bone named 'Head'(case considered), which is necessary for exportation.")
-                return
+                yield f"Armature [{armature_name}] is missing a bone named 'Head'(case considered), which is necessary for exportation."
             
-            if base_bone_id is None:
-                msg_handler.report("ERROR", f"Armature [{armature_object.name}] is missing a bone named 'Base'(case not considered) or 'Root'(case not considered), which is necessary for exportation.")
-                return
-            if skeleton_data.bone_parent_ids[base_bone_id] != SkeletonData.NO_PARENT:
-                msg_handler.report("ERROR", f"Bone [{skeleton_data.bone_names[base_bone_id]}] of armature [{armature_object.name}] is marked as the root bone but has a parent, which should not happen.")
-                return
+            if base_bone_index is None:
+                yield f"Armature [{armature_name}] is missing a bone named 'Base'(case not considered) or 'Root'(case not considered), which is necessary for exportation."
+            elif bone_layout.exported_parent_indices[base_bone_index] != SkeletonData.NO_PARENT:
+                yield f"Bone [{bone_layout.bone_names[base_bone_index]}] of armature [{armature_name}] is marked as the root bone but has a parent, which should not happen."
+    
+    @staticmethod
+    def validate_armature(armature_name: str, armature_data: bpy.types.Armature, only_deform_bones: bool, check_for_exportation: bool, msg_handler: Utils.MessageHandler) -> "ArmatureValidationReport":
+        """
+        Runs every check of build_skeleton_from_armature without computing any transform, and returns all the problems found.
+        """
+        bone_layout = SkeletonData.read_bone_layout(armature_data, only_deform_bones)
+        errors = list(SkeletonData.iterate_armature_errors(armature_name, bone_layout, check_for_exportation, msg_handler))
+        return ArmatureValidationReport(armature_name, len(bone_layout.bone_indices), errors)
+    
+    @staticmethod 
+    def build_skeleton_from_armature(armature_object: bpy.types.Object, only_deform_bones: bool, check_for_exportation: bool, msg_handler: Utils.MessageHandler) -> "SkeletonData":
+        """
+            Function returns a SkeletonData class built from a Blender armature. It also performs checks to see if the given armature is valid, since the information in this class is used to do any import/export operation.
+        """
+        
+        msg_handler.debug_print(f"Validating armature: {armature_object.name}. Checking for exportation: {check_for_exportation}")
+        
+        bone_layout = SkeletonData.read_bone_layout(armature_object.data, only_deform_bones)
+        msg_handler.debug_print(f"Amount of bones: {len(bone_layout.bone_indices)}")
+        
+        error = next(SkeletonData.iterate_armature_errors(armature_object.name, bone_layout, check_for_exportation, msg_handler), None)
+        if error is not None:
+            msg_handler.report("ERROR", error)
+            return
+        
+        armature_bones = armature_object.data.bones
+        matrices_buffer = np.empty(len(armature_bones) * 16, dtype=np.float32)
+        armature_bones.foreach_get("matrix_local", matrices_buffer)
+        matrices = transform_math.from_blender_matrix_buffer(matrices_buffer)
+        
+        skeleton_data = SkeletonData(len(bone_layout.bone_indices))
+        skeleton_data.skeleton_name = armature_object.name
+        
+        # Every exported bone has a valid and unique bone_id at this point, so the arrays can be filled in bone_id order at once.
+        bone_id_by_index = dict(zip(bone_layout.bone_indices, bone_layout.bone_ids))
+        for bone_index, bone_id in bone_id_by_index.items():
+            skeleton_data.bone_names[bone_id] = bone_layout.bone_names[bone_index]
+            skeleton_data.bone_name_to_id[bone_layout.bone_names[bone_index]] = bone_id
+        bone_ids = np.array(bone_layout.bone_ids, dtype=np.int64)
+        exported_matrices = matrices[bone_layout.bone_indices]
+        skeleton_data.positions[bone_ids] = exported_matrices[:, :3, 3]
+        skeleton_data.rotations[bone_ids] = transform_math.matrices_to_quaternions(exported_matrices)
+        skeleton_data.parent_ids[bone_ids] = [bone_id_by_index.get(bone_layout.exported_parent_indices[bone_index], SkeletonData.NO_PARENT) for bone_index in bone_layout.bone_indices]
+        skeleton_data.update_local_transforms()
+        
+        if msg_handler.debug:
+            for bone_id in range(skeleton_data.bone_count):
+                msg_handler.debug_print(f"Bone [{skeleton_data.bone_names[bone_id]}] edit position: {skeleton_data.bone_absolute_positions[bone_id]}")
+                msg_handler.debug_print(f" edit rotation: {skeleton_data.bone_absolute_rotations[bone_id]}")
+                msg_handler.debug_print(f" parent id: {skeleton_data.parent_ids[bone_id]}")
+        
         return skeleton_data
                 
 
@@ -455,3 +659,159 @@ class SkeletonData:
             hex_data_string += hex_data
         hex_data_string += "\n"
         print(hex_data_string)
+
+def validate_armatures(armature_objects: list[bpy.types.Object], only_deform_bones: bool, check_for_exportation: bool, msg_handler: Utils.MessageHandler) -> list[ArmatureValidationReport]:
+    """
+    Validates every armature object in one pass, without computing any transform, and returns one report per object.
+    """
+    return [SkeletonData.validate_armature(armature_object.name, armature_object.data, only_deform_bones, check_for_exportation, msg_handler)
+            for armature_object in armature_objects if armature_object.type == "ARMATURE"]
+
+def validate_blend_file_armatures(filepath: str, only_deform_bones: bool, check_for_exportation: bool, msg_handler: Utils.MessageHandler) -> list[ArmatureValidationReport]:
+    """
+    Validates every armature datablock of a .blend file without opening it, and returns one report per armature, named after the armature datablock.
+    The armatures are linked from the file only for the validation.
+    """
+    existing_libraries = set(bpy.data.libraries)
+    with bpy.data.libraries.load(filepath, link=True) as (data_from, data_to):
+        data_to.armatures = data_from.armatures
+    armatures = [armature for armature in data_to.armatures if armature is not None]
+    try:
+        return [SkeletonData.validate_armature(armature.name, armature, only_deform_bones, check_for_exportation, msg_handler) for armature in armatures]
+    finally:
+        # Removing the library also removes the data linked from it. Libraries that were already linked before are left as they were.
+        new_libraries = [library for library in bpy.data.libraries if library not in existing_libraries]
+        if new_libraries:
+            bpy.data.batch_remove(new_libraries)
+
+class SkeletonDataCache:
+    """
+    Session cache of the SkeletonData built from each armature, keyed by (armature data pointer, only_deform_bones, check_for_exportation), so operators that
+    handle many files for the same armature build and validate it only once. Only valid skeletons are cached, and the cached SkeletonData must not be modified.
+    Entries are dropped when the depsgraph reports an update of their armature data, when the addon rewrites bone ids, and on file load, undo and redo.
+    """
+    
+    __entries: dict[tuple[int, bool, bool], tuple[tuple[str, str, int], SkeletonData]] = {}
+    
+    @staticmethod
+    def get(armature_object: bpy.types.Object, only_deform_bones: bool, check_for_exportation: bool, msg_handler: Utils.MessageHandler) -> Optional[SkeletonData]:
+        """
+        Same as SkeletonData.build_skeleton_from_armature, but returns the cached result when the armature didn't change since it was built.
+        """
+        armature_data: bpy.types.Armature = armature_object.data
+        key = (armature_data.as_pointer(), only_deform_bones, check_for_exportation)
+        # Guards against another armature reusing the memory of a removed one before any update was reported.
+        stamp = (armature_object.name, armature_data.name, len(armature_data.bones))
+        entry = SkeletonDataCache.__entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            msg_handler.debug_print(f"Using cached skeleton data of armature [{armature_object.name}]")
+            return entry[1]
+        
+        skeleton_data = SkeletonData.build_skeleton_from_armature(armature_object, only_deform_bones, check_for_exportation, msg_handler)
+        if skeleton_data is not None:
+            SkeletonDataCache.__entries[key] = (stamp, skeleton_data)
+        else:
+            SkeletonDataCache.__entries.pop(key, None)
+        return skeleton_data
+    
+    @staticmethod
+    def invalidate(armature_data: Optional[bpy.types.Armature] = None):
+        """
+        Drops the entries of the given armature data, or every entry if none is given.
+        """
+        if armature_data is None:
+            SkeletonDataCache.__entries.clear()
+            return
+        pointer = armature_data.as_pointer()
+        for key in [key for key in SkeletonDataCache.__entries if key[0] == pointer]:
+            del SkeletonDataCache.__entries[key]
+
+class ArmatureIndex:
+    """
+    Index of the armature objects of a scene by casefolded name and by bone count, so importers find their target armature without scanning every object.
+    It's rebuilt after the depsgraph reports a change of the scene, its collections or its armatures, and when the amount of objects in the scene changes.
+    """
+    
+    __indices: dict[int, "ArmatureIndex"] = {}
+    
+    def __init__(self, scene: bpy.types.Scene):
+        self.object_count = len(scene.objects)
+        self.armatures_by_name: dict[str, bpy.types.Object] = {}
+        self.armatures_by_bone_count: dict[int, list[bpy.types.Object]] = {}
+        for obj in scene.objects:
+            if obj.type == "ARMATURE":
+                self.armatures_by_name.setdefault(obj.name.casefold(), obj)
+                self.armatures_by_bone_count.setdefault(len(obj.data.bones), []).append(obj)
+    
+    @staticmethod
+    def get(scene: bpy.types.Scene) -> "ArmatureIndex":
+        key = scene.as_pointer()
+        index = ArmatureIndex.__indices.get(key)
+        if index is None or index.object_count != len(scene.objects):
+            index = ArmatureIndex(scene)
+            ArmatureIndex.__indices[key] = index
+        return index
+    
+    @staticmethod
+    def invalidate():
+        ArmatureIndex.__indices.clear()
+    
+    def find_by_name(self, name: str) -> Optional[bpy.types.Object]:
+        return self.armatures_by_name.get(name.casefold())
+    
+    def find_by_bone_count(self, bone_count: int) -> list[bpy.types.Object]:
+        return self.armatures_by_bone_count.get(bone_count, [])
+    
+    @staticmethod
+    def get_armature_fingerprint(armature_object: bpy.types.Object, msg_handler: Utils.MessageHandler) -> Optional[str]:
+        """
+        Returns the fingerprint stored on the armature when it was imported, or computes it from the armature if it has none
+        or if its bones were renamed, added, removed or reparented since.
+        """
+        armature_data: bpy.types.Armature = armature_object.data
+        fingerprint = armature_data.get(SKELETON_FINGERPRINT_PROPERTY)
+        if fingerprint is not None and armature_data.get(SKELETON_FINGERPRINT_BONES_PROPERTY) != get_bone_hierarchy_stamp(armature_data.bones):
+            fingerprint = None
+        if fingerprint is None:
+            skeleton_data = SkeletonDataCache.get(armature_object, False, False, Utils.MessageHandler(msg_handler.debug))
+            fingerprint = skeleton_data.get_fingerprint() if skeleton_data is not None else None
+        return fingerprint
+    
+    def find_by_fingerprint(self, bone_count: int, fingerprint: str, msg_handler: Utils.MessageHandler) -> list[bpy.types.Object]:
+        """
+        Returns the armatures with the given bone count whose fingerprint matches.
+        """
+        return [armature_object for armature_object in self.find_by_bone_count(bone_count) if ArmatureIndex.get_armature_fingerprint(armature_object, msg_handler) == fingerprint]
+
+@bpy.app.handlers.persistent
+def invalidate_skeleton_data_cache_on_update(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Armature):
+            SkeletonDataCache.invalidate(update.id.original)
+            ArmatureIndex.invalidate()
+        elif isinstance(update.id, (bpy.types.Scene, bpy.types.Collection)) or (isinstance(update.id, bpy.types.Object) and update.id.type == "ARMATURE"):
+            ArmatureIndex.invalidate()
+
+@bpy.app.handlers.persistent
+def invalidate_skeleton_data_cache(*args):
+    SkeletonDataCache.invalidate()
+    ArmatureIndex.invalidate()
+
+skeleton_data_cache_handlers = (
+    (bpy.app.handlers.depsgraph_update_post, invalidate_skeleton_data_cache_on_update),
+    (bpy.app.handlers.undo_post, invalidate_skeleton_data_cache),
+    (bpy.app.handlers.redo_post, invalidate_skeleton_data_cache),
+    (bpy.app.handlers.load_post, invalidate_skeleton_data_cache),
+)
+
+def register():
+    for handlers, handler in skeleton_data_cache_handlers:
+        if handler not in handlers:
+            handlers.append(handler)
+
+def unregister():
+    for handlers, handler in skeleton_data_cache_handlers:
+        if handler in handlers:
+            handlers.remove(handler)
+    SkeletonDataCache.invalidate()
+    ArmatureIndex.invalidate()
@@ -0,0 +1,235 @@
+"""
+Batched rigid transform math over NumPy arrays, used by the skeleton import and export paths instead of one mathutils object per bone.
+Positions are (N, 3) arrays, quaternions are (N, 4) arrays in (w, x, y, z) order like mathutils.Quaternion, and matrices are (N, 4, 4) row-major arrays.
+Parent ids are (N,) integer arrays where NO_PARENT (or any id out of range) marks a root bone.
+"""
+
+import numpy as np
+
+NO_PARENT = -1
+
+def get_parent_mask(parent_ids: np.ndarray) -> np.ndarray:
+    """
+    Returns a boolean mask of the bones that have a valid parent.
+    """
+    parent_ids = np.asarray(parent_ids)
+    return (parent_ids >= 0) & (parent_ids < len(parent_ids))
+
+def quaternion_conjugate(quaternions: np.ndarray) -> np.ndarray:
+    return np.asarray(quaternions) * np.array([1.0, -1.0, -1.0, -1.0], dtype=np.asarray(quaternions).dtype)
+
+def quaternion_multiply(quaternions_a: np.ndarray, quaternions_b: np.ndarray) -> np.ndarray:
+    """
+    Hamilton product a @ b of two broadcastable arrays of quaternions.
+    """
+    a_w, a_x, a_y, a_z = np.moveaxis(np.asarray(quaternions_a), -1, 0)
+    b_w, b_x, b_y, b_z = np.moveaxis(np.asarray(quaternions_b), -1, 0)
+    return np.stack((
+        a_w * b_w - a_x * b_x - a_y * b_y - a_z * b_z,
+        a_w * b_x + a_x * b_w + a_y * b_z - a_z * b_y,
+        a_w * b_y - a_x * b_z + a_y * b_w + a_z * b_x,
+        a_w * b_z + a_x * b_y - a_y * b_x + a_z * b_w,
+    ), axis=-1)
+
+def safe_quaternion_multiply(quaternions_a: np.ndarray, quaternions_b: np.ndarray) -> np.ndarray:
+    """
+    Same as Utils.safe_quaternion_multiply: each b is negated when its dot product with a is negative, so the product stays in the same hemisphere.
+    """
+    quaternions_a = np.asarray(quaternions_a)
+    quaternions_b = np.asarray(quaternions_b)
+    signs = np.where(np.sum(quaternions_a * quaternions_b, axis=-1) < 0.0, -1.0, 1.0)
+    return quaternion_multiply(quaternions_a, quaternions_b * signs[..., np.newaxis])
+
+def rotate_vectors(quaternions: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """
+    Rotates each vector by its (unit) quaternion, same as quaternion @ vector in mathutils.
+    """
+    quaternions = np.asarray(quaternions)
+    vectors = np.asarray(vectors)
+    q_w = quaternions[..., :1]
+    q_xyz = quaternions[..., 1:]
+    t = 2.0 * np.cross(q_xyz, vectors)
+    return vectors + q_w * t + np.cross(q_xyz, t)
+
+def quaternions_to_matrices(quaternions: np.ndarray) -> np.ndarray:
+    """
+    Converts (N, 4) quaternions to (N, 3, 3) rotation matrices. Quaternions are normalized first.
+    """
+    quaternions = np.asarray(quaternions, dtype=np.float64)
+    quaternions = quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    w, x, y, z = np.moveaxis(quaternions, -1, 0)
+    matrices = np.empty(quaternions.shape[:-1] + (3, 3))
+    matrices[..., 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    matrices[..., 0, 1] = 2.0 * (x * y - z * w)
+    matrices[..., 0, 2] = 2.0 * (x * z + y * w)
+    matrices[..., 1, 0] = 2.0 * (x * y + z * w)
+    matrices[..., 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    matrices[..., 1, 2] = 2.0 * (y * z - x * w)
+    matrices[..., 2, 0] = 2.0 * (x * z - y * w)
+    matrices[..., 2, 1] = 2.0 * (y * z + x * w)
+    matrices[..., 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    return matrices
+
+def matrices_to_quaternions(matrices: np.ndarray) -> np.ndarray:
+    """
+    Returns the rotations of (N, 3, 3) or (N, 4, 4) matrices as (N, 4) quaternions with a non-negative w, like Matrix.to_quaternion(). Scale is ignored.
+    """
+    rotations = np.asarray(matrices, dtype=np.float64)[..., :3, :3]
+    rotations = rotations / np.linalg.norm(rotations, axis=-2, keepdims=True)
+    m00, m11, m22 = rotations[..., 0, 0], rotations[..., 1, 1], rotations[..., 2, 2]
+    # Squared magnitudes of each component, the largest one is used as the divisor of the other three to stay numerically stable.
+    squares = np.stack((1.0 + m00 + m11 + m22, 1.0 + m00 - m11 - m22, 1.0 - m00 + m11 - m22, 1.0 - m00 - m11 + m22), axis=-1)
+    largest = np.argmax(squares, axis=-1)
+    diagonal = 0.5 * np.sqrt(np.maximum(np.take_along_axis(squares, largest[..., np.newaxis], axis=-1)[..., 0], 1e-12))
+    # Sums and differences of the off diagonal elements, each one is 4 times a product of two quaternion components.
+    w_x = rotations[..., 2, 1] - rotations[..., 1, 2]
+    w_y = rotations[..., 0, 2] - rotations[..., 2, 0]
+    w_z = rotations[..., 1, 0] - rotations[..., 0, 1]
+    x_y = rotations[..., 0, 1] + rotations[..., 1, 0]
+    x_z = rotations[..., 0, 2] + rotations[..., 2, 0]
+    y_z = rotations[..., 1, 2] + rotations[..., 2, 1]
+    candidates = np.stack((
+        np.stack((4.0 * diagonal * diagonal, w_x, w_y, w_z), axis=-1),
+        np.stack((w_x, 4.0 * diagonal * diagonal, x_y, x_z), axis=-1),
+        np.stack((w_y, x_y, 4.0 * diagonal * diagonal, y_z), axis=-1),
+        np.stack((w_z, x_z, y_z, 4.0 * diagonal * diagonal), axis=-1),
+    ), axis=-2)
+    quaternions = np.take_along_axis(candidates, largest[..., np.newaxis, np.newaxis], axis=-2)[..., 0, :] / (4.0 * diagonal[..., np.newaxis])
+    quaternions /= np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    return np.where(quaternions[..., :1] < 0.0, -quaternions, quaternions)
+
+def compose_matrices(positions: np.ndarray, quaternions: np.ndarray) -> np.ndarray:
+    """
+    Returns the (N, 4, 4) matrices Translation(position) @ rotation.to_matrix().to_4x4() of each bone.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    matrices = np.zeros(positions.shape[:-1] + (4, 4))
+    matrices[..., :3, :3] = quaternions_to_matrices(quaternions)
+    matrices[..., :3, 3] = positions
+    matrices[..., 3, 3] = 1.0
+    return matrices
+
+def invert_rigid_matrices(matrices: np.ndarray) -> np.ndarray:
+    """
+    Inverts (N, 4, 4) matrices made only of a rotation and a translation, using the transposed rotation instead of a general inverse.
+    """
+    matrices = np.asarray(matrices)
+    inverted = np.zeros_like(matrices)
+    rotations_transposed = np.swapaxes(matrices[..., :3, :3], -1, -2)
+    inverted[..., :3, :3] = rotations_transposed
+    inverted[..., :3, 3] = -np.einsum("...ij,...j->...i", rotations_transposed, matrices[..., :3, 3])
+    inverted[..., 3, 3] = 1.0
+    return inverted
+
+def get_local_matrices(world_matrices: np.ndarray, parent_ids: np.ndarray) -> np.ndarray:
+    """
+    Returns parent_world.inverted() @ world for every bone with a parent, and the world matrix itself for root bones.
+    """
+    world_matrices = np.asarray(world_matrices)
+    parent_ids = np.asarray(parent_ids)
+    has_parent = get_parent_mask(parent_ids)
+    local_matrices = world_matrices.copy()
+    local_matrices[has_parent] = invert_rigid_matrices(world_matrices[parent_ids[has_parent]]) @ world_matrices[has_parent]
+    return local_matrices
+
+def get_hierarchy_levels(parent_ids: np.ndarray) -> list[np.ndarray]:
+    """
+    Returns the ids of the bones at each depth of the hierarchy, root bones first. Bones in a parent cycle are left out.
+    """
+    parent_ids = np.asarray(parent_ids)
+    has_parent = get_parent_mask(parent_ids)
+    depths = np.where(has_parent, -1, 0)
+    levels = [np.flatnonzero(depths == 0)]
+    while len(levels[-1]) > 0:
+        # Children of the last level: bones whose parent depth was just assigned
+        level = np.flatnonzero(has_parent & (depths == -1) & np.isin(parent_ids, levels[-1]))
+        depths[level] = len(levels)
+        levels.append(level)
+    return levels[:-1]
+
+def compose_transforms(parent_positions: np.ndarray, parent_quaternions: np.ndarray, local_positions: np.ndarray, local_quaternions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batched Utils.get_world_position and Utils.get_world_rotation: the transforms of children given relative to their parents.
+    """
+    world_positions = np.asarray(parent_positions) + rotate_vectors(parent_quaternions, local_positions)
+    return world_positions, safe_quaternion_multiply(parent_quaternions, local_quaternions)
+
+def get_relative_transforms(parent_positions: np.ndarray, parent_quaternions: np.ndarray, world_positions: np.ndarray, world_quaternions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batched Utils.get_local_position and Utils.get_local_rotation: the transforms of children relative to their parents.
+    """
+    parent_conjugates = quaternion_conjugate(parent_quaternions)
+    local_positions = rotate_vectors(parent_conjugates, np.asarray(world_positions) - np.asarray(parent_positions))
+    return local_positions, safe_quaternion_multiply(parent_conjugates, world_quaternions)
+
+def forward_kinematics(local_positions: np.ndarray, local_quaternions: np.ndarray, parent_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Turns (..., N, 3) positions and (..., N, 4) quaternions relative to the parent of each bone into transforms relative to the armature,
+    for any amount of leading dimensions (frames) at once. The hierarchy is walked level by level, all the bones of a level in one step.
+    """
+    world_positions = np.array(local_positions, dtype=np.float64)
+    world_quaternions = np.array(local_quaternions, dtype=np.float64)
+    parent_ids = np.asarray(parent_ids)
+    for level in get_hierarchy_levels(parent_ids)[1:]:
+        parents = parent_ids[level]
+        world_positions[..., level, :], world_quaternions[..., level, :] = compose_transforms(world_positions[..., parents, :], world_quaternions[..., parents, :],
+                                                                                              world_positions[..., level, :], world_quaternions[..., level, :])
+    return world_positions, world_quaternions
+
+def inverse_kinematics(world_positions: np.ndarray, world_quaternions: np.ndarray, parent_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Inverse of forward_kinematics. Every local transform only depends on the transforms of the bone and its parent, so all bones are done in one step.
+    Root bones keep their transforms.
+    """
+    local_positions = np.array(world_positions, dtype=np.float64)
+    local_quaternions = np.array(world_quaternions, dtype=np.float64)
+    parent_ids = np.asarray(parent_ids)
+    has_parent = get_parent_mask(parent_ids)
+    parents = parent_ids[has_parent]
+    local_positions[..., has_parent, :], local_quaternions[..., has_parent, :] = get_relative_transforms(local_positions[..., parents, :], local_quaternions[..., parents, :],
+                                                                                                         local_positions[..., has_parent, :], local_quaternions[..., has_parent, :])
+    return local_positions, local_quaternions
+
+def get_bone_lengths(local_matrices: np.ndarray, parent_ids: np.ndarray, min_length: float) -> np.ndarray:
+    """
+    Returns the display length of every bone: the shortest distance to its children, the length of its parent for leaf bones, or 1 for lone root bones,
+    never shorter than min_length.
+    """
+    parent_ids = np.asarray(parent_ids)
+    has_parent = get_parent_mask(parent_ids)
+    child_distances = np.linalg.norm(np.asarray(local_matrices)[:, :3, 3], axis=-1)
+    min_child_distances = np.full(len(parent_ids), np.inf)
+    np.minimum.at(min_child_distances, parent_ids[has_parent], child_distances[has_parent])
+    has_children = np.isfinite(min_child_distances)
+
+    lengths = np.ones(len(parent_ids))
+    lengths[has_children] = np.maximum(min_child_distances[has_children], min_length)
+    # The parent of a leaf always has children, so its length is already final.
+    leaves_with_parent = has_parent & ~has_children
+    lengths[leaves_with_parent] = np.maximum(lengths[parent_ids[leaves_with_parent]], min_length)
+    return lengths
+
+def to_blender_matrix_buffer(matrices: np.ndarray) -> np.ndarray:
+    """
+    Flattens (N, 4, 4) row-major matrices in the column-major float32 layout used by foreach_set/foreach_get of matrix properties.
+    """
+    return np.ascontiguousarray(np.swapaxes(matrices, -1, -2), dtype=np.float32).ravel()
+
+def from_blender_matrix_buffer(buffer: np.ndarray) -> np.ndarray:
+    """
+    Inverse of to_blender_matrix_buffer.
+    """
+    return np.swapaxes(np.asarray(buffer, dtype=np.float64).reshape(-1, 4, 4), -1, -2)
+
+def unity_to_blender_vectors(vectors: np.ndarray) -> np.ndarray:
+    """
+    Converts (..., 3) Unity vectors to Blender coordinates, same as the Unity to Blender CoordinatesConverter.
+    """
+    return np.asarray(vectors, dtype=np.float64)[..., [0, 2, 1]]
+
+def unity_to_blender_quaternions(quaternions_xyzw: np.ndarray) -> np.ndarray:
+    """
+    Converts (..., 4) Unity quaternions in the (x, y, z, w) file order to (w, x, y, z) Blender quaternions, same as the Unity to Blender CoordinatesConverter.
+    """
+    quaternions_xyzw = np.asarray(quaternions_xyzw, dtype=np.float64)
+    return quaternions_xyzw[..., [3, 0, 2, 1]] * np.array([1.0, -1.0, -1.0, -1.0])
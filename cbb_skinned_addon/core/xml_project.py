@@ -0,0 +1,124 @@
+from pathlib import Path
+from typing import NamedTuple, Optional
+from utils import Utils
+from .asset_catalog import AssetCatalog
+from .project_index import split_texture_path
+from .xml_scanner import ModelReference, AnimationReference
+from .asset_probe import probe_assets
+
+class MeshEntry(NamedTuple):
+    # Field names match the properties of MeshProperties.
+    name: str
+    mesh_path: str
+    material_file_path: str = ""
+    material_name: str = ""
+    texture_folder: str = ""
+    texture_name: str = ""
+    # Header values, -1 until the file is probed
+    vertex_count: int = -1
+    triangle_count: int = -1
+
+class ClipEntry(NamedTuple):
+    # Field names match the properties of AnimationProperties.
+    name: str
+    animation_file_path: str
+    frame_count: int = -1
+    bone_count: int = -1
+
+class XmlProjectData(NamedTuple):
+    main_directory: str = ""
+    animation_xml_path: str = ""
+    animation_xml_name: str = ""
+    skeleton_file_name: str = ""
+    skeleton_bone_count: int = -1
+    meshes: list[MeshEntry] = []
+    clips: list[ClipEntry] = []
+
+def read_xml_project(msg_handler: Utils.MessageHandler, xml_path: str) -> XmlProjectData:
+    """
+    Reads the meshes, clips and skeleton referenced by a main .xml file (following its .material.xml, .texture.xml and .animation.xml files) as plain data.
+    It doesn't touch any Blender data, so it can run outside of the main thread.
+    """
+    if not Path(xml_path).exists():
+        raise FileNotFoundError(f"XML file not found: {xml_path}")
+    catalog = AssetCatalog.get()
+    main_directory = Path(xml_path).parent
+
+    models: Optional[list[ModelReference]] = catalog.get_xml_summary(msg_handler, xml_path, "source_models")
+    if models is None:
+        return XmlProjectData(main_directory=str(main_directory))
+
+    animation_xml_path = animation_xml_name = ""
+    animation_data = catalog.get_xml_summary(msg_handler, xml_path, "animation_value").split("|")
+    if len(animation_data) >= 2:
+        animation_xml_path = str(main_directory / animation_data[0])
+        animation_xml_name = animation_data[1]
+
+    meshes: list[MeshEntry] = []
+    mesh_indices_by_material: dict[str, dict[str, list[int]]] = {}
+    # Like the panel always did, the meshes are the items of type Model, wherever they are
+    for model in (model for model in models if model.item_type == "Model"):
+        mesh_material_data = model.material.split("|")
+        if len(mesh_material_data) >= 2:
+            material_path = str(main_directory / mesh_material_data[0])
+            mesh_indices_by_material.setdefault(material_path, {}).setdefault(mesh_material_data[1].casefold(), []).append(len(meshes))
+            meshes.append(MeshEntry(model.name, model.mesh, material_path, mesh_material_data[1]))
+        else:
+            meshes.append(MeshEntry(model.name, model.mesh))
+
+    for material_path, mesh_indices_by_material_name in mesh_indices_by_material.items():
+        if not Path(material_path).exists():
+            continue
+        diffuse_by_material = catalog.get_xml_summary(msg_handler, material_path, "material")
+        if diffuse_by_material is None:
+            continue
+
+        for material_name, mesh_indices in mesh_indices_by_material_name.items():
+            diffuse_value = diffuse_by_material.get(material_name)
+            if diffuse_value is None:
+                continue
+
+            texture_value = diffuse_value.split("|")
+            if len(texture_value) >= 2:
+                texture_xml_path = main_directory / texture_value[0]
+                source_by_texture = catalog.get_xml_summary(msg_handler, texture_xml_path, "texture") if texture_xml_path.exists() else None
+                diffuse_value = source_by_texture.get(texture_value[1].casefold()) if source_by_texture else None
+                if diffuse_value is None:
+                    continue
+
+            texture_folder, texture_name = split_texture_path(diffuse_value.lstrip("/"))
+            for mesh_index in mesh_indices:
+                meshes[mesh_index] = meshes[mesh_index]._replace(texture_folder=texture_folder, texture_name=texture_name)
+
+    skeleton_file_name = ""
+    clips: list[ClipEntry] = []
+    if animation_xml_path != "" and Path(animation_xml_path).exists():
+        animations: Optional[list[AnimationReference]] = catalog.get_xml_summary(msg_handler, animation_xml_path, "animation")
+        if animations:
+            animation = next((animation for animation in animations if animation.name == animation_xml_name), animations[0])
+            if animation.name == animation_xml_name:
+                skeleton_file_name = animation.skeleton
+            clips = [ClipEntry(clip_name, clip_file) for clip_name, clip_file in animation.clips]
+
+    return XmlProjectData(str(main_directory), animation_xml_path, animation_xml_name, skeleton_file_name, meshes=meshes, clips=clips)
+
+def probe_xml_project(msg_handler: Utils.MessageHandler, project_data: XmlProjectData) -> XmlProjectData:
+    """
+    Returns the project data with the header values of its mesh, clip and skeleton files, which are probed in parallel.
+    """
+    main_directory = Path(project_data.main_directory)
+    mesh_paths = [str(main_directory / mesh.mesh_path) for mesh in project_data.meshes]
+    clip_paths = [str(main_directory / clip.animation_file_path) for clip in project_data.clips]
+    skeleton_path = str(main_directory / project_data.skeleton_file_name) if project_data.skeleton_file_name != "" else None
+    headers = probe_assets(msg_handler, mesh_paths + clip_paths + ([skeleton_path] if skeleton_path is not None else []))
+
+    meshes = []
+    for mesh, mesh_path in zip(project_data.meshes, mesh_paths):
+        header = headers.get(mesh_path) or {}
+        meshes.append(mesh._replace(vertex_count=header.get("vertex_count", -1), triangle_count=header.get("triangle_count", -1)))
+    clips = []
+    for clip, clip_path in zip(project_data.clips, clip_paths):
+        header = headers.get(clip_path) or {}
+        clips.append(clip._replace(frame_count=header.get("frame_count", -1), bone_count=header.get("bone_count", -1)))
+    skeleton_header = (headers.get(skeleton_path) if skeleton_path is not None else None) or {}
+    return project_data._replace(skeleton_bone_count=skeleton_header.get("bone_count", -1), meshes=meshes, clips=clips)
@@ -0,0 +1,169 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+from utils import Utils
+
+class ModelReference(NamedTuple):
+    name: str
+    mesh: str
+    material: str
+    # type attribute of the item, the main .xml lists the items of type Model as its meshes
+    item_type: str = ""
+    # Whether the item is inside a Models element, where mesh lookups search for the meshes of a source file
+    in_models: bool = True
+
+class AnimationReference(NamedTuple):
+    name: str
+    skeleton: str
+    clips: list[tuple[str, str]]
+
+def iter_elements(file_path: str | Path, keep_subtrees_of: set[str] = frozenset()) -> Iterator[tuple[str, ET.Element, list[ET.Element]]]:
+    """
+    Streams the .xml file with ET.iterparse, yielding (event, element, stack of open elements) for every "start" and "end" event.
+    Once an "end" event has been consumed the element is cleared and detached from its parent, unless it is inside an element with a tag in keep_subtrees_of,
+    so the memory used doesn't grow with the size of the file. Closing the generator stops the parsing and closes the file.
+    """
+    stack: list[ET.Element] = []
+    keep_depth = 0
+    # Paths are casefolded the same way as in Utils.read_xml_file.
+    with open(str(file_path).casefold(), "rb") as opened_file:
+        for event, element in ET.iterparse(opened_file, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                if element.tag in keep_subtrees_of:
+                    keep_depth += 1
+                yield event, element, stack
+            else:
+                yield event, element, stack
+                stack.pop()
+                if element.tag in keep_subtrees_of:
+                    keep_depth -= 1
+                if keep_depth == 0:
+                    element.clear()
+                    if stack:
+                        stack[-1].remove(element)
+
+def iter_models(file_path: str | Path) -> Iterator[ModelReference]:
+    """
+    Yields the Name, Mesh and Material values of every item inside the Models element of a source .xml file and of every item of type Model
+    outside of it, in the order the items end.
+    """
+    models_depth = 0
+    for event, element, stack in iter_elements(file_path, {"item"}):
+        if element.tag == "Models":
+            models_depth += 1 if event == "start" else -1
+        elif event == "end" and element.tag == "item" and (models_depth > 0 or element.get("type") == "Model"):
+            name = mesh = material = ""
+            for item_child in element:
+                if item_child.tag == "Name" and name == "":
+                    name = item_child.get("value", "")
+                elif item_child.tag == "Mesh" and mesh == "":
+                    mesh = item_child.get("value", "").lstrip("/")
+                elif item_child.tag == "Material" and material == "":
+                    material = item_child.get("value", "").lstrip("/")
+            yield ModelReference(name, mesh, material, element.get("type", ""), models_depth > 0)
+
+def read_source_models(msg_handler: Utils.MessageHandler, file_path: str | Path) -> Optional[list[ModelReference]]:
+    try:
+        return list(iter_models(file_path))
+    except Exception as e:
+        msg_handler.report("ERROR", f"Error while trying to read source .xml file at [{file_path}]: {e}")
+    return None
+
+def find_model(msg_handler: Utils.MessageHandler, file_path: str | Path, mesh_file_name: str) -> Optional[ModelReference]:
+    """
+    Returns the first model inside the Models element of the source .xml file whose mesh is the given file, stopping the parsing as soon as it's found.
+    """
+    models = iter_models(file_path)
+    try:
+        for model in models:
+            if model.in_models and model.mesh.casefold() == mesh_file_name.casefold():
+                return model
+    except Exception as e:
+        msg_handler.report("ERROR", f"Error while trying to read source .xml file at [{file_path}]: {e}")
+    finally:
+        models.close()
+    return None
+
+def find_animation_value(msg_handler: Utils.MessageHandler, file_path: str | Path) -> str:
+    """
+    Returns the value of the first Animation element of a source .xml file, stopping the parsing as soon as it's found.
+    """
+    elements = iter_elements(file_path)
+    try:
+        for event, element, _ in elements:
+            if event == "start" and element.tag == "Animation":
+                return element.get("value", "").lstrip("/")
+    except Exception as e:
+        msg_handler.report("ERROR", f"Error while trying to read source .xml file at [{file_path}]: {e}")
+    finally:
+        elements.close()
+    return ""
+
+def read_material_xml_summary(msg_handler: Utils.MessageHandler, file_path: str | Path) -> Optional[dict[str, str]]:
+    """
+    Returns the diffuse_tex value of every material in a .material.xml file, keyed by the casefolded material name.
+    """
+    diffuse_by_material: dict[str, str] = {}
+    try:
+        for event, element, _ in iter_elements(file_path, {"material"}):
+            if event != "end" or element.tag != "material":
+                continue
+            material_name = element.get("name")
+            if material_name is None or material_name.casefold() in diffuse_by_material:
+                continue
+            for material_child in element:
+                if material_child.tag == "diffuse_tex" and material_child.get("value") is not None:
+                    diffuse_by_material[material_name.casefold()] = material_child.get("value").lstrip("/")
+                    break
+    except Exception as e:
+        msg_handler.report("ERROR", f"Error while trying to read .material.xml file at [{file_path}]: {e}")
+        return None
+    return diffuse_by_material
+
+def read_texture_xml_summary(msg_handler: Utils.MessageHandler, file_path: str | Path) -> Optional[dict[str, str]]:
+    """
+    Returns the source value of every texture in a .texture.xml file, keyed by the casefolded texture name.
+    """
+    source_by_texture: dict[str, str] = {}
+    try:
+        for event, element, _ in iter_elements(file_path, {"texture"}):
+            if event != "end" or element.tag != "texture":
+                continue
+            texture_name = element.get("name")
+            if texture_name is None or texture_name.casefold() in source_by_texture:
+                continue
+            for texture_child in element:
+                if texture_child.tag == "source" and texture_child.get("value") is not None:
+                    source_by_texture[texture_name.casefold()] = texture_child.get("value")
+                    break
+    except Exception as e:
+        msg_handler.report("ERROR", f"Error while trying to read .texture.xml file at [{file_path}]: {e}")
+        return None
+    return source_by_texture
+
+def read_animation_xml_summary(msg_handler: Utils.MessageHandler, file_path: str | Path) -> Optional[list[AnimationReference]]:
+    """
+    Returns the name, skeleton and (clip name, clip file) pairs of every animation element of an .animation.xml file.
+    """
+    animations: list[AnimationReference] = []
+    current_animation: Optional[AnimationReference] = None
+    try:
+        for event, element, _ in iter_elements(file_path, {"clip"}):
+            if element.tag == "animation":
+                if event == "start":
+                    current_animation = AnimationReference(element.get("name", ""), "", [])
+                else:
+                    animations.append(current_animation)
+                    current_animation = None
+            elif current_animation is None:
+                continue
+            elif event == "start" and element.tag == "skeleton" and current_animation.skeleton == "":
+                current_animation = current_animation._replace(skeleton=element.get("value", "").lstrip("/"))
+            elif event == "end" and element.tag == "clip":
+                file_element = element.find(".//file")
+                current_animation.clips.append((element.get("name", ""), file_element.get("value", "").lstrip("/") if file_element is not None else ""))
+    except Exception as e:
+        msg_handler.report("ERROR", f"Error while trying to read .animation.xml file at [{file_path}]: {e}")
+        return None
+    return animations
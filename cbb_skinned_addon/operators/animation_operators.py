@@ -2,18 +2,45 @@ import bpy
 import struct
 from bpy_extras.io_utils import ImportHelper, ExportHelper
 from bpy.types import Context, Event, Operator, ActionFCurves, FCurve, Action
-from bpy.props import CollectionProperty, StringProperty, BoolProperty
+from bpy.props import CollectionProperty, StringProperty, BoolProperty, FloatProperty, EnumProperty, IntProperty
 from bpy_extras.io_utils import ImportHelper
 import traceback
 from utils import Utils, CoordsSys
 import xml.etree.ElementTree as ET
-from ..core.skeleton_core import SkeletonData
+from ..core.skeleton_core import SkeletonData, SkeletonDataCache
 Serializer = Utils.Serializer
 CoordinatesConverter = Utils.CoordinatesConverter
 from pathlib import Path
-from ..core.animation_core import import_animation_from_files
+from typing import Optional
+from ..core.animation_core import import_animation_from_files, import_animations_as_nla_tracks, get_animation_target, SkinnedAnimData, AnimationWindow
+from ..core.animation_preview import AnimationPreview
+from ..core.prefetch import AssetPrefetcher
+from ..core.keyframe_math import ReductionTolerances
+from ..core import transform_math
+from mathutils import Vector, Quaternion
+import numpy as np
 from ..ui.ui_properties import LuniaProperties, AnimationProperties
 
+def get_frame_step(operator: Operator) -> float:
+    """
+    Source frames per imported frame for the resample options of an animation import operator.
+    """
+    if operator.resample_mode == "FRAME_RATE":
+        return operator.source_frame_rate / operator.target_frame_rate
+    if operator.resample_mode == "STRIDE":
+        return float(operator.frame_stride)
+    return 1.0
+
+def get_animation_window(operator: Operator) -> Optional[AnimationWindow]:
+    """
+    Frame range and bone mask of an animation import operator, None when the whole animation is imported.
+    """
+    frame_end = operator.frame_end if operator.frame_end >= 0 else None
+    bone_names = [bone_name.strip() for bone_name in operator.bone_names.split(",") if bone_name.strip()] or None
+    if operator.frame_start == 0 and frame_end is None and bone_names is None:
+        return None
+    return AnimationWindow(operator.frame_start, frame_end, bone_names)
+
 class CBB_OT_SkinnedAnimImporter(Operator, ImportHelper):
     bl_idname = "cbb.skinnedanim_import"
     bl_label = "Import SkinnedAnim"
@@ -42,10 +69,95 @@ class CBB_OT_SkinnedAnimImporter(Operator, ImportHelper):
         default=False
     ) # type: ignore
 
+    import_as_nla_tracks: BoolProperty(
+        name="Import as NLA tracks",
+        description="Decode all the animations in parallel and place each one on its own muted NLA track of the target armature, instead of making it the active action",
+        default=False
+    ) # type: ignore
+
+    reduce_keyframes: BoolProperty(
+        name="Reduce keyframes",
+        description="Key each animated channel only at the frames needed to reproduce the animation within the tolerances, instead of at every frame",
+        default=False
+    ) # type: ignore
+
+    position_tolerance: FloatProperty(
+        name="Position tolerance",
+        description="Maximum distance between the reduced and the original bone positions",
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype="DISTANCE"
+    ) # type: ignore
+
+    rotation_tolerance: FloatProperty(
+        name="Rotation tolerance",
+        description="Maximum angle between the reduced and the original bone rotations",
+        default=0.001745329,
+        min=0.0,
+        precision=3,
+        subtype="ANGLE"
+    ) # type: ignore
+
+    resample_mode: EnumProperty(
+        name="Resample",
+        description="Resample the animation to fewer (or more) frames before keying it",
+        items=[
+            ("NONE", "None", "Key every frame of the animation"),
+            ("FRAME_RATE", "Frame Rate", "Resample the animation from its source frame rate to the target frame rate"),
+            ("STRIDE", "Frame Stride", "Keep one frame every frame stride frames"),
+        ],
+        default="NONE"
+    ) # type: ignore
+
+    source_frame_rate: IntProperty(
+        name="Source frame rate",
+        description="Frame rate the animation was sampled at",
+        default=30,
+        min=1
+    ) # type: ignore
+
+    target_frame_rate: IntProperty(
+        name="Target frame rate",
+        description="Frame rate of the imported action",
+        default=15,
+        min=1
+    ) # type: ignore
+
+    frame_stride: IntProperty(
+        name="Frame stride",
+        description="Number of source frames per imported frame",
+        default=2,
+        min=1
+    ) # type: ignore
+
+    frame_start: IntProperty(
+        name="Frame start",
+        description="First frame of the animation to import, it becomes the first frame of the action",
+        default=0,
+        min=0
+    ) # type: ignore
+
+    frame_end: IntProperty(
+        name="Frame end",
+        description="Last frame of the animation to import, -1 for the last frame of the file",
+        default=-1,
+        min=-1
+    ) # type: ignore
+
+    bone_names: StringProperty(
+        name="Bone names",
+        description="Comma separated names of the bones to import, leave empty to import every bone",
+        default=""
+    ) # type: ignore
+
     def execute(self, context):
         return_value = {"CANCELLED"}
+        reduction_tolerances = ReductionTolerances(self.position_tolerance, self.rotation_tolerance) if self.reduce_keyframes else None
+        if self.import_as_nla_tracks:
+            return import_animations_as_nla_tracks(self.debug, [file.name for file in self.files], self.directory, self.apply_to_armature_in_selected, operator=self, reduction_tolerances=reduction_tolerances, frame_step=get_frame_step(self), window=get_animation_window(self))
         for file in self.files:
-            result = import_animation_from_files(self.debug, file.name, self.directory, self.apply_to_armature_in_selected, operator=self)
+            result = import_animation_from_files(self.debug, file.name, self.directory, self.apply_to_armature_in_selected, operator=self, reduction_tolerances=reduction_tolerances, frame_step=get_frame_step(self), window=get_animation_window(self))
             if result == {"FINISHED"}:
                 return_value = {"FINISHED"}
         return return_value
@@ -74,19 +186,199 @@ class CBB_OT_SkinnedAnimImporterLoaded(Operator):
         default=False
     ) # type: ignore
 
+    import_as_nla_tracks: BoolProperty(
+        name="Import as NLA tracks",
+        description="Decode all the animations in parallel and place each one on its own muted NLA track of the target armature, instead of making it the active action",
+        default=False
+    ) # type: ignore
+
+    reduce_keyframes: BoolProperty(
+        name="Reduce keyframes",
+        description="Key each animated channel only at the frames needed to reproduce the animation within the tolerances, instead of at every frame",
+        default=False
+    ) # type: ignore
+
+    position_tolerance: FloatProperty(
+        name="Position tolerance",
+        description="Maximum distance between the reduced and the original bone positions",
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype="DISTANCE"
+    ) # type: ignore
+
+    rotation_tolerance: FloatProperty(
+        name="Rotation tolerance",
+        description="Maximum angle between the reduced and the original bone rotations",
+        default=0.001745329,
+        min=0.0,
+        precision=3,
+        subtype="ANGLE"
+    ) # type: ignore
+
+    resample_mode: EnumProperty(
+        name="Resample",
+        description="Resample the animation to fewer (or more) frames before keying it",
+        items=[
+            ("NONE", "None", "Key every frame of the animation"),
+            ("FRAME_RATE", "Frame Rate", "Resample the animation from its source frame rate to the target frame rate"),
+            ("STRIDE", "Frame Stride", "Keep one frame every frame stride frames"),
+        ],
+        default="NONE"
+    ) # type: ignore
+
+    source_frame_rate: IntProperty(
+        name="Source frame rate",
+        description="Frame rate the animation was sampled at",
+        default=30,
+        min=1
+    ) # type: ignore
+
+    target_frame_rate: IntProperty(
+        name="Target frame rate",
+        description="Frame rate of the imported action",
+        default=15,
+        min=1
+    ) # type: ignore
+
+    frame_stride: IntProperty(
+        name="Frame stride",
+        description="Number of source frames per imported frame",
+        default=2,
+        min=1
+    ) # type: ignore
+
+    frame_start: IntProperty(
+        name="Frame start",
+        description="First frame of the animation to import, it becomes the first frame of the action",
+        default=0,
+        min=0
+    ) # type: ignore
+
+    frame_end: IntProperty(
+        name="Frame end",
+        description="Last frame of the animation to import, -1 for the last frame of the file",
+        default=-1,
+        min=-1
+    ) # type: ignore
+
+    bone_names: StringProperty(
+        name="Bone names",
+        description="Comma separated names of the bones to import, leave empty to import every bone",
+        default=""
+    ) # type: ignore
+
     def execute(self, context):
         props: LuniaProperties = context.scene.lunia_props
         
         return_value = {"CANCELLED"}
+        reduction_tolerances = ReductionTolerances(self.position_tolerance, self.rotation_tolerance) if self.reduce_keyframes else None
+        if self.import_as_nla_tracks:
+            file_names = [animation_data.animation_file_path for animation_data in props.animation_data if animation_data.selected]
+            return import_animations_as_nla_tracks(self.debug, file_names, props.main_directory, self.apply_to_armature_in_selected, str(Path(props.skeleton_file_name).stem), self, reduction_tolerances, get_frame_step(self), get_animation_window(self))
         for animation_data in props.animation_data:
             if animation_data.selected == False:
                 continue
-            result = import_animation_from_files(self.debug, animation_data.animation_file_path, props.main_directory, self.apply_to_armature_in_selected, str(Path(props.skeleton_file_name).stem), self)
+            result = import_animation_from_files(self.debug, animation_data.animation_file_path, props.main_directory, self.apply_to_armature_in_selected, str(Path(props.skeleton_file_name).stem), self, reduction_tolerances, get_frame_step(self), get_animation_window(self))
             if result == {"FINISHED"}:
                 return_value = {"FINISHED"}
                 
         return return_value
 
+class CBB_OT_SkinnedAnimPreviewStart(Operator):
+    bl_idname = "cbb.skinnedanim_preview_start"
+    bl_label = "Preview SkinnedAnim"
+    bl_description = "Play the active animation of the list on its armature without creating any keyframe"
+
+    apply_to_armature_in_selected: BoolProperty(
+        name="Apply to armature in selected",
+        description="Enabling this option will make the preview of the animation target any armature present between currently selected objects",
+        default=False
+    ) # type: ignore
+
+    debug: BoolProperty(
+        name="Debug import",
+        description="Enabling this option will make the importer print debug data to console",
+        default=False
+    ) # type: ignore
+
+    @classmethod
+    def poll(cls, context):
+        props: LuniaProperties = context.scene.lunia_props
+        return 0 <= props.active_animation_index < len(props.animation_data)
+
+    def execute(self, context):
+        props: LuniaProperties = context.scene.lunia_props
+        msg_handler = Utils.MessageHandler(self.debug, self.report)
+        animation_data: AnimationProperties = props.animation_data[props.active_animation_index]
+        filepath = Path(props.main_directory) / animation_data.animation_file_path
+        
+        target_armature, skeleton_data = get_animation_target(filepath, props.main_directory, self.apply_to_armature_in_selected, str(Path(props.skeleton_file_name).stem), msg_handler)
+        if target_armature is None:
+            return {"CANCELLED"}
+        
+        anim_data = AssetPrefetcher.get().peek(filepath) or SkinnedAnimData.read_skinnedanim_data(filepath, msg_handler)
+        if anim_data is None:
+            return {"CANCELLED"}
+        
+        if not AnimationPreview.start(target_armature, filepath.stem, anim_data, skeleton_data, msg_handler):
+            return {"CANCELLED"}
+        return {"FINISHED"}
+
+class CBB_OT_SkinnedAnimPreviewStop(Operator):
+    bl_idname = "cbb.skinnedanim_preview_stop"
+    bl_label = "Stop Preview"
+    bl_description = "Stop the animation preview and restore the armature's action and pose"
+
+    @classmethod
+    def poll(cls, context):
+        return AnimationPreview.is_active()
+
+    def execute(self, context):
+        AnimationPreview.stop()
+        return {"FINISHED"}
+
+class CBB_OT_SkinnedAnimPreviewBake(Operator):
+    bl_idname = "cbb.skinnedanim_preview_bake"
+    bl_label = "Keep Preview"
+    bl_description = "Stop the animation preview and key the previewed animation into a new action of the armature"
+    bl_options = {"UNDO"}
+
+    reduce_keyframes: BoolProperty(
+        name="Reduce keyframes",
+        description="Key each animated channel only at the frames needed to reproduce the animation within the tolerances, instead of at every frame",
+        default=False
+    ) # type: ignore
+
+    position_tolerance: FloatProperty(
+        name="Position tolerance",
+        description="Maximum distance between the reduced and the original bone positions",
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype="DISTANCE"
+    ) # type: ignore
+
+    rotation_tolerance: FloatProperty(
+        name="Rotation tolerance",
+        description="Maximum angle between the reduced and the original bone rotations",
+        default=0.001745329,
+        min=0.0,
+        precision=3,
+        subtype="ANGLE"
+    ) # type: ignore
+
+    @classmethod
+    def poll(cls, context):
+        return AnimationPreview.is_active()
+
+    def execute(self, context):
+        msg_handler = Utils.MessageHandler(False, self.report)
+        reduction_tolerances = ReductionTolerances(self.position_tolerance, self.rotation_tolerance) if self.reduce_keyframes else None
+        if AnimationPreview.bake(msg_handler, reduction_tolerances) is None:
+            return {"CANCELLED"}
+        return {"FINISHED"}
+
 class CBB_FH_ImportSkinnedAnim(bpy.types.FileHandler):
     bl_idname = "CBB_FH_skinnedanim_import"
     bl_label = "File handler for skinnedanim imports"
@@ -153,7 +445,7 @@ class CBB_OT_SkinnedAnimExporter(Operator, ExportHelper):
         msg_handler = Utils.MessageHandler(self.debug, self.report)
         
         for armature in armatures_for_exportation:
-            skeleton_data = SkeletonData.build_skeleton_from_armature(armature, self.only_deform_bones, True, msg_handler)
+            skeleton_data = SkeletonDataCache.get(armature, self.only_deform_bones, True, msg_handler)
             if not skeleton_data:
                 print(f"Validation failed for armature: {armature.name}. Skipping.")
                 continue
@@ -174,35 +466,39 @@ class CBB_OT_SkinnedAnimExporter(Operator, ExportHelper):
     def export_action(self: "CBB_OT_SkinnedAnimExporter", armature: bpy.types.Object, action: Action, directory: str, filename_ext: str, only_deform_bones: bool, msg_handler: Utils.MessageHandler):
         print(f"Exporting action {action.name} for armature {armature.name}")
         
-        old_active_object = bpy.context.view_layer.objects.active
-        old_active_selected = bpy.context.view_layer.objects.active.select_get()
-        old_selection = [obj for obj in bpy.context.selected_objects]
-        old_active_action = bpy.context.view_layer.objects.active.animation_data.action
-        
-        bpy.ops.object.select_all(action='DESELECT')
-        
-        bpy.context.view_layer.objects.active = armature
-        bpy.context.view_layer.objects.active.select_set(True)
-        bpy.context.view_layer.objects.active.animation_data.action = action
-        
-        old_armature_mode = bpy.context.view_layer.objects.active.mode
-        
-        bpy.ops.nla.bake(
-            frame_start=int(action.frame_range[0]),
-            frame_end=int(action.frame_range[1]),
-            only_selected=False,
-            visual_keying=True,
-            clear_constraints=False,
-            use_current_action=False,
-            bake_types={'POSE'}
-        )
-        
-        baked_action = armature.animation_data.action
-        
-        bpy.ops.object.mode_set(mode='POSE')
-        bpy.context.view_layer.update()
-        
-        
+        with Utils.SceneState(bpy.context):
+            CBB_OT_SkinnedAnimExporter.write_action(armature, action, directory, filename_ext, only_deform_bones, msg_handler)
+
+    @staticmethod
+    def write_action(armature: bpy.types.Object, action: Action, directory: str, filename_ext: str, only_deform_bones: bool, msg_handler: Utils.MessageHandler):
+        """
+        Bakes the action on the armature and writes the baked pose to a .SkinnedAnim file. The armature gets its active action back
+        and the baked action is removed even if the bake or the write fails.
+        """
+        animation_data = armature.animation_data or armature.animation_data_create()
+        old_active_action = animation_data.action
+        animation_data.action = action
+        try:
+            # The bake only needs the armature as the active and selected object, an override spares changing the scene selection
+            with bpy.context.temp_override(active_object=armature, object=armature, selected_objects=[armature], selected_editable_objects=[armature]):
+                bpy.ops.nla.bake(
+                    frame_start=int(action.frame_range[0]),
+                    frame_end=int(action.frame_range[1]),
+                    only_selected=False,
+                    visual_keying=True,
+                    clear_constraints=False,
+                    use_current_action=False,
+                    bake_types={'POSE'}
+                )
+            CBB_OT_SkinnedAnimExporter.write_baked_action(armature, action, animation_data.action, directory, filename_ext, only_deform_bones, msg_handler)
+        finally:
+            baked_action = animation_data.action
+            animation_data.action = old_active_action
+            if baked_action is not None and baked_action != action and baked_action != old_active_action:
+                bpy.data.actions.remove(baked_action, do_unlink=True)
+
+    @staticmethod
+    def write_baked_action(armature: bpy.types.Object, action: Action, baked_action: Action, directory: str, filename_ext: str, only_deform_bones: bool, msg_handler: Utils.MessageHandler):
         bones: list[bpy.types.Bone] = []
         if only_deform_bones:
             bones = sorted([bone for bone in armature.data.bones if bone.use_deform], key=lambda bone: bone["bone_id"])
@@ -227,7 +523,7 @@ class CBB_OT_SkinnedAnimExporter(Operator, ExportHelper):
         # +1 to include the last frame
         total_frames = int(last_frame+1 - initial_frame)
         
-        skeleton_data = SkeletonData.build_skeleton_from_armature(armature, only_deform_bones, True, msg_handler)
+        skeleton_data = SkeletonDataCache.get(armature, only_deform_bones, True, msg_handler)
         dynamic_position_bones: list[int] = []
         static_position_bones: list[int] = []
         dynamic_rotation_bones: list[int] = []
@@ -271,40 +567,37 @@ class CBB_OT_SkinnedAnimExporter(Operator, ExportHelper):
                 used_in_frames_rotations_flag.append(0)
         
 
-        fixed_positions_by_bone: list[bpy.types.Vector] = []
-        fixed_rotations_by_bone: list[bpy.types.Quaternion] = []
+        msg_handler.debug_print(f"Animation [{action.name}] frame range: {int(action.frame_range[0])} - {int(action.frame_range[1])}")
+        
+        frames = range(int(action.frame_range[0]), int(action.frame_range[1]+1))
+        # Pose transforms of every bone at every frame. Static bones are only read at the initial frame, into the first row.
+        pose_positions = np.zeros((max(len(frames), 1), animation_bone_amount, 3))
+        pose_rotations = np.zeros((max(len(frames), 1), animation_bone_amount, 4))
+        pose_rotations[..., 0] = 1.0
         
         for bone_id in static_position_bones:
-            pose_bone = pose_bones[bone_id]
-            pose_bone_position = Utils.get_pose_bone_location_at_frame_fcurves(baked_action, pose_bone.name, initial_frame)
-            correct_animated_position = Utils.get_world_position(skeleton_data.bone_local_positions[bone_id], skeleton_data.bone_local_rotations[bone_id], pose_bone_position)
-            fixed_positions_by_bone.append(correct_animated_position)
+            pose_positions[0, bone_id] = Utils.get_pose_bone_location_at_frame_fcurves(baked_action, pose_bones[bone_id].name, initial_frame)
         
         for bone_id in static_rotation_bones:
-            pose_bone = pose_bones[bone_id]
-            pose_bone_rotation = Utils.get_pose_bone_rotation_at_frame_fcurves(baked_action, pose_bone.name, initial_frame)
-            correct_animated_rotation = Utils.get_world_rotation(skeleton_data.bone_local_rotations[bone_id], pose_bone_rotation)
-            fixed_rotations_by_bone.append(correct_animated_rotation)
+            pose_rotations[0, bone_id] = Utils.get_pose_bone_rotation_at_frame_fcurves(baked_action, pose_bones[bone_id].name, initial_frame)
         
-        animated_positions_by_bone: list[bpy.types.Vector] = []
-        animated_rotations_by_bone: list[bpy.types.Quaternion] = []
-        
-        msg_handler.debug_print(f"Animation [{action.name}] frame range: {int(action.frame_range[0])} - {int(action.frame_range[1])}")
-        
-        for frame in range(int(action.frame_range[0]), int(action.frame_range[1]+1)):
+        for frame_index, frame in enumerate(frames):
             print(f"Assigning transforms for frame {frame}")
             
             for bone_id in dynamic_position_bones:
-                pose_bone = pose_bones[bone_id]
-                pose_bone_position = Utils.get_pose_bone_location_at_frame_fcurves(baked_action, pose_bone.name, frame)
-                correct_animated_position = Utils.get_world_position(skeleton_data.bone_local_positions[bone_id], skeleton_data.bone_local_rotations[bone_id], pose_bone_position)
-                animated_positions_by_bone.append(correct_animated_position)
+                pose_positions[frame_index, bone_id] = Utils.get_pose_bone_location_at_frame_fcurves(baked_action, pose_bones[bone_id].name, frame)
             
             for bone_id in dynamic_rotation_bones:
-                pose_bone = pose_bones[bone_id]
-                pose_bone_rotation = Utils.get_pose_bone_rotation_at_frame_fcurves(baked_action, pose_bone.name, frame)
-                correct_animated_rotation = Utils.get_world_rotation(skeleton_data.bone_local_rotations[bone_id], pose_bone_rotation)
-                animated_rotations_by_bone.append(correct_animated_rotation)
+                pose_rotations[frame_index, bone_id] = Utils.get_pose_bone_rotation_at_frame_fcurves(baked_action, pose_bones[bone_id].name, frame)
+        
+        # Pose transforms are relative to the local bind pose of each bone, the file stores them relative to the parent bone.
+        animated_positions, animated_rotations = transform_math.compose_transforms(skeleton_data.local_positions, skeleton_data.local_rotations, pose_positions, pose_rotations)
+        
+        fixed_positions_by_bone = [Vector(position) for position in animated_positions[0, static_position_bones]]
+        fixed_rotations_by_bone = [Quaternion(rotation) for rotation in animated_rotations[0, static_rotation_bones]]
+        # Frame by frame, the dynamic bones of each frame in order
+        animated_positions_by_bone = [Vector(position) for position in animated_positions[:len(frames), dynamic_position_bones].reshape(-1, 3)]
+        animated_rotations_by_bone = [Quaternion(rotation) for rotation in animated_rotations[:len(frames), dynamic_rotation_bones].reshape(-1, 4)]
         
         #debugger.print(f"Animation Data Collected:")
         #debugger.print(f"Animated Rotations By Bone:\n{animated_rotations_by_bone}")
@@ -435,20 +728,6 @@ class CBB_OT_SkinnedAnimExporter(Operator, ExportHelper):
             opened_file.seek(file_size_position)
             writer.write_uint(file_size - 12)
             opened_file.seek(0, 2)  # Go back to the end of the file
-        
-        bpy.context.view_layer.objects.active.animation_data.action = old_active_action
-        
-        bpy.data.actions.remove(baked_action, do_unlink=True)
-        
-        bpy.ops.object.mode_set(mode=old_armature_mode)
-        bpy.ops.object.select_all(action='DESELECT')
-        
-        
-        bpy.context.view_layer.objects.active = old_active_object
-        bpy.context.view_layer.objects.active.select_set(old_active_selected)
-        
-        for obj in old_selection:
-            obj.select_set(True)
 
 
 def menu_func_import(self, context):
@@ -462,6 +741,9 @@ classes = (
     CBB_FH_ImportSkinnedAnim,
     CBB_OT_SkinnedAnimExporter,
     CBB_OT_SkinnedAnimImporterLoaded,
+    CBB_OT_SkinnedAnimPreviewStart,
+    CBB_OT_SkinnedAnimPreviewStop,
+    CBB_OT_SkinnedAnimPreviewBake,
 )
 
 def register():
@@ -12,7 +12,7 @@ import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from ..core.mesh_core import import_skinnedmesh
-from ..core.skeleton_core import SkeletonData
+from ..core.skeleton_core import SkeletonData, SkeletonDataCache
 from ..ui.ui_properties import LuniaProperties
 
 class CBB_OT_SkinnedMeshImporter(Operator, ImportHelper):
@@ -178,7 +178,7 @@ class CBB_OT_SkinnedMeshExporter(Operator, ExportHelper):
                         self.report({"ERROR"}, f"Object [{mesh_object.name}] has no armature modifier. Aborting this exportation.")
                         return
                     
-                    skeleton_data = SkeletonData.build_skeleton_from_armature(mesh_armature, self.only_deform_bones, True, msg_handler)
+                    skeleton_data = SkeletonDataCache.get(mesh_armature, self.only_deform_bones, True, msg_handler)
                     if skeleton_data is None:
                         self.report({"ERROR"}, f"Armature [{mesh_armature.name}], target of [{mesh_object.name}], was found not valid. Aborting this exportation.")
                         return
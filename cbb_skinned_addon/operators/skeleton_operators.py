@@ -2,13 +2,13 @@ import bpy
 import traceback
 from bpy_extras.io_utils import ImportHelper, ExportHelper
 from bpy.types import Context, Event, Operator
-from bpy.props import CollectionProperty, StringProperty, BoolProperty
+from bpy.props import CollectionProperty, StringProperty, BoolProperty, EnumProperty
 from mathutils import Vector, Quaternion, Matrix
 from utils import Utils
 Serializer = Utils.Serializer
 CoordinatesConverter = Utils.CoordinatesConverter
 from pathlib import Path
-from ..core.skeleton_core import SkeletonData, import_skeleton
+from ..core.skeleton_core import SkeletonData, SkeletonDataCache, import_skeleton, import_skeletons, validate_armatures, validate_blend_file_armatures
 from ..ui.ui_properties import LuniaProperties
 
 
@@ -38,12 +38,7 @@ class CBB_OT_SkeletonImporter(Operator, ImportHelper):
     ) # type: ignore
 
     def execute(self, context):
-        return_value = {"CANCELLED"}
-        for file in self.files:
-            result = import_skeleton(self.debug, file.name, self.directory, operator=self)
-            if result == {"FINISHED"}:
-                return_value = {"FINISHED"}
-        return return_value
+        return import_skeletons(self.debug, [file.name for file in self.files], self.directory, operator=self)
 
     def invoke(self, context: Context, event: Event):
         if self.directory:
@@ -141,10 +136,11 @@ class CBB_OT_SkeletonExporter(Operator, ExportHelper):
                     
                 if self.reassign_missing_armature_ids:
                     rebuilding_result = Utils.rebuild_armature_bone_ids(self, armature_object, self.only_deform_bones, msg_handler)
+                    SkeletonDataCache.invalidate(armature_object.data)
                     if rebuilding_result == False:
                         return
                     
-                skeleton_data = SkeletonData.build_skeleton_from_armature(armature_object, self.only_deform_bones, True, msg_handler)
+                skeleton_data = SkeletonDataCache.get(armature_object, self.only_deform_bones, True, msg_handler)
                 
                 if skeleton_data is None:
                     return
@@ -165,7 +161,7 @@ class CBB_OT_SkeletonExporter(Operator, ExportHelper):
 class CBB_OT_ArmatureValidator(Operator):
     bl_idname = "cbb.armature_validator"
     bl_label = "Check If Armature Is Valid"
-    bl_description = "Validates if the currently active object is an armature and is valid"
+    bl_description = "Validates if the currently active object, every armature in the scene or every armature of a .blend file is valid"
     bl_options = {'REGISTER'}
 
     debug: BoolProperty(
@@ -186,18 +182,54 @@ class CBB_OT_ArmatureValidator(Operator):
         default=True
     ) # type: ignore
 
+    validation_scope: EnumProperty(
+        name="Armatures to validate",
+        description="Which armatures are validated",
+        items=(
+            ("ACTIVE", "Active object", "Validate the active object"),
+            ("SCENE", "Scene armatures", "Validate every armature in the scene"),
+            ("BLEND_FILE", ".blend file", "Validate every armature of a .blend file, without opening it"),
+        ),
+        default="ACTIVE"
+    ) # type: ignore
+    
+    blend_filepath: StringProperty(
+        name=".blend file",
+        description="File validated when the .blend file scope is chosen",
+        subtype="FILE_PATH"
+    ) # type: ignore
+
     def execute(self, context):
-        object = context.active_object
-        if object is not None:
-            if object.type == "ARMATURE":
-                msg_handler = Utils.MessageHandler(self.debug, self.report)
-                validation_skeleton_data = SkeletonData.build_skeleton_from_armature(object, self.only_deform_bones, self.check_for_exportation, msg_handler)
-                is_valid = True if validation_skeleton_data is not None else False
-                self.report({'INFO'}, f"[{context.active_object.name}] validation result: {is_valid}")
-                return {'FINISHED'}
-            else:
-                self.report({'INFO'}, f"[{context.active_object.name}] is not an armature, there is no validation to be made.")
-        return {'CANCELLED'}
+        msg_handler = Utils.MessageHandler(self.debug, self.report)
+        if self.validation_scope == "SCENE":
+            reports = validate_armatures(context.scene.objects, self.only_deform_bones, self.check_for_exportation, msg_handler)
+        elif self.validation_scope == "BLEND_FILE":
+            filepath = bpy.path.abspath(self.blend_filepath)
+            if not Path(filepath).is_file():
+                self.report({'ERROR'}, f"File [{filepath}] does not exist.")
+                return {'CANCELLED'}
+            try:
+                reports = validate_blend_file_armatures(filepath, self.only_deform_bones, self.check_for_exportation, msg_handler)
+            except Exception as e:
+                self.report({'ERROR'}, f"Failed to read armatures from [{filepath}]: {e}")
+                traceback.print_exc()
+                return {'CANCELLED'}
+        else:
+            object = context.active_object
+            if object is None:
+                return {'CANCELLED'}
+            if object.type != "ARMATURE":
+                self.report({'INFO'}, f"[{object.name}] is not an armature, there is no validation to be made.")
+                return {'CANCELLED'}
+            reports = validate_armatures([object], self.only_deform_bones, self.check_for_exportation, msg_handler)
+        
+        for report in reports:
+            for error in report.errors:
+                msg_handler.report("ERROR", error)
+            self.report({'INFO'}, f"[{report.armature_name}] validation result: {report.is_valid}")
+        if self.validation_scope != "ACTIVE":
+            self.report({'INFO'}, f"{sum(report.is_valid for report in reports)} of {len(reports)} armatures are valid.")
+        return {'FINISHED'}
     
     def invoke(self, context: Context, event: Event):
         return context.window_manager.invoke_props_dialog(self)
@@ -226,6 +258,7 @@ class CBB_OT_ArmatureBoneIDRebuilder(Operator):
             
             if context.active_object.type == "ARMATURE":
                 rebuild_result = Utils.rebuild_armature_bone_ids(self, context.active_object, self.only_deform_bones, debugger)
+                SkeletonDataCache.invalidate(context.active_object.data)
                 self.report({'INFO'}, f"[{context.active_object.name}] bone_id rebuilding result: {rebuild_result}")
                 return {'FINISHED'}
             else:
@@ -266,7 +299,7 @@ class CBB_OT_MeshWeightRetargeter(Operator):
             return {'CANCELLED'}
         armature = armatures[0]
         msg_handler = Utils.MessageHandler(self.debug, self.report)
-        skeleton_data = SkeletonData.build_skeleton_from_armature(armature, self.only_deform_bones, False, msg_handler)
+        skeleton_data = SkeletonDataCache.get(armature, self.only_deform_bones, False, msg_handler)
         if skeleton_data is None:
             self.report({"ERROR"}, f"Armature [{armature.name}] is not valid for retargeting.")
             return {'CANCELLED'}
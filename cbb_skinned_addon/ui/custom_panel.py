@@ -4,14 +4,42 @@ from bpy.types import UILayout
 import bpy_extras
 from bpy.props import CollectionProperty, StringProperty, PointerProperty, BoolProperty, IntProperty
 from pathlib import Path
-from ..core.mesh_core import import_skinnedmesh
+from ..core.mesh_core import import_skinnedmesh, SkinnedMeshData
+from ..core.animation_core import SkinnedAnimData
+from ..core.skeleton_core import SkeletonData
+from ..core.prefetch import AssetPrefetcher
 from ..operators.mesh_operators import CBB_OT_SkinnedMeshImportLoaded
 from ..operators.skeleton_operators import CBB_OT_SkeletonImportLoaded
-from ..operators.animation_operators import CBB_OT_SkinnedAnimImporterLoaded
-from .ui_properties import AnimationProperties, MeshProperties, LuniaProperties
+from ..operators.animation_operators import CBB_OT_SkinnedAnimImporterLoaded, CBB_OT_SkinnedAnimPreviewStart, CBB_OT_SkinnedAnimPreviewStop, CBB_OT_SkinnedAnimPreviewBake
+from ..core.animation_preview import AnimationPreview
+from .ui_properties import AnimationProperties, MeshProperties, LuniaProperties, PanelListState
+from ..core.asset_catalog import AssetCatalog
+from ..core.xml_project import XmlProjectData, read_xml_project, probe_xml_project
 from utils import Utils
+from collections import Counter
+from typing import Callable, Iterator, NamedTuple, Optional
+import threading
 import traceback
 
+def filter_list_items(ui_list: bpy.types.UIList, data: LuniaProperties, propname: str) -> tuple[list[int], list[int]]:
+    """
+    Shared filter_items of the Lunia lists, answering the name filter through the PanelListState name index instead of matching every item name.
+    The invert option is applied by Blender on the returned flags.
+    """
+    item_count = len(getattr(data, propname))
+    filter_flag = ui_list.bitflag_filter_item
+    if ui_list.filter_name:
+        flags = [0] * item_count
+        for index in PanelListState.get_name_index(data, propname).search(ui_list.filter_name):
+            flags[index] = filter_flag
+    else:
+        flags = [filter_flag] * item_count
+    
+    new_order = []
+    if ui_list.use_filter_sort_alpha:
+        new_order = bpy.types.UI_UL_list.sort_items_by_name(getattr(data, propname), "name")
+    return flags, new_order
+
 class LUNIA_OT_mesh_toggle_select(bpy.types.Operator):
     """Toggle selection of a mesh item"""
     bl_idname = "lunia.mesh_toggle_select"
@@ -24,24 +52,25 @@ class LUNIA_OT_mesh_toggle_select(bpy.types.Operator):
         if self.index < 0 or self.index >= len(props.mesh_data):
             return {'CANCELLED'}
         
-        mesh: MeshProperties = props.mesh_data[self.index]
-
+        # Only the clicked items and the ones in the selected set are touched, never the whole collection.
+        selected_indices = PanelListState.get_selected_indices(props, "mesh_data")
         if event.ctrl:
             # Control+Click: Toggle selection
-            mesh.selected = not mesh.selected
-            if mesh.selected:
+            selected = self.index not in selected_indices
+            PanelListState.set_selected(props, "mesh_data", self.index, selected)
+            if selected:
                 props.last_selected_mesh_index = self.index
         elif event.shift and props.last_selected_mesh_index != -1:
             # Shift+Click: Select range
             start = min(props.last_selected_mesh_index, self.index)
-            end = max(props.last_selected_mesh_index, self.index)
+            end = min(max(props.last_selected_mesh_index, self.index), len(props.mesh_data) - 1)
             for i in range(start, end + 1):
-                props.mesh_data[i].selected = True
+                PanelListState.set_selected(props, "mesh_data", i, True)
         else:
-            for i, item in enumerate(props.mesh_data):
-                if i != self.index:
-                    item.selected = False
-            mesh.selected = not mesh.selected
+            selected = self.index not in selected_indices
+            for i in [i for i in selected_indices if i != self.index]:
+                PanelListState.set_selected(props, "mesh_data", i, False)
+            PanelListState.set_selected(props, "mesh_data", self.index, selected)
             props.last_selected_mesh_index = self.index
 
         context.area.tag_redraw()
@@ -51,6 +80,11 @@ class LUNIA_UL_mesh_data(bpy.types.UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         row = layout.row(align=True)
         row.operator("lunia.mesh_toggle_select", text=item.name, emboss=True, depress=item.selected).index = index
+        if item.vertex_count >= 0:
+            row.label(text=f"{item.vertex_count} verts | {item.triangle_count} tris")
+
+    def filter_items(self, context, data, propname):
+        return filter_list_items(self, data, propname)
         
 class LUNIA_OT_anim_toggle_select(bpy.types.Operator):
     """Toggle selection of a mesh item"""
@@ -64,24 +98,25 @@ class LUNIA_OT_anim_toggle_select(bpy.types.Operator):
         if self.index < 0 or self.index >= len(props.animation_data):
             return {'CANCELLED'}
         
-        animation_data: AnimationProperties = props.animation_data[self.index]
-
+        # Only the clicked items and the ones in the selected set are touched, never the whole collection.
+        selected_indices = PanelListState.get_selected_indices(props, "animation_data")
         if event.ctrl:
             # Control+Click: Toggle selection
-            animation_data.selected = not animation_data.selected
-            if animation_data.selected:
+            selected = self.index not in selected_indices
+            PanelListState.set_selected(props, "animation_data", self.index, selected)
+            if selected:
                 props.last_selected_anim_index = self.index
         elif event.shift and props.last_selected_anim_index != -1:
             # Shift+Click: Select range
             start = min(props.last_selected_anim_index, self.index)
-            end = max(props.last_selected_anim_index, self.index)
+            end = min(max(props.last_selected_anim_index, self.index), len(props.animation_data) - 1)
             for i in range(start, end + 1):
-                props.animation_data[i].selected = True
+                PanelListState.set_selected(props, "animation_data", i, True)
         else:
-            for i, item in enumerate(props.animation_data):
-                if i != self.index:
-                    item.selected = False
-            animation_data.selected = not animation_data.selected
+            selected = self.index not in selected_indices
+            for i in [i for i in selected_indices if i != self.index]:
+                PanelListState.set_selected(props, "animation_data", i, False)
+            PanelListState.set_selected(props, "animation_data", self.index, selected)
             props.last_selected_anim_index = self.index
 
         context.area.tag_redraw()
@@ -91,6 +126,11 @@ class LUNIA_UL_anim_data(bpy.types.UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         row = layout.row(align=True)
         row.operator("lunia.anim_toggle_select", text=item.name, emboss=True, depress=item.selected).index = index
+        if item.frame_count >= 0:
+            row.label(text=f"{item.frame_count} frames | {item.bone_count} bones")
+
+    def filter_items(self, context, data, propname):
+        return filter_list_items(self, data, propname)
 
 class LUNIA_OT_select_xml_file(bpy.types.Operator, bpy_extras.io_utils.ImportHelper):
     bl_idname = "lunia.select_xml_file"
@@ -117,6 +157,12 @@ class VIEW3D_PT_lunia_tab(bpy.types.Panel):
         box = layout.box()
         box.label(text="XML File Selection", icon='FILE_FOLDER')
         box.operator("lunia.select_xml_file", text=scene.xml_file_path or "Select XML File")
+        if XmlProjectLoader.is_loading(scene):
+            box.label(text="Loading XML data...", icon='TIME')
+        row = box.row()
+        row.prop(props, "prefetch_assets")
+        if props.prefetch_assets:
+            row.prop(props, "prefetch_memory_budget")
         
         anim_header: UILayout
         anim_body: UILayout
@@ -128,6 +174,8 @@ class VIEW3D_PT_lunia_tab(bpy.types.Panel):
                 box = anim_body.box()
                 col = box.column(align=True)
                 col.label(text=f"Skeleton file: {props.skeleton_file_name}")
+                if props.skeleton_bone_count >= 0:
+                    col.label(text=f"Bone count: {props.skeleton_bone_count}")
                 if props.skeleton_file_name.casefold().endswith(".skeleton"):
                     box.prop(props, "skeleton_import_debug")
                     op = box.operator(CBB_OT_SkeletonImportLoaded.bl_idname, text="Import current skeleton", icon="PLUS")
@@ -147,12 +195,51 @@ class VIEW3D_PT_lunia_tab(bpy.types.Panel):
                     rows=5
                 )
                 
-                if any(animation.selected for animation in props.animation_data):
+                if props.selected_anim_count > 0:
                     box.prop(props, "apply_to_armature_anim")
                     box.prop(props, "animation_import_debug")
+                    box.prop(props, "import_animations_as_nla_tracks")
+                    box.prop(props, "reduce_animation_keyframes")
+                    if props.reduce_animation_keyframes:
+                        box.prop(props, "animation_position_tolerance")
+                        box.prop(props, "animation_rotation_tolerance")
+                    box.prop(props, "animation_resample_mode")
+                    if props.animation_resample_mode == "FRAME_RATE":
+                        box.prop(props, "animation_source_frame_rate")
+                        box.prop(props, "animation_target_frame_rate")
+                    elif props.animation_resample_mode == "STRIDE":
+                        box.prop(props, "animation_frame_stride")
+                    row = box.row(align=True)
+                    row.prop(props, "animation_frame_start")
+                    row.prop(props, "animation_frame_end")
+                    box.prop(props, "animation_bone_names")
                     op = box.operator(CBB_OT_SkinnedAnimImporterLoaded.bl_idname, text="Import Selected Animations", icon="PLUS")
                     op.apply_to_armature_in_selected = props.apply_to_armature_anim
                     op.debug = props.animation_import_debug
+                    op.import_as_nla_tracks = props.import_animations_as_nla_tracks
+                    op.reduce_keyframes = props.reduce_animation_keyframes
+                    op.position_tolerance = props.animation_position_tolerance
+                    op.rotation_tolerance = props.animation_rotation_tolerance
+                    op.resample_mode = props.animation_resample_mode
+                    op.source_frame_rate = props.animation_source_frame_rate
+                    op.target_frame_rate = props.animation_target_frame_rate
+                    op.frame_stride = props.animation_frame_stride
+                    op.frame_start = props.animation_frame_start
+                    op.frame_end = props.animation_frame_end
+                    op.bone_names = props.animation_bone_names
+                
+                if AnimationPreview.is_active():
+                    box.label(text=f"Previewing [{AnimationPreview.get_action_name()}] on [{AnimationPreview.get_armature_name()}]", icon="PLAY")
+                    row = box.row(align=True)
+                    op = row.operator(CBB_OT_SkinnedAnimPreviewBake.bl_idname, text="Keep as Action", icon="CHECKMARK")
+                    op.reduce_keyframes = props.reduce_animation_keyframes
+                    op.position_tolerance = props.animation_position_tolerance
+                    op.rotation_tolerance = props.animation_rotation_tolerance
+                    row.operator(CBB_OT_SkinnedAnimPreviewStop.bl_idname, text="Stop Preview", icon="CANCEL")
+                else:
+                    op = box.operator(CBB_OT_SkinnedAnimPreviewStart.bl_idname, text="Preview Active Animation", icon="PLAY")
+                    op.apply_to_armature_in_selected = props.apply_to_armature_anim
+                    op.debug = props.animation_import_debug
         
         mesh_header: UILayout
         mesh_body: UILayout
@@ -172,7 +259,7 @@ class VIEW3D_PT_lunia_tab(bpy.types.Panel):
                 rows=5
             )
             
-            if any(mesh.selected for mesh in props.mesh_data):
+            if props.selected_mesh_count > 0:
                 box.prop(props, "apply_to_armature_mesh")
                 box.prop(props, "mesh_import_debug")
                 box.prop(props, "only_deform_bones")
@@ -182,6 +269,16 @@ class VIEW3D_PT_lunia_tab(bpy.types.Panel):
                 op.only_deform_bones = props.only_deform_bones
 
         layout.prop(props, "show_debug_info")
+        if props.show_debug_info:
+            box = layout.box()
+            box.label(text="Debug Information", icon='INFO')
+            xml_cache_stats = Utils.get_xml_cache_stats()
+            col = box.column(align=True)
+            col.label(text=f"XML cache entries: {xml_cache_stats['entries']}/{xml_cache_stats['max_entries']}")
+            col.label(text=f"XML cache hits: {xml_cache_stats['hits']} | misses: {xml_cache_stats['misses']}")
+            prefetch_stats = AssetPrefetcher.get().get_stats()
+            col.label(text=f"Prefetched assets: {prefetch_stats['entries']} | {prefetch_stats['used_memory'] // (1024 * 1024)}/{prefetch_stats['memory_budget'] // (1024 * 1024)} MB")
+            col.label(text=f"Prefetch hits: {prefetch_stats['hits']} | misses: {prefetch_stats['misses']}")
         """
         if props.show_debug_info:
             box = layout.box()
@@ -191,146 +288,234 @@ class VIEW3D_PT_lunia_tab(bpy.types.Panel):
                 col.label(text=f"Mesh: {mesh_data.path}")
                 col.label(text=f"Material: {mesh_data.material}")"""
 
-def parse_xml_file(scene: bpy.types.Scene, context):
-    """Parse the XML file and update the addon's properties"""
-    
-    props: LuniaProperties = scene.lunia_props
-    
-    # Clear existing data
-    props.mesh_data.clear()
-    props.animation_data.clear()
-    props.animation_xml_path = ""
-    props.animation_xml_name = ""
-    
-    xml_path = scene.xml_file_path
-    if not xml_path or not xml_path.endswith('.xml'):
-        return
-    
-    msg_handler = Utils.MessageHandler(False)
-    
-    try:
-        # Main file parse
-        if not Path(xml_path).exists():
-            raise FileNotFoundError(f"XML file not found: {xml_path}")
-        props.main_directory = str(Path(xml_path).parent)
-        main_directory = Path(props.main_directory)
-        
-        root = Utils.read_xml_file(msg_handler, xml_path, f"Failed to read main xml file.")
-        
-        if root is None:
+def start_asset_prefetch(props: LuniaProperties):
+    """
+    Starts decoding the files of the loaded .xml in the background, in the order they're usually imported: the skeleton, then the meshes and clips in list order.
+    """
+    main_directory = Path(props.main_directory)
+    jobs = []
+    if props.skeleton_file_name.casefold().endswith(".skeleton"):
+        jobs.append((main_directory / props.skeleton_file_name, SkeletonData.read_skeleton_data, AssetPrefetcher.NUMPY_ARRAYS_SIZE_FACTOR))
+    jobs.extend((main_directory / mesh.mesh_path, SkinnedMeshData.read_skinnedmesh_data, AssetPrefetcher.PYTHON_OBJECTS_SIZE_FACTOR)
+                for mesh in props.mesh_data if mesh.mesh_path != "")
+    jobs.extend((main_directory / animation.animation_file_path, SkinnedAnimData.read_skinnedanim_data, AssetPrefetcher.NUMPY_ARRAYS_SIZE_FACTOR)
+                for animation in props.animation_data if animation.animation_file_path != "")
+    AssetPrefetcher.get().start(jobs, props.prefetch_memory_budget * 1024 * 1024)
+
+class XmlProjectLoader:
+    """
+    Loads the main .xml file selected in the panel without blocking the UI. The files are read on a worker thread into plain XmlProjectData,
+    which is then applied to the LuniaProperties of the scene in chunks from a bpy.app.timers callback.
+    Existing list entries are matched by name and path, so entries that didn't change keep their values and selection instead of being rebuilt.
+    Every load gets a new generation number per scene, and results of older generations are dropped.
+    """
+
+    CHUNK_SIZE = 256
+    POLL_INTERVAL = 0.05
+
+    __generations: dict[str, int] = {}
+    __results: dict[tuple[str, int], XmlProjectData] = {}
+    __results_lock = threading.Lock()
+    __timers: set[Callable] = set()
+
+    @staticmethod
+    def start(scene: bpy.types.Scene):
+        generation = XmlProjectLoader.__generations.get(scene.name, 0) + 1
+        XmlProjectLoader.__generations[scene.name] = generation
+
+        xml_path = scene.xml_file_path
+        if not xml_path or not xml_path.endswith('.xml'):
+            XmlProjectLoader.__clear(scene.lunia_props)
+            XmlProjectLoader.__generations.pop(scene.name, None)
             return
+
+        # The catalog is opened here because it needs bpy on its first use, which is only safe from the main thread.
+        AssetCatalog.get()
+        threading.Thread(target=XmlProjectLoader.__read, args=(scene.name, generation, xml_path), daemon=True).start()
+
+        timer = XmlProjectLoader.__create_timer(scene.name, generation)
+        XmlProjectLoader.__timers.add(timer)
+        bpy.app.timers.register(timer, first_interval=XmlProjectLoader.POLL_INTERVAL)
+
+    @staticmethod
+    def is_loading(scene: bpy.types.Scene) -> bool:
+        return scene.name in XmlProjectLoader.__generations
+
+    @staticmethod
+    def cancel_all():
+        XmlProjectLoader.__generations.clear()
+        for timer in XmlProjectLoader.__timers:
+            if bpy.app.timers.is_registered(timer):
+                bpy.app.timers.unregister(timer)
+        XmlProjectLoader.__timers.clear()
+        with XmlProjectLoader.__results_lock:
+            XmlProjectLoader.__results.clear()
+
+    @staticmethod
+    def __read(scene_name: str, generation: int, xml_path: str):
+        msg_handler = Utils.MessageHandler(False)
+        try:
+            project_data = probe_xml_project(msg_handler, read_xml_project(msg_handler, xml_path))
+        except Exception as e:
+            print(f"Error parsing XML: {e}")
+            traceback.print_exc()
+            project_data = XmlProjectData()
+        with XmlProjectLoader.__results_lock:
+            XmlProjectLoader.__results[(scene_name, generation)] = project_data
+
+    @staticmethod
+    def __create_timer(scene_name: str, generation: int) -> Callable:
+        steps = None
+
+        def timer():
+            nonlocal steps
+            if XmlProjectLoader.__generations.get(scene_name) != generation:
+                with XmlProjectLoader.__results_lock:
+                    XmlProjectLoader.__results.pop((scene_name, generation), None)
+                XmlProjectLoader.__timers.discard(timer)
+                return None
+
+            if steps is None:
+                with XmlProjectLoader.__results_lock:
+                    project_data = XmlProjectLoader.__results.pop((scene_name, generation), None)
+                if project_data is None:
+                    return XmlProjectLoader.POLL_INTERVAL
+                steps = XmlProjectLoader.__apply(scene_name, project_data)
+
+            try:
+                next(steps)
+                # Items may have moved, so the selected sets and name indices of the lists are rebuilt on their next use.
+                PanelListState.invalidate(scene_name)
+                XmlProjectLoader.__tag_redraw()
+                return 0.0
+            except StopIteration:
+                pass
+            except Exception as e:
+                print(f"Error applying XML data: {e}")
+                traceback.print_exc()
+
+            XmlProjectLoader.__generations.pop(scene_name, None)
+            XmlProjectLoader.__timers.discard(timer)
+            PanelListState.invalidate(scene_name)
+            XmlProjectLoader.__tag_redraw()
+            return None
+
+        return timer
+
+    @staticmethod
+    def __get_props(scene_name: str) -> Optional[LuniaProperties]:
+        # Blender data can be reallocated between timer calls (undo, file changes), so it's looked up again by name after every chunk.
+        scene = bpy.data.scenes.get(scene_name)
+        return scene.lunia_props if scene is not None else None
+
+    @staticmethod
+    def __clear(props: LuniaProperties):
+        props.mesh_data.clear()
+        props.animation_data.clear()
+        props.animation_xml_path = ""
+        props.animation_xml_name = ""
+        props.skeleton_file_name = ""
+        props.skeleton_bone_count = -1
+        props.last_selected_mesh_index = -1
+        props.last_selected_anim_index = -1
+        props.selected_mesh_count = 0
+        props.selected_anim_count = 0
+        PanelListState.invalidate(props.id_data.name)
+
+    @staticmethod
+    def __apply(scene_name: str, project_data: XmlProjectData) -> Iterator[None]:
+        props = XmlProjectLoader.__get_props(scene_name)
+        if props is None:
+            return
+        for field in ("main_directory", "animation_xml_path", "animation_xml_name", "skeleton_file_name", "skeleton_bone_count"):
+            if getattr(props, field) != getattr(project_data, field):
+                setattr(props, field, getattr(project_data, field))
+
+        yield from XmlProjectLoader.__sync_collection(scene_name, "mesh_data", project_data.meshes, lambda item: (item.name, item.mesh_path))
+        yield from XmlProjectLoader.__sync_collection(scene_name, "animation_data", project_data.clips, lambda item: (item.name, item.animation_file_path))
+
+        props = XmlProjectLoader.__get_props(scene_name)
+        if props is None:
+            return
+        if props.last_selected_mesh_index >= len(props.mesh_data):
+            props.last_selected_mesh_index = -1
+        if props.last_selected_anim_index >= len(props.animation_data):
+            props.last_selected_anim_index = -1
+        PanelListState.invalidate(scene_name)
+        PanelListState.get_selected_indices(props, "mesh_data")
+        PanelListState.get_selected_indices(props, "animation_data")
         
-        print(f"Loaded root")
-        
-        animation_elem = root.find(".//Animation")
-        if animation_elem is not None:
-            animation_value = animation_elem.get("value", "")
-            if animation_value:
-                animation_data = animation_value.lstrip("/").split("|")
-                if len(animation_data) >= 2:
-                    props.animation_xml_path = str(main_directory / animation_data[0])
-                    props.animation_xml_name = animation_data[1]
-        
-        material_xml_file_names = set()
-        mesh_data_index_by_material_name = {}
-        # Mesh parsing
-        for item in root.findall('.//item'):
-            if item.get("type") == "Model":
-                mesh_index = len(props.mesh_data)
-                mesh_data: MeshProperties = props.mesh_data.add()
-                
-                name_elem = item.find(".//Name")
-                mesh_data.name = name_elem.get("value", "") if name_elem is not None else ""
-                
-                mesh_path = item.find(".//Mesh")
-                mesh_material = item.find(".//Material")
-                
-                mesh_data.mesh_path = mesh_path.get("value", "").lstrip("/") if mesh_path is not None else ""
-                
-                mesh_material_value = mesh_material.get("value", "") if mesh_material is not None else None
-                if mesh_material_value:
-                    mesh_material_data = mesh_material_value.lstrip("/").split("|")
-                    if len(mesh_material_data) >= 2:
-                        material_path = str(main_directory / mesh_material_data[0])
-                        material_xml_file_names.add(material_path)
-                        mesh_data.material_file_path = material_path
-                        mesh_data.material_name = mesh_material_data[1]
-                        mesh_data_index_by_material_name[mesh_material_data[1]] = mesh_index
-        
-        
-        texture_xml_file_names = set()
-        mesh_data_index_by_texture_name: dict[str, int] = {}
-        
-        # Material parsing
-        for material_xml_file_name in material_xml_file_names:
-            if material_xml_file_name != "" and Path(material_xml_file_name).exists():
-                root = Utils.read_xml_file(msg_handler, material_xml_file_name, f"Failed to read material xml file.")
-                if root is None:
-                    continue
-                
-                for material in root.findall('.//material'):
-                    material_name = material.get("name")
-                    if material_name is None or material_name not in mesh_data_index_by_material_name.keys():
-                        continue
-                    
-                    current_mesh_data: MeshProperties = props.mesh_data[mesh_data_index_by_material_name[material_name]]
-                    
-                    texture_element = material.find(".//diffuse_tex")
-                    texture_value = texture_element.get("value", "").lstrip("/").split("|") if texture_element is not None else ""
-                    if len(texture_value) < 2:
-                        texture_path = Path(texture_value[0])
-                        current_mesh_data.texture_folder = str(texture_path.parent)
-                        current_mesh_data.texture_name = str(texture_path.stem)
-                    else:
-                        texture_xml_file_names.add(texture_value[0])
-                        mesh_data_index_by_texture_name[texture_value[1]] = mesh_data_index_by_material_name[material_name]
-        
-        
-        # Texture parsing (if any)
-        for texture_xml_file_name in texture_xml_file_names:
-            if texture_xml_file_name != "" and Path(texture_xml_file_name).exists():
-                root = Utils.read_xml_file(msg_handler, texture_xml_file_name, f"Failed to read texture xml file.")
-                if root is None:
-                    continue
-                for texture in root.findall('.//texture'):
-                    texture_name = texture.get("name")
-                    if texture_name is None:
-                        continue
-                    
-                    if texture_name not in mesh_data_index_by_texture_name.keys():
-                        continue
-                    
-                    current_mesh_data: MeshProperties = props.mesh_data[mesh_data_index_by_texture_name[texture_name]]
-                    
-                    texture_element = material.find(".//source")
-                    texture_value = texture_element.get("value", "").lstrip("/")
-                    texture_path = Path(texture_value[0])
-                    current_mesh_data.texture_folder = str(texture_path.parent)
-                    current_mesh_data.texture_name = str(texture_path.stem)
-        
-             
-        # Animation parsing
-        if props.animation_xml_path != "" and Path(props.animation_xml_path).exists():
-            root = Utils.read_xml_file(msg_handler, props.animation_xml_path, f"Failed to read animation xml file.")
-            if root is None:
-                return
-            animation_elem = root.find(".//animation")
-            if animation_elem is not None and animation_elem.get("name") is not None and animation_elem.get("name") == props.animation_xml_name:
-                props.skeleton_file_name = animation_elem.find(".//skeleton").get("value", "").lstrip("/") if animation_elem.find(".//skeleton") is not None else ""
-            
-            for clip in animation_elem.findall('.//clip'):
-                anim_data: AnimationProperties = props.animation_data.add()
-                
-                anim_data.name = clip.get("name", "")
-                
-                anim_file = clip.find(".//file")
-                anim_data.animation_file_path = anim_file.get("value", "").lstrip("/") if anim_file is not None else ""
-        
-        
-    except Exception as e:
-        print(f"Error parsing XML: {e}")
-        traceback.print_exc()
-        
+        if props.prefetch_assets:
+            start_asset_prefetch(props)
+
+    @staticmethod
+    def __sync_collection(scene_name: str, collection_name: str, entries: list[NamedTuple], get_key: Callable) -> Iterator[None]:
+        """
+        Makes the collection match the entries in order, yielding after every chunk of changes. Items are matched to entries by get_key,
+        items without an entry are removed, matched items are moved into place and only the fields that differ are written.
+        """
+        props = XmlProjectLoader.__get_props(scene_name)
+        if props is None:
+            return
+        collection = getattr(props, collection_name)
+        entry_keys = [get_key(entry) for entry in entries]
+
+        missing_count_by_key = Counter(entry_keys)
+        stale_indices = []
+        for index, item in enumerate(collection):
+            key = get_key(item)
+            if missing_count_by_key[key] > 0:
+                missing_count_by_key[key] -= 1
+            else:
+                stale_indices.append(index)
+        # Keys of the items that are kept and not yet in their final place
+        unplaced_count_by_key = Counter(entry_keys) - missing_count_by_key
+
+        for removed_count, index in enumerate(reversed(stale_indices), 1):
+            collection.remove(index)
+            if removed_count % XmlProjectLoader.CHUNK_SIZE == 0:
+                yield
+                props = XmlProjectLoader.__get_props(scene_name)
+                if props is None:
+                    return
+                collection = getattr(props, collection_name)
+
+        for index, (key, entry) in enumerate(zip(entry_keys, entries)):
+            if index > 0 and index % XmlProjectLoader.CHUNK_SIZE == 0:
+                yield
+                props = XmlProjectLoader.__get_props(scene_name)
+                if props is None:
+                    return
+                collection = getattr(props, collection_name)
+
+            if index < len(collection) and unplaced_count_by_key[key] > 0 and get_key(collection[index]) == key:
+                unplaced_count_by_key[key] -= 1
+            elif unplaced_count_by_key[key] > 0:
+                item_index = next(item_index for item_index in range(index + 1, len(collection)) if get_key(collection[item_index]) == key)
+                collection.move(item_index, index)
+                unplaced_count_by_key[key] -= 1
+            else:
+                collection.add()
+                collection.move(len(collection) - 1, index)
+
+            item = collection[index]
+            for field, value in zip(entry._fields, entry):
+                if getattr(item, field) != value:
+                    setattr(item, field, value)
+
+    @staticmethod
+    def __tag_redraw():
+        window_manager = bpy.context.window_manager
+        if window_manager is None:
+            return
+        for window in window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == "VIEW_3D":
+                    area.tag_redraw()
+
+def parse_xml_file(scene: bpy.types.Scene, context):
+    """Parse the XML file and update the addon's properties"""
+    XmlProjectLoader.start(scene)
 
 classes = (
     VIEW3D_PT_lunia_tab,
@@ -358,8 +543,13 @@ def unregister():
         if hasattr(bpy.types.Scene, prop):
             delattr(bpy.types.Scene, prop)
     
+    XmlProjectLoader.cancel_all()
+    AssetPrefetcher.get().stop()
+    
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
+    
+    AssetCatalog.close()
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
@@ -1,5 +1,7 @@
-from bpy.props import CollectionProperty, StringProperty, PointerProperty, BoolProperty, IntProperty
+from bpy.props import CollectionProperty, StringProperty, PointerProperty, BoolProperty, IntProperty, FloatProperty, EnumProperty
 import bpy
+import fnmatch
+from ..core.prefetch import AssetPrefetcher
 from typing import Any, List, Optional, Union, Iterator, TYPE_CHECKING, TypeAlias
 
 class MeshProperties(bpy.types.PropertyGroup):
@@ -33,6 +35,16 @@ class MeshProperties(bpy.types.PropertyGroup):
         description="Whether this mesh is selected",
         default=False
     )  # type: ignore
+    vertex_count: IntProperty(
+        name="Vertex Count",
+        description="Vertex count from the mesh file header (-1 if unknown)",
+        default=-1
+    )  # type: ignore
+    triangle_count: IntProperty(
+        name="Triangle Count",
+        description="Triangle count from the mesh file header (-1 if unknown)",
+        default=-1
+    )  # type: ignore
     
 class AnimationProperties(bpy.types.PropertyGroup):
     """Properties for each mesh extracted from XML"""
@@ -49,6 +61,20 @@ class AnimationProperties(bpy.types.PropertyGroup):
         description="Whether this clip is selected",
         default=False
     )  # type: ignore
+    frame_count: IntProperty(
+        name="Frame Count",
+        description="Frame count from the animation file header (-1 if unknown)",
+        default=-1
+    )  # type: ignore
+    bone_count: IntProperty(
+        name="Bone Count",
+        description="Bone count from the animation file header (-1 if unknown)",
+        default=-1
+    )  # type: ignore
+
+def update_prefetch_assets(props: "LuniaProperties", context):
+    if not props.prefetch_assets:
+        AssetPrefetcher.get().stop()
 
 class LuniaProperties(bpy.types.PropertyGroup):
     """Lunia-specific properties container"""
@@ -69,6 +95,11 @@ class LuniaProperties(bpy.types.PropertyGroup):
         name="Skeleton File Path",
         description="Path to the skeleton relative to the current animation data"
     ) # type: ignore
+    skeleton_bone_count: IntProperty(
+        name="Skeleton Bone Count",
+        description="Bone count from the skeleton file header (-1 if unknown)",
+        default=-1
+    ) # type: ignore
     
     animation_data: CollectionProperty(
         type=AnimationProperties,
@@ -78,6 +109,18 @@ class LuniaProperties(bpy.types.PropertyGroup):
         type=MeshProperties,
         description="Collection of mesh data from XML"
     )  # type: ignore
+    prefetch_assets: BoolProperty(
+        name="Prefetch Assets",
+        description="Decode the skeleton, meshes and animations of the selected XML in the background, so importing them is faster",
+        default=True,
+        update=update_prefetch_assets
+    )  # type: ignore
+    prefetch_memory_budget: IntProperty(
+        name="Budget (MB)",
+        description="Maximum estimated memory used by the prefetched assets",
+        default=512,
+        min=16
+    )  # type: ignore
     show_debug_info: BoolProperty(
         name="Show Debug Info",
         description="Display additional debugging information",
@@ -110,6 +153,77 @@ class LuniaProperties(bpy.types.PropertyGroup):
         description="Enable debug output during import",
         default=False
     ) # type: ignore
+    import_animations_as_nla_tracks: BoolProperty(
+        name="Import as NLA Tracks",
+        description="Decode the animations in parallel and place each one on its own muted NLA track, instead of making it the active action",
+        default=False
+    ) # type: ignore
+    reduce_animation_keyframes: BoolProperty(
+        name="Reduce Keyframes",
+        description="Key each animated channel only at the frames needed to reproduce the animation within the tolerances",
+        default=False
+    ) # type: ignore
+    animation_position_tolerance: FloatProperty(
+        name="Position Tolerance",
+        description="Maximum distance between the reduced and the original bone positions",
+        default=0.0005,
+        min=0.0,
+        precision=5,
+        subtype="DISTANCE"
+    ) # type: ignore
+    animation_rotation_tolerance: FloatProperty(
+        name="Rotation Tolerance",
+        description="Maximum angle between the reduced and the original bone rotations",
+        default=0.001745329,
+        min=0.0,
+        precision=3,
+        subtype="ANGLE"
+    ) # type: ignore
+    animation_resample_mode: EnumProperty(
+        name="Resample",
+        description="Resample the animations to fewer (or more) frames before keying them",
+        items=[
+            ("NONE", "None", "Key every frame of the animations"),
+            ("FRAME_RATE", "Frame Rate", "Resample the animations from their source frame rate to the target frame rate"),
+            ("STRIDE", "Frame Stride", "Keep one frame every frame stride frames"),
+        ],
+        default="NONE"
+    ) # type: ignore
+    animation_source_frame_rate: IntProperty(
+        name="Source Frame Rate",
+        description="Frame rate the animations were sampled at",
+        default=30,
+        min=1
+    ) # type: ignore
+    animation_target_frame_rate: IntProperty(
+        name="Target Frame Rate",
+        description="Frame rate of the imported actions",
+        default=15,
+        min=1
+    ) # type: ignore
+    animation_frame_stride: IntProperty(
+        name="Frame Stride",
+        description="Number of source frames per imported frame",
+        default=2,
+        min=1
+    ) # type: ignore
+    animation_frame_start: IntProperty(
+        name="Frame Start",
+        description="First frame of the animations to import, it becomes the first frame of the actions",
+        default=0,
+        min=0
+    ) # type: ignore
+    animation_frame_end: IntProperty(
+        name="Frame End",
+        description="Last frame of the animations to import, -1 for the last frame of each file",
+        default=-1,
+        min=-1
+    ) # type: ignore
+    animation_bone_names: StringProperty(
+        name="Bone Names",
+        description="Comma separated names of the bones to import, leave empty to import every bone",
+        default=""
+    ) # type: ignore
     only_deform_bones: BoolProperty(
         name="Only Deform Bones",
         description="Consider only deform bones during import",
@@ -129,6 +243,19 @@ class LuniaProperties(bpy.types.PropertyGroup):
         options={'HIDDEN'}
     )  # type: ignore
     
+    selected_mesh_count: IntProperty(
+        name="Selected Mesh Count",
+        description="Number of selected meshes in the list",
+        default=0,
+        options={'HIDDEN'}
+    )  # type: ignore
+    selected_anim_count: IntProperty(
+        name="Selected Anim Count",
+        description="Number of selected animations in the list",
+        default=0,
+        options={'HIDDEN'}
+    )  # type: ignore
+    
     active_mesh_index: IntProperty(
         name="Active Mesh Index",
         description="Index of the active mesh in the list (for template_list)",
@@ -140,6 +267,101 @@ class LuniaProperties(bpy.types.PropertyGroup):
         default=-1
     )  # type: ignore
     
+class PanelListState:
+    """
+    Python side state of the lists of LuniaProperties, so the panel doesn't have to walk whole collections on redraws and clicks:
+    the indices of the selected items of each list (their count is kept in the selected_*_count properties) and a name index for the list search.
+    The state of a scene is dropped whenever the lists may have changed behind it (list reload, undo, file load) and rebuilt from the collections on the next use.
+    """
+
+    selected_count_property_by_list = {
+        "mesh_data": "selected_mesh_count",
+        "animation_data": "selected_anim_count",
+    }
+
+    __selected_indices: dict[tuple[str, str], set[int]] = {}
+    __name_indices: dict[tuple[str, str], "PanelListState.NameIndex"] = {}
+
+    class NameIndex:
+        """
+        Search index of the item names of a list, matching like Blender's default filter_name: case insensitive, anywhere in the name, with fnmatch wildcards.
+        Queries of at least 3 characters without wildcards are answered with the intersection of the trigram sets of the query and then checked as substrings,
+        shorter queries and queries with wildcards are matched against every name.
+        """
+        WILDCARDS = "*?["
+
+        def __init__(self, names: list[str]):
+            self.names = [name.casefold() for name in names]
+            self.indices_by_trigram: dict[str, set[int]] = {}
+            for index, name in enumerate(self.names):
+                for start in range(len(name) - 2):
+                    self.indices_by_trigram.setdefault(name[start:start + 3], set()).add(index)
+
+        def search(self, query: str) -> set[int]:
+            query = query.casefold()
+            if query == "":
+                return set(range(len(self.names)))
+            if any(wildcard in query for wildcard in PanelListState.NameIndex.WILDCARDS):
+                pattern = f"*{query}*"
+                return {index for index, name in enumerate(self.names) if fnmatch.fnmatchcase(name, pattern)}
+            if len(query) < 3:
+                return {index for index, name in enumerate(self.names) if query in name}
+
+            trigram_sets = sorted((self.indices_by_trigram.get(query[start:start + 3], set()) for start in range(len(query) - 2)), key=len)
+            candidates = set.intersection(*trigram_sets)
+            return {index for index in candidates if query in self.names[index]}
+
+    @staticmethod
+    def get_selected_indices(props: "LuniaProperties", list_name: str) -> set[int]:
+        key = (props.id_data.name, list_name)
+        selected_indices = PanelListState.__selected_indices.get(key)
+        if selected_indices is None or len(selected_indices) != getattr(props, PanelListState.selected_count_property_by_list[list_name]):
+            selected_indices = {index for index, item in enumerate(getattr(props, list_name)) if item.selected}
+            setattr(props, PanelListState.selected_count_property_by_list[list_name], len(selected_indices))
+            PanelListState.__selected_indices[key] = selected_indices
+        return selected_indices
+
+    @staticmethod
+    def set_selected(props: "LuniaProperties", list_name: str, index: int, selected: bool):
+        selected_indices = PanelListState.get_selected_indices(props, list_name)
+        item = getattr(props, list_name)[index]
+        if item.selected != selected:
+            item.selected = selected
+        if selected:
+            selected_indices.add(index)
+        else:
+            selected_indices.discard(index)
+        setattr(props, PanelListState.selected_count_property_by_list[list_name], len(selected_indices))
+
+    @staticmethod
+    def get_name_index(props: "LuniaProperties", list_name: str) -> "PanelListState.NameIndex":
+        key = (props.id_data.name, list_name)
+        collection = getattr(props, list_name)
+        name_index = PanelListState.__name_indices.get(key)
+        if name_index is None or len(name_index.names) != len(collection):
+            name_index = PanelListState.NameIndex([item.name for item in collection])
+            PanelListState.__name_indices[key] = name_index
+        return name_index
+
+    @staticmethod
+    def invalidate(scene_name: Optional[str] = None):
+        """
+        Drops the state of the given scene, or of every scene if no name is given.
+        """
+        for state in (PanelListState.__selected_indices, PanelListState.__name_indices):
+            for key in [key for key in state if scene_name is None or key[0] == scene_name]:
+                del state[key]
+
+@bpy.app.handlers.persistent
+def invalidate_panel_list_state(*args):
+    PanelListState.invalidate()
+
+panel_list_state_handlers = (
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+    bpy.app.handlers.load_post,
+)
+
 classes = (
 MeshProperties,
 AnimationProperties,
@@ -149,8 +371,17 @@ LuniaProperties,
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    
+    for handlers in panel_list_state_handlers:
+        if invalidate_panel_list_state not in handlers:
+            handlers.append(invalidate_panel_list_state)
 
 def unregister():
+    for handlers in panel_list_state_handlers:
+        if invalidate_panel_list_state in handlers:
+            handlers.remove(invalidate_panel_list_state)
+    PanelListState.invalidate()
+    
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
 
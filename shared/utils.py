@@ -18,6 +18,7 @@ from collections import OrderedDict
 from bpy.props import CollectionProperty, StringProperty, BoolProperty
 from enum import Enum
 import io
+import threading
 from typing import NamedTuple, Optional
 from pathlib import Path
 
@@ -609,6 +610,13 @@ class Utils(Operator):
                 
             return ''.join(result)
         
+        @staticmethod
+        def decode_fixed_string(data: bytes, encoding: str) -> str:
+            """
+            Same as read_fixed_string, but for bytes already in memory: the string ends at the first null character and undecodable bytes are skipped.
+            """
+            return data.decode(encoding, errors="ignore").partition('\x00')[0]
+
         def write_fixed_string(self, length_in_bytes: int, encoding: str, string: str):
             self.file.write(string.encode(encoding).ljust(length_in_bytes, b'\x00'))
         
@@ -650,8 +658,71 @@ class Utils(Operator):
                 self.report_function({severity}, message)
             else:
                 print(f"{severity}: {message}")
-        
-    
+
+    class SceneState:
+        """
+        Context manager that saves the active object, its mode and the selection of a view layer, and restores them on exit.
+        State changes go through the data API instead of operators: only the objects whose selection differs are touched,
+        and the mode is only switched when the object is not already in it.
+        """
+        def __init__(self, context: Context):
+            self.context = context
+            self.view_layer = context.view_layer
+
+        def __enter__(self) -> Utils.SceneState:
+            self.active_object: Optional[bpy.types.Object] = self.view_layer.objects.active
+            self.active_mode = self.active_object.mode if self.active_object is not None else "OBJECT"
+            self.selection: list[bpy.types.Object] = list(self.view_layer.objects.selected)
+            return self
+
+        def __exit__(self, exc_type, exc_value, exc_traceback):
+            active_object = self.view_layer.objects.active
+            if active_object is not None and active_object != self.active_object:
+                Utils.set_object_mode(self.context, active_object, "OBJECT")
+
+            objects = self.view_layer.objects
+            if self.active_object is not None and self.active_object.name in objects:
+                objects.active = self.active_object
+            Utils.select_objects(self.view_layer, [obj for obj in self.selection if obj.name in objects])
+
+            if objects.active is not None and objects.active == self.active_object:
+                Utils.set_object_mode(self.context, self.active_object, self.active_mode)
+            return False
+
+        def activate(self, objects: list[bpy.types.Object], mode: str = "OBJECT"):
+            """
+            Makes the given objects the selection with the first one active, and switches them to the given mode.
+            """
+            active_object = self.view_layer.objects.active
+            if active_object is not None and active_object not in objects:
+                Utils.set_object_mode(self.context, active_object, "OBJECT")
+            Utils.select_objects(self.view_layer, objects)
+            self.view_layer.objects.active = objects[0]
+            Utils.set_object_mode(self.context, objects[0], mode)
+
+    @staticmethod
+    def select_objects(view_layer: bpy.types.ViewLayer, objects: list[bpy.types.Object]):
+        """
+        Makes the given objects the selection of the view layer, only changing the objects whose selection state differs.
+        """
+        for obj in list(view_layer.objects.selected):
+            if obj not in objects:
+                obj.select_set(False, view_layer=view_layer)
+        for obj in objects:
+            if not obj.select_get(view_layer=view_layer):
+                obj.select_set(True, view_layer=view_layer)
+
+    @staticmethod
+    def set_object_mode(context: Context, obj: bpy.types.Object, mode: str):
+        """
+        Switches the object to the given mode. Does nothing if it's already in it, otherwise runs the operator on the object through a context override.
+        Every selected object of the same type follows it, as with the regular mode switch.
+        """
+        if obj is None or obj.mode == mode:
+            return
+        with context.temp_override(active_object=obj, object=obj):
+            bpy.ops.object.mode_set(mode=mode)
+
     # -----------------------------------GENERAL--------------------------------------------------------------
     
     def get_immediate_parent_collection(obj):
@@ -720,17 +791,73 @@ class Utils(Operator):
 
         return True
     
+    class XmlCache:
+        """
+        Bounded LRU cache of parsed .xml roots, keyed by the resolved path, modification time and size of the file, so a file is only parsed again after it changes.
+        The cached roots are shared between callers and must not be modified.
+        """
+        def __init__(self, max_entries: int = 64):
+            self.max_entries = max_entries
+            self.hits = 0
+            self.misses = 0
+            self.__roots: OrderedDict[tuple[str, int, int], ET.Element] = OrderedDict()
+            self.__key_by_path: dict[str, tuple[str, int, int]] = {}
+            self.__lock = threading.Lock()
+
+        def get_root(self, file_path: str) -> ET.Element:
+            file_stat = os.stat(file_path)
+            resolved_path = os.path.realpath(file_path)
+            key = (resolved_path, file_stat.st_mtime_ns, file_stat.st_size)
+            with self.__lock:
+                root = self.__roots.get(key)
+                if root is not None:
+                    self.__roots.move_to_end(key)
+                    self.hits += 1
+                    return root
+                self.misses += 1
+
+            root = ET.parse(file_path).getroot()
+
+            with self.__lock:
+                old_key = self.__key_by_path.get(resolved_path)
+                if old_key is not None and old_key != key:
+                    self.__roots.pop(old_key, None)
+                self.__roots[key] = root
+                self.__key_by_path[resolved_path] = key
+                while len(self.__roots) > self.max_entries:
+                    evicted_key, _ = self.__roots.popitem(last=False)
+                    if self.__key_by_path.get(evicted_key[0]) == evicted_key:
+                        del self.__key_by_path[evicted_key[0]]
+            return root
+
+        def clear(self):
+            with self.__lock:
+                self.__roots.clear()
+                self.__key_by_path.clear()
+                self.hits = 0
+                self.misses = 0
+
+        def get_stats(self) -> dict[str, int]:
+            with self.__lock:
+                return {"hits": self.hits, "misses": self.misses, "entries": len(self.__roots), "max_entries": self.max_entries}
+
+    xml_cache = XmlCache()
+
     @staticmethod
     def read_xml_file(msg_handler: Utils.MessageHandler, file_path: str | Path, exception_string: str) -> ET.Element:
+        """
+        Returns the root of the .xml file, parsing it only if it isn't cached or has changed since it was cached. The returned root is shared and must not be modified.
+        """
         file_path = str(file_path)
         try:
-            tree = ET.parse(str(file_path).casefold())
-            root: ET.Element = tree.getroot()
-            return root
+            return Utils.xml_cache.get_root(str(file_path).casefold())
         except Exception as e:
             msg_handler.report('ERROR', f"{exception_string}: {e}")
         return
     
+    @staticmethod
+    def get_xml_cache_stats() -> dict[str, int]:
+        return Utils.xml_cache.get_stats()
 
     @staticmethod
     def debug_print(should_print, debug_string):
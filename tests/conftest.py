@@ -0,0 +1,90 @@
+import importlib.util
+import struct
+import sys
+import numpy as np
+import pytest
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+CORE_DIR = REPO_DIR / "cbb_skinned_addon" / "core"
+
+for path in (REPO_DIR, REPO_DIR / "shared"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+def load_core_module(module_name: str):
+    """
+    Loads a module of cbb_skinned_addon/core that only depends on NumPy straight from its file, without importing the addon package and bpy.
+    """
+    spec = importlib.util.spec_from_file_location(f"core_{module_name}", CORE_DIR / f"{module_name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def write_skinnedanim(file_path, frame_positions, frame_rotations):
+    """
+    Writes a .SkinnedAnim file where every bone is animated, from (F, N, 3) positions and (F, N, 4) XYZW rotations in the coordinates of the file.
+    """
+    frame_positions = np.asarray(frame_positions, dtype="<f4")
+    frame_rotations = np.asarray(frame_rotations, dtype="<f4")
+    frame_count, bone_count = frame_positions.shape[:2]
+    data = bytearray(124)
+
+    def write_field(value: int):
+        data.extend(bytes(8))
+        data.extend(struct.pack("<I", value))
+
+    def write_block(values: np.ndarray):
+        block = values.tobytes()
+        data.extend(bytes(4))
+        data.extend(struct.pack("<I", len(block)))
+        data.extend(block)
+
+    write_field(bone_count)
+    write_field(frame_count)
+    data.extend(bytes(8))
+    data.extend(struct.pack("<?", False))
+    for value_count in (bone_count, bone_count, 0, 0):
+        write_field(value_count)
+    for block in (frame_rotations, frame_positions, np.zeros(0, "<f4"), np.zeros(0, "<f4")):
+        write_block(block)
+    data.extend(bytes(8))
+    for _ in range(bone_count):
+        data.extend(bytes((0, 0xF0, 0, 0xF0)))
+    Path(file_path).write_bytes(bytes(data))
+
+class ReportCollector:
+    """
+    Stands in for the operator the core import functions report through.
+    """
+    def __init__(self):
+        self.reports: list[tuple[set[str], str]] = []
+
+    def report(self, report_type: set[str], message: str):
+        self.reports.append((report_type, message))
+
+@pytest.fixture
+def hero_armature(tmp_path):
+    """
+    Empty scene holding the armature of a three bone chain skeleton "hero", imported from a .Skeleton file written in tmp_path.
+    """
+    bpy = pytest.importorskip("bpy")
+    from mathutils import Vector
+    from utils import Utils
+    from cbb_skinned_addon.core.skeleton_core import SkeletonData, SkeletonDataCache, ArmatureIndex, import_skeleton
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    SkeletonDataCache.invalidate()
+    ArmatureIndex.invalidate()
+
+    skeleton_data = SkeletonData(3)
+    skeleton_data.bone_names = ["Base", "Spine", "Head"]
+    skeleton_data.bone_parent_ids[1] = 0
+    skeleton_data.bone_parent_ids[2] = 1
+    skeleton_data.bone_absolute_positions[1] = Vector((0.0, 0.0, 1.0))
+    skeleton_data.bone_absolute_positions[2] = Vector((0.0, 0.0, 2.0))
+    skeleton_data.update_local_transforms()
+    SkeletonData.write_skeleton_data(tmp_path / "hero.Skeleton", skeleton_data, Utils.MessageHandler(False))
+
+    assert import_skeleton(False, "hero.Skeleton", str(tmp_path), ReportCollector()) == {"FINISHED"}
+    return bpy.data.objects["hero"]
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+from conftest import ReportCollector, write_skinnedanim
+from cbb_skinned_addon.core.animation_core import import_animations_as_nla_tracks
+
+FRAME_COUNT = 5
+
+def write_clip(file_path, seed: int):
+    positions = np.random.default_rng(seed).normal(scale=0.1, size=(FRAME_COUNT, 3, 3))
+    rotations = np.tile([0.0, 0.0, 0.0, 1.0], (FRAME_COUNT, 3, 1))
+    write_skinnedanim(file_path, positions, rotations)
+
+def test_batch_import_places_clips_on_muted_tracks(hero_armature, tmp_path):
+    write_clip(tmp_path / "walk.SkinnedAnim", 0)
+    write_clip(tmp_path / "run.SkinnedAnim", 1)
+
+    result = import_animations_as_nla_tracks(False, ["walk.SkinnedAnim", "run.SkinnedAnim"], str(tmp_path), False, "hero", ReportCollector())
+
+    assert result == {"FINISHED"}
+    animation_data = hero_armature.animation_data
+    assert [(track.name, track.mute) for track in animation_data.nla_tracks] == [("walk", True), ("run", True)]
+    assert animation_data.action is None
+
+def test_batch_import_keeps_hand_posed_bones(hero_armature, tmp_path):
+    write_clip(tmp_path / "walk.SkinnedAnim", 0)
+    assert import_animations_as_nla_tracks(False, ["walk.SkinnedAnim"], str(tmp_path), False, "hero", ReportCollector()) == {"FINISHED"}
+
+    scene = bpy.context.scene
+    scene.frame_set(0)
+    hero_armature.pose.bones["Spine"].location = (1.0, 2.0, 3.0)
+    scene.frame_set(2)
+
+    assert tuple(hero_armature.pose.bones["Spine"].location) == pytest.approx((1.0, 2.0, 3.0))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+from conftest import ReportCollector, write_skinnedanim
+from utils import Utils
+from cbb_skinned_addon.core.animation_core import SkinnedAnimData
+from cbb_skinned_addon.core.animation_preview import AnimationPreview
+from cbb_skinned_addon.core.skeleton_core import SkeletonDataCache
+
+@pytest.fixture
+def idle_action(hero_armature):
+    action = bpy.data.actions.new("idle")
+    hero_armature.animation_data_create().action = action
+    yield action
+    AnimationPreview.drop()
+
+def start_preview(armature, tmp_path):
+    msg_handler = Utils.MessageHandler(False, ReportCollector().report)
+    positions = np.random.default_rng(0).normal(scale=0.1, size=(4, 3, 3))
+    write_skinnedanim(tmp_path / "walk.SkinnedAnim", positions, np.tile([0.0, 0.0, 0.0, 1.0], (4, 3, 1)))
+    anim_data = SkinnedAnimData.read_skinnedanim_data(tmp_path / "walk.SkinnedAnim", msg_handler)
+    skeleton_data = SkeletonDataCache.get(armature, False, False, msg_handler)
+    assert AnimationPreview.start(armature, "walk", anim_data, skeleton_data, msg_handler)
+    return msg_handler
+
+def test_preview_keeps_a_user_on_the_stashed_action(hero_armature, idle_action, tmp_path):
+    start_preview(hero_armature, tmp_path)
+
+    assert hero_armature.animation_data.action is None
+    assert idle_action.users == 1 and idle_action.use_fake_user
+
+    AnimationPreview.stop()
+
+    assert hero_armature.animation_data.action == idle_action
+    assert not idle_action.use_fake_user
+    assert idle_action.users == 1
+
+def test_bake_stashes_the_replaced_action(hero_armature, idle_action, tmp_path):
+    msg_handler = start_preview(hero_armature, tmp_path)
+
+    baked_action = AnimationPreview.bake(msg_handler)
+
+    animation_data = hero_armature.animation_data
+    assert baked_action is not None and animation_data.action == baked_action
+    assert not idle_action.use_fake_user
+    assert idle_action.users == 1
+    assert [(track.name, track.mute, [strip.action for strip in track.strips]) for track in animation_data.nla_tracks] == [("[Action Stash]", True, [idle_action])]
+
+def test_bake_leaves_a_fake_user_action_unstashed(hero_armature, idle_action, tmp_path):
+    idle_action.use_fake_user = True
+    msg_handler = start_preview(hero_armature, tmp_path)
+
+    AnimationPreview.bake(msg_handler)
+
+    assert idle_action.use_fake_user
+    assert len(hero_armature.animation_data.nla_tracks) == 0
@@ -0,0 +1,42 @@
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+from cbb_skinned_addon.core import skeleton_core
+from cbb_skinned_addon.core.skeleton_core import ArmatureIndex, SkeletonData
+from utils import Utils
+
+@pytest.fixture
+def skeleton_handlers():
+    skeleton_core.register()
+    yield
+    skeleton_core.unregister()
+
+def get_fingerprint(armature) -> str:
+    return ArmatureIndex.get_armature_fingerprint(armature, Utils.MessageHandler(False))
+
+def test_imported_armature_matches_its_skeleton_file(hero_armature, tmp_path):
+    file_fingerprint = SkeletonData.probe_skeleton(tmp_path / "hero.Skeleton")["fingerprint"]
+
+    assert get_fingerprint(hero_armature) == file_fingerprint
+    assert ArmatureIndex.get(bpy.context.scene).find_by_fingerprint(3, file_fingerprint, Utils.MessageHandler(False)) == [hero_armature]
+
+def test_renamed_bone_changes_the_fingerprint(hero_armature, skeleton_handlers, tmp_path):
+    file_fingerprint = SkeletonData.probe_skeleton(tmp_path / "hero.Skeleton")["fingerprint"]
+
+    hero_armature.data.bones["Spine"].name = "Chest"
+    bpy.context.view_layer.update()
+
+    assert get_fingerprint(hero_armature) != file_fingerprint
+    assert ArmatureIndex.get(bpy.context.scene).find_by_fingerprint(3, file_fingerprint, Utils.MessageHandler(False)) == []
+
+def test_reparented_bone_changes_the_fingerprint(hero_armature, skeleton_handlers, tmp_path):
+    file_fingerprint = SkeletonData.probe_skeleton(tmp_path / "hero.Skeleton")["fingerprint"]
+
+    bpy.context.view_layer.objects.active = hero_armature
+    bpy.ops.object.mode_set(mode="EDIT")
+    edit_bones = hero_armature.data.edit_bones
+    edit_bones["Head"].parent = edit_bones["Base"]
+    bpy.ops.object.mode_set(mode="OBJECT")
+
+    assert get_fingerprint(hero_armature) != file_fingerprint
@@ -0,0 +1,69 @@
+import os
+import pytest
+
+pytest.importorskip("bpy")
+
+from cbb_skinned_addon.core.asset_catalog import AssetCatalog
+from cbb_skinned_addon.core.xml_scanner import ModelReference
+from utils import Utils
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = AssetCatalog(str(tmp_path / "catalog.sqlite"))
+    yield catalog
+
+def touch_later(file_path):
+    file_stat = os.stat(file_path)
+    os.utime(file_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1_000_000_000))
+
+def test_xml_summary_is_invalidated_when_mtime_changes(catalog, tmp_path):
+    file_path = tmp_path / "source.xml"
+    file_path.write_text('<root><Models><item><Name value="model"/><Mesh value="mesh.SkinnedMesh"/></item></Models></root>')
+    models = [ModelReference("model", "mesh.SkinnedMesh", "")]
+
+    catalog.store_xml_summary(file_path, "source_models", models)
+    assert catalog.peek_xml_summary(file_path, "source_models") == models
+
+    touch_later(file_path)
+    assert catalog.peek_xml_summary(file_path, "source_models") is None
+
+def test_get_xml_summary_reads_the_changed_file(catalog, tmp_path):
+    file_path = tmp_path / "source.xml"
+    file_path.write_text('<root><Models><item><Name value="old"/><Mesh value="old.SkinnedMesh"/></item></Models></root>')
+    msg_handler = Utils.MessageHandler(False)
+    assert catalog.get_xml_summary(msg_handler, file_path, "source_models")[0].name == "old"
+
+    # Same size, only the mtime tells the files apart
+    file_path.write_text('<root><Models><item><Name value="new"/><Mesh value="new.SkinnedMesh"/></item></Models></root>')
+    touch_later(file_path)
+
+    assert catalog.get_xml_summary(msg_handler, file_path, "source_models")[0].name == "new"
+
+def test_asset_header_is_invalidated_when_mtime_changes(catalog, tmp_path):
+    file_path = tmp_path / "clip.SkinnedAnim"
+    file_path.write_bytes(bytes(64))
+
+    catalog.store_asset_header(file_path, {"bone_count": 3})
+    assert catalog.get_asset_header(file_path) == {"bone_count": 3}
+
+    touch_later(file_path)
+    assert catalog.get_asset_header(file_path) is None
+
+def test_catalog_persists_between_sessions(tmp_path):
+    file_path = tmp_path / "clip.SkinnedAnim"
+    file_path.write_bytes(bytes(64))
+    database_path = str(tmp_path / "catalog.sqlite")
+
+    AssetCatalog(database_path).store_asset_header(file_path, {"bone_count": 3})
+
+    assert AssetCatalog(database_path).get_asset_header(file_path) == {"bone_count": 3}
+
+def test_walk_doesnt_follow_directory_links(catalog, tmp_path):
+    asset_directory = tmp_path / "assets"
+    (asset_directory / "textures").mkdir(parents=True)
+    (asset_directory / "textures" / "hero.png").write_bytes(b"")
+    (asset_directory / "textures" / "loop").symlink_to(asset_directory, target_is_directory=True)
+
+    for _ in range(2):
+        listing = {os.path.relpath(root, asset_directory): (sorted(directories), sorted(files)) for root, directories, files in catalog.walk(asset_directory)}
+        assert listing == {".": (["textures"], []), "textures": ([], ["hero.png", "loop"])}
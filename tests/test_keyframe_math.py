@@ -0,0 +1,111 @@
+import numpy as np
+from conftest import load_core_module
+
+keyframe_math = load_core_module("keyframe_math")
+
+def get_random_quaternions(rng: np.random.Generator, shape: tuple[int, ...]) -> np.ndarray:
+    quaternions = rng.normal(size=shape + (4,))
+    return quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+
+def get_smooth_rotations(frame_count: int, bone_count: int) -> np.ndarray:
+    angles = np.linspace(0.0, np.pi, frame_count)[:, np.newaxis] * np.arange(1, bone_count + 1) + 0.3 * np.sin(np.arange(frame_count) * 0.2)[:, np.newaxis]
+    rotations = np.zeros((frame_count, bone_count, 4))
+    rotations[..., 0] = np.cos(angles / 2.0)
+    rotations[..., 3] = np.sin(angles / 2.0)
+    return rotations
+
+def test_position_reduction_stays_within_tolerance():
+    rng = np.random.default_rng(0)
+    frame_count = 120
+    times = np.linspace(0.0, 4.0, frame_count)[:, np.newaxis, np.newaxis]
+    positions = np.sin(times * rng.uniform(0.5, 3.0, size=(1, 6, 3))) + rng.normal(scale=0.01, size=(frame_count, 6, 3))
+    tolerance = 0.05
+
+    keep = keyframe_math.reduce_keyframes(positions, tolerance, keyframe_math.get_position_errors)
+
+    assert keep.shape == (frame_count, 6)
+    assert keep[0].all() and keep[-1].all()
+    assert keep.sum() < keep.size
+    errors = keyframe_math.get_position_errors(positions, keyframe_math.interpolate_keys(positions, keep))
+    assert errors.max() <= tolerance
+
+def test_rotation_reduction_stays_within_tolerance():
+    rotations = keyframe_math.make_quaternions_continuous(get_smooth_rotations(90, 4))
+    tolerance = np.radians(0.5)
+
+    keep = keyframe_math.reduce_keyframes(rotations, tolerance, keyframe_math.get_rotation_errors)
+
+    assert keep[0].all() and keep[-1].all()
+    assert keep.sum() < keep.size
+    errors = keyframe_math.get_rotation_errors(rotations, keyframe_math.interpolate_keys(rotations, keep))
+    assert errors.max() <= tolerance
+
+def test_zero_tolerance_keeps_every_non_linear_frame():
+    positions = np.cumsum(np.random.default_rng(1).normal(size=(30, 2, 3)), axis=0)
+
+    keep = keyframe_math.reduce_keyframes(positions, 0.0, keyframe_math.get_position_errors)
+
+    errors = keyframe_math.get_position_errors(positions, keyframe_math.interpolate_keys(positions, keep))
+    assert np.allclose(errors, 0.0)
+
+def test_linear_channel_keeps_only_endpoints():
+    positions = np.linspace(0.0, 1.0, 50)[:, np.newaxis, np.newaxis] * np.ones((1, 3, 3))
+
+    keep = keyframe_math.reduce_keyframes(positions, 1e-6, keyframe_math.get_position_errors)
+
+    assert keep.sum() == 6
+    assert keep[0].all() and keep[-1].all()
+
+def test_reduction_of_empty_and_single_frame_channels():
+    assert keyframe_math.reduce_keyframes(np.zeros((0, 2, 3)), 0.1, keyframe_math.get_position_errors).shape == (0, 2)
+    assert keyframe_math.reduce_keyframes(np.ones((1, 2, 3)), 0.1, keyframe_math.get_position_errors).all()
+
+def test_make_quaternions_continuous_keeps_rotations():
+    quaternions = get_random_quaternions(np.random.default_rng(2), (40, 3))
+
+    continuous = keyframe_math.make_quaternions_continuous(quaternions)
+
+    assert np.all(np.sum(continuous[1:] * continuous[:-1], axis=-1) >= 0.0)
+    assert np.allclose(np.abs(np.sum(continuous * quaternions, axis=-1)), 1.0)
+
+def test_get_resample_times_edges():
+    assert len(keyframe_math.get_resample_times(0, 2.0)) == 0
+    assert np.array_equal(keyframe_math.get_resample_times(1, 2.0), [0.0])
+    assert np.array_equal(keyframe_math.get_resample_times(5, 1.0), [0.0, 1.0, 2.0, 3.0, 4.0])
+    # The last frame is only sampled when the step lands on it
+    assert np.array_equal(keyframe_math.get_resample_times(5, 2.0), [0.0, 2.0, 4.0])
+    assert np.array_equal(keyframe_math.get_resample_times(6, 2.0), [0.0, 2.0, 4.0])
+    assert np.allclose(keyframe_math.get_resample_times(3, 0.5), [0.0, 0.5, 1.0, 1.5, 2.0])
+    assert keyframe_math.get_resample_times(31, 2.0)[-1] == 30.0
+
+def test_resample_linear_clamps_to_last_frame():
+    values = np.arange(4, dtype=np.float64).reshape(4, 1, 1)
+
+    resampled = keyframe_math.resample_linear(values, np.array([0.0, 1.5, 3.0]))
+
+    assert np.allclose(resampled.ravel(), [0.0, 1.5, 3.0])
+
+def test_resample_quaternions_edges():
+    quaternions = get_random_quaternions(np.random.default_rng(3), (6, 2))
+    # Opposite hemispheres between frames must still interpolate along the short path
+    quaternions[1::2] *= -1.0
+
+    times = np.array([0.0, 0.5, 2.25, 5.0])
+    resampled = keyframe_math.resample_quaternions(quaternions, times)
+
+    assert resampled.shape == (4, 2, 4)
+    assert np.allclose(np.linalg.norm(resampled, axis=-1), 1.0)
+    # Whole frames are the source rotations, up to the sign
+    assert np.allclose(np.abs(np.sum(resampled[[0, 3]] * quaternions[[0, 5]], axis=-1)), 1.0)
+    # A halfway sample is as close to both of its frames
+    first_angle = keyframe_math.get_rotation_errors(quaternions[:1], resampled[1:2])
+    second_angle = keyframe_math.get_rotation_errors(quaternions[1:2], resampled[1:2])
+    assert np.allclose(first_angle, second_angle)
+    assert np.all(first_angle < np.pi / 2.0)
+
+def test_resample_single_frame():
+    quaternions = get_random_quaternions(np.random.default_rng(4), (1, 3))
+
+    resampled = keyframe_math.resample_quaternions(quaternions, keyframe_math.get_resample_times(1, 2.0))
+
+    assert np.allclose(resampled, quaternions)
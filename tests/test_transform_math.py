@@ -0,0 +1,58 @@
+import numpy as np
+from conftest import load_core_module
+
+transform_math = load_core_module("transform_math")
+
+NO_PARENT = -1
+
+def get_random_transforms(rng: np.random.Generator, shape: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray]:
+    quaternions = rng.normal(size=shape + (4,))
+    quaternions /= np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    return rng.normal(size=shape + (3,)), quaternions
+
+def assert_same_rotations(quaternions_a: np.ndarray, quaternions_b: np.ndarray):
+    assert np.allclose(np.abs(np.sum(quaternions_a * quaternions_b, axis=-1)), 1.0)
+
+def test_forward_inverse_kinematics_round_trip():
+    # Two roots, children listed before their parents and a deep chain
+    parent_ids = np.array([NO_PARENT, 0, 1, 6, NO_PARENT, 4, 2, 3, 7, 0])
+    local_positions, local_quaternions = get_random_transforms(np.random.default_rng(0), (5, len(parent_ids)))
+
+    world_positions, world_quaternions = transform_math.forward_kinematics(local_positions, local_quaternions, parent_ids)
+    round_trip_positions, round_trip_quaternions = transform_math.inverse_kinematics(world_positions, world_quaternions, parent_ids)
+
+    assert np.allclose(round_trip_positions, local_positions)
+    assert_same_rotations(round_trip_quaternions, local_quaternions)
+
+def test_inverse_forward_kinematics_round_trip():
+    parent_ids = np.array([NO_PARENT, 0, 0, 1, 3])
+    world_positions, world_quaternions = get_random_transforms(np.random.default_rng(1), (len(parent_ids),))
+
+    local_positions, local_quaternions = transform_math.inverse_kinematics(world_positions, world_quaternions, parent_ids)
+    round_trip_positions, round_trip_quaternions = transform_math.forward_kinematics(local_positions, local_quaternions, parent_ids)
+
+    assert np.allclose(round_trip_positions, world_positions)
+    assert_same_rotations(round_trip_quaternions, world_quaternions)
+
+def test_forward_kinematics_matches_matrices():
+    parent_ids = np.array([NO_PARENT, 0, 1, 1])
+    local_positions, local_quaternions = get_random_transforms(np.random.default_rng(2), (len(parent_ids),))
+
+    world_positions, world_quaternions = transform_math.forward_kinematics(local_positions, local_quaternions, parent_ids)
+
+    local_matrices = transform_math.compose_matrices(local_positions, local_quaternions)
+    world_matrices = transform_math.compose_matrices(world_positions, world_quaternions)
+    for bone_id, parent_id in enumerate(parent_ids):
+        expected = local_matrices[bone_id] if parent_id == NO_PARENT else world_matrices[parent_id] @ local_matrices[bone_id]
+        assert np.allclose(world_matrices[bone_id], expected)
+    assert np.allclose(transform_math.get_local_matrices(world_matrices, parent_ids), local_matrices)
+
+def test_matrix_quaternion_round_trip():
+    _, quaternions = get_random_transforms(np.random.default_rng(3), (20,))
+
+    assert_same_rotations(transform_math.matrices_to_quaternions(transform_math.quaternions_to_matrices(quaternions)), quaternions)
+
+def test_hierarchy_levels_leave_out_cycles():
+    levels = transform_math.get_hierarchy_levels(np.array([NO_PARENT, 0, 1, 4, 3]))
+
+    assert [level.tolist() for level in levels] == [[0], [1], [2]]
@@ -0,0 +1,81 @@
+import builtins
+import xml.etree.ElementTree as ET
+import pytest
+
+pytest.importorskip("bpy")
+
+from cbb_skinned_addon.core import xml_scanner
+from cbb_skinned_addon.core.xml_scanner import iter_models, find_model
+from utils import Utils
+
+MODEL_COUNT = 50000
+
+def write_source_xml(file_path, model_count: int, tail: str = ""):
+    with open(file_path, "w") as opened_file:
+        opened_file.write("<root><Models>")
+        for model_number in range(model_count):
+            opened_file.write(f'<item><Name value="model_{model_number}"/><Mesh value="/mesh_{model_number}.SkinnedMesh"/><Material value="/materials.xml|material_{model_number}"/></item>')
+        opened_file.write(f"</Models></root>{tail}")
+
+@pytest.fixture
+def opened_files(monkeypatch):
+    """
+    Records the file objects the scanner opens.
+    """
+    opened_files = []
+    def recording_open(*args, **kwargs):
+        opened_file = builtins.open(*args, **kwargs)
+        opened_files.append(opened_file)
+        return opened_file
+    monkeypatch.setattr(xml_scanner, "open", recording_open, raising=False)
+    return opened_files
+
+def test_iter_models_reads_every_model(tmp_path):
+    file_path = tmp_path / "source.xml"
+    write_source_xml(file_path, 3)
+
+    models = list(iter_models(file_path))
+
+    assert [model.name for model in models] == ["model_0", "model_1", "model_2"]
+    assert models[1].mesh == "mesh_1.SkinnedMesh"
+    assert models[1].material == "materials.xml|material_1"
+
+def test_find_model_stops_at_the_first_match(tmp_path, opened_files):
+    # Everything after the models is malformed, so parsing the whole file fails
+    file_path = tmp_path / "large_source.xml"
+    write_source_xml(file_path, MODEL_COUNT, "<broken")
+    with pytest.raises(ET.ParseError):
+        list(iter_models(file_path))
+
+    reports = []
+    model = find_model(Utils.MessageHandler(False, lambda report_type, message: reports.append(message)), file_path, "MESH_10.skinnedmesh")
+
+    assert model is not None and model.name == "model_10"
+    assert reports == []
+    assert all(opened_file.closed for opened_file in opened_files)
+
+def test_closing_iter_models_closes_the_file(tmp_path, opened_files):
+    file_path = tmp_path / "source.xml"
+    write_source_xml(file_path, MODEL_COUNT)
+
+    models = iter_models(file_path)
+    assert next(models).name == "model_0"
+    assert len(opened_files) == 1 and not opened_files[0].closed
+
+    models.close()
+
+    assert opened_files[0].closed
+
+def test_iter_models_tells_item_types_and_models_apart(tmp_path):
+    file_path = tmp_path / "source.xml"
+    file_path.write_text(
+        '<root><Models><item type="Model"><Mesh value="/body.SkinnedMesh"/></item><item type="Effect"><Mesh value="/aura.SkinnedMesh"/></item></Models>'
+        '<Parts><item type="Model"><Mesh value="/weapon.SkinnedMesh"/></item><item type="Sound"/></Parts></root>')
+
+    models = {model.mesh: model for model in iter_models(file_path)}
+
+    assert set(models) == {"body.SkinnedMesh", "aura.SkinnedMesh", "weapon.SkinnedMesh"}
+    assert (models["body.SkinnedMesh"].item_type, models["body.SkinnedMesh"].in_models) == ("Model", True)
+    assert (models["aura.SkinnedMesh"].item_type, models["aura.SkinnedMesh"].in_models) == ("Effect", True)
+    assert (models["weapon.SkinnedMesh"].item_type, models["weapon.SkinnedMesh"].in_models) == ("Model", False)
+    assert find_model(Utils.MessageHandler(False), file_path, "weapon.SkinnedMesh") is None